@@ -1,24 +1,32 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, Response, send_from_directory, abort, stream_with_context
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user, UserMixin
 from werkzeug.security import check_password_hash
 from werkzeug.utils import secure_filename
 import os
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from config import Config
-from models import db, User, NewsArticle, DeliveryLog, SystemLog
+from models import db, User, NewsArticle, DeliveryLog, SystemLog, TraceSpan, ProfileRecord, DeliveryRun, UsageDaily
 from services.news_service import NewsService
 from services.ai_service import AIService
 from services.tts_service import TTSService
 from services.whatsapp_service import WhatsAppService
+from services.delivery_status_service import DeliveryStatusService
+from services.task_progress_service import TaskProgressService
+from celery_app import celery
 from tasks import fetch_news_task, daily_delivery_task, cleanup_audio_task, health_check_task
 from scheduler import NewsScheduler
+from metrics import metrics, install_sqlalchemy_hooks
+from tracing import build_trace_view
+from profiling import profiling, install_flask_hooks
 
 app = Flask(__name__)
 app.config.from_object(Config)
 
 db.init_app(app)
+install_sqlalchemy_hooks()
+install_flask_hooks(app)
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'admin_login'
@@ -27,6 +35,10 @@ news_service = NewsService()
 ai_service = AIService()
 tts_service = TTSService()
 whatsapp_service = WhatsAppService()
+delivery_status_service = DeliveryStatusService()
+if not Config.WHATSAPP_APP_SECRET:
+    print("WARNING: WHATSAPP_APP_SECRET is not set; WhatsApp status callbacks will be "
+          + ("accepted unsigned" if Config.WHATSAPP_ALLOW_UNSIGNED_CALLBACKS else "rejected"))
 
 scheduler = NewsScheduler()
 
@@ -166,13 +178,32 @@ def admin_dashboard():
     
     users_by_language = db.session.query(User.language, db.func.count(User.id)).group_by(User.language).all()
     
+    delivery_runs = DeliveryRun.query.order_by(DeliveryRun.started_at.desc()).limit(5).all()
+    
+    usage_since = datetime.utcnow().date() - timedelta(days=6)
+    usage_by_day = db.session.query(
+        UsageDaily.day,
+        UsageDaily.provider,
+        db.func.sum(UsageDaily.calls),
+        db.func.sum(UsageDaily.prompt_tokens),
+        db.func.sum(UsageDaily.completion_tokens),
+        db.func.sum(UsageDaily.characters),
+        db.func.sum(UsageDaily.audio_bytes),
+        db.func.sum(UsageDaily.latency_ms_total),
+        db.func.sum(UsageDaily.estimated_cost)
+    ).filter(UsageDaily.day >= usage_since).group_by(UsageDaily.day, UsageDaily.provider).order_by(
+        UsageDaily.day.desc(), UsageDaily.provider
+    ).all()
+    
     return render_template('admin_dashboard.html',
                          total_users=total_users,
                          active_users=active_users,
                          total_articles=total_articles,
                          recent_articles=recent_articles,
                          recent_logs=recent_logs,
-                         users_by_language=users_by_language)
+                         users_by_language=users_by_language,
+                         delivery_runs=delivery_runs,
+                         usage_by_day=usage_by_day)
 
 @app.route('/admin/users')
 @login_required
@@ -194,6 +225,76 @@ def admin_articles():
     articles = query.order_by(NewsArticle.created_at.desc()).paginate(page=page, per_page=20, error_out=False)
     return render_template('admin_articles.html', articles=articles, current_language=language)
 
+@app.route('/admin/traces')
+@login_required
+def admin_traces():
+    page = request.args.get('page', 1, type=int)
+    traces = TraceSpan.query.filter(TraceSpan.parent_id.is_(None)).order_by(
+        TraceSpan.started_at.desc()
+    ).paginate(page=page, per_page=50, error_out=False)
+    return render_template('admin_traces.html', traces=traces)
+
+@app.route('/admin/traces/<trace_id>')
+@login_required
+def admin_trace(trace_id):
+    spans = TraceSpan.query.filter_by(trace_id=trace_id).all()
+    if not spans:
+        return render_template('404.html'), 404
+    
+    view = build_trace_view(spans)
+    slowest = sorted(spans, key=lambda span: span.duration_ms or 0, reverse=True)[:10]
+    return render_template('admin_trace.html', trace_id=trace_id, view=view, slowest=slowest)
+
+@app.route('/admin/profiles')
+@login_required
+def admin_profiles():
+    page = request.args.get('page', 1, type=int)
+    profiles = ProfileRecord.query.order_by(ProfileRecord.created_at.desc()).paginate(page=page, per_page=50, error_out=False)
+    return render_template('admin_profiles.html', profiles=profiles, armed=profiling.armed_targets())
+
+@app.route('/admin/profiles/<int:profile_id>/download')
+@login_required
+def admin_profile_download(profile_id):
+    profile = ProfileRecord.query.get_or_404(profile_id)
+    folder = os.path.abspath(Config.PROFILES_FOLDER)
+    if not os.path.exists(os.path.join(folder, profile.file_name)):
+        abort(404)
+    return send_from_directory(folder, profile.file_name, as_attachment=True)
+
+@app.route('/api/profiling/arm', methods=['POST'])
+@login_required
+def api_profiling_arm():
+    if not profiling.enabled:
+        return jsonify({'success': False, 'error': 'Profiling is disabled (PROFILING_ENABLED=False)'}), 409
+    
+    try:
+        target = request.json.get('target')
+        count = int(request.json.get('count', 1))
+        mode = request.json.get('mode', 'deterministic')
+        
+        if not target or not (target.startswith('task:') or target.startswith('route:')):
+            return jsonify({'success': False, 'error': 'Target must look like task:<name> or route:<endpoint>'}), 400
+        
+        profiling.arm(target, count, mode)
+        return jsonify({
+            'success': True,
+            'message': f'Profiling armed for the next {count} runs of {target} ({mode})'
+        })
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/profiling/disarm', methods=['POST'])
+@login_required
+def api_profiling_disarm():
+    try:
+        target = request.json.get('target')
+        profiling.disarm(target)
+        return jsonify({'success': True, 'message': f'Profiling disarmed for {target}'})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/fetch-news', methods=['POST'])
 @login_required
 def api_fetch_news():
@@ -226,6 +327,36 @@ def api_manual_delivery():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def _celery_task_state(task_id):
+    try:
+        return celery.AsyncResult(task_id).state
+    except Exception:
+        return 'UNKNOWN'
+
+@app.route('/api/task/<task_id>')
+@login_required
+def api_task_status(task_id):
+    try:
+        task_state = _celery_task_state(task_id)
+        return jsonify({
+            'task_id': task_id,
+            'task_state': task_state,
+            'result': str(celery.AsyncResult(task_id).result) if task_state in ('SUCCESS', 'FAILURE') else None,
+            'progress': TaskProgressService().snapshot(task_id)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/task/<task_id>/stream')
+@login_required
+def api_task_stream(task_id):
+    # One long-lived connection per watcher instead of reloading the dashboard
+    events = TaskProgressService().stream(task_id, celery_state=_celery_task_state)
+    return Response(stream_with_context(events), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @app.route('/api/stats')
 @login_required
 def api_stats():
@@ -264,6 +395,32 @@ def api_toggle_user(user_id):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/metrics')
+def metrics_endpoint():
+    if Config.METRICS_TOKEN and request.headers.get('Authorization') != f"Bearer {Config.METRICS_TOKEN}":
+        return 'Unauthorized', 401
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/webhooks/whatsapp', methods=['GET', 'POST'])
+def whatsapp_webhook():
+    if request.method == 'GET':
+        if delivery_status_service.verify_subscription(request.args.get('hub.mode'), request.args.get('hub.verify_token')):
+            return request.args.get('hub.challenge', ''), 200
+        return 'Forbidden', 403
+    
+    raw_body = request.get_data()
+    if not delivery_status_service.verify_signature(raw_body, request.headers.get('X-Hub-Signature-256')):
+        return 'Invalid signature', 403
+    
+    try:
+        payload = json.loads(raw_body)
+    except ValueError:
+        return 'Invalid payload', 400
+    
+    # Acknowledge straight away; the batched writer applies the statuses
+    delivery_status_service.enqueue(delivery_status_service.extract_events(payload))
+    return '', 200
+
 @app.errorhandler(404)
 def not_found_error(error):
     return render_template('404.html'), 404
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import time
+import random
+import resource
+import tempfile
+import subprocess
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_server import StubServer, DEFAULT_PROFILE
+
+# End-to-end benchmark of daily_delivery_task -> process_language_delivery
+# against the local stub APIs.
+#
+#   python benchmarks/pipeline_benchmark.py                  # 1k, 10k, 100k users
+#   BENCH_SIZES=1000 python benchmarks/pipeline_benchmark.py
+#   python benchmarks/pipeline_benchmark.py compare old.json new.json
+#
+# Each size runs in its own interpreter, so peak RSS (ru_maxrss only ever grows
+# within a process) is that size's own peak and no state leaks between sizes.
+
+BENCH_PROFILE = {
+    'seed': 7,
+    'newsapi': {'latency': {'dist': 'lognormal', 'median_ms': 20, 'sigma': 0.3}},
+    'openai': {'latency': {'dist': 'lognormal', 'median_ms': 200, 'sigma': 0.4}, 'stream_chunk_ms': 1},
+    'tts': {'latency': {'dist': 'lognormal', 'median_ms': 80, 'sigma': 0.3}},
+    'whatsapp': {'latency': {'dist': 'lognormal', 'median_ms': 2, 'sigma': 0.3}}
+}
+
+ARTICLES_PER_LANGUAGE = int(os.getenv('BENCH_ARTICLES_PER_LANGUAGE', 200))
+OUTPUT_DIR = os.getenv('BENCH_OUTPUT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results'))
+
+def build_profile():
+    profile = json.loads(json.dumps(DEFAULT_PROFILE))
+    overrides = BENCH_PROFILE
+    if os.getenv('STUB_PROFILE'):
+        with open(os.getenv('STUB_PROFILE')) as f:
+            overrides = json.load(f)
+    for key, value in overrides.items():
+        if isinstance(value, dict):
+            profile.setdefault(key, {}).update(value)
+        else:
+            profile[key] = value
+    return profile
+
+def configure_environment(stub):
+    # Must run before config.py is imported anywhere
+    db_path = os.path.join(tempfile.mkdtemp(prefix='dailypod-bench-'), 'bench.db')
+    os.environ.update(stub.env())
+    os.environ.update({
+        'DATABASE_URL': f"sqlite:///{db_path}",
+        'OPENAI_API_KEY': 'bench',
+        'NEWS_API_KEY': 'bench',
+        'WHATSAPP_TOKEN': 'bench',
+        'WHATSAPP_PHONE_ID': 'bench-sender',
+        'DEBUG': 'False'
+    })
+    return db_path
+
+def percentiles(samples):
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+
+    return {
+        'count': len(ordered),
+        'p50_ms': pick(0.50),
+        'p95_ms': pick(0.95),
+        'p99_ms': pick(0.99),
+        'max_ms': round(ordered[-1] * 1000, 3),
+        'total_ms': round(sum(ordered) * 1000, 3)
+    }
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {}
+        self.patched = []
+
+    def wrap(self, cls, method_name, stage):
+        original = getattr(cls, method_name)
+        samples = self.samples.setdefault(stage, [])
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - start)
+
+        setattr(cls, method_name, timed)
+        self.patched.append((cls, method_name, original))
+
+    def reset(self):
+        for samples in self.samples.values():
+            samples.clear()
+
+    def report(self):
+        return {stage: percentiles(samples) for stage, samples in self.samples.items()}
+
+class QueryCounter:
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return 'unknown'
+
+def seed(db, User, NewsArticle, languages, user_count):
+    db.drop_all()
+    db.create_all()
+
+    rng = random.Random(user_count)
+    now = datetime.utcnow()
+
+    db.session.execute(db.insert(User), [
+        {
+            'phone_number': f"1555{i:07d}",
+            'language': languages[i % len(languages)],
+            'is_active': True,
+            'created_at': now
+        }
+        for i in range(user_count)
+    ])
+
+    words = 'market council storm election league startup court budget senate merger tariff summit'.split()
+    db.session.execute(db.insert(NewsArticle), [
+        {
+            'title': f"{language} story {i}: " + ' '.join(rng.choice(words) for _ in range(6)),
+            'content': ' '.join(rng.choice(words) for _ in range(90)),
+            'summary': ' '.join(rng.choice(words) for _ in range(40)),
+            'source': f"Source {i % 12}",
+            'url': f"https://bench.local/{language}/{i}",
+            'category': 'general',
+            'language': language,
+            'created_at': now - timedelta(minutes=rng.randint(0, 24 * 60))
+        }
+        for language in languages
+        for i in range(ARTICLES_PER_LANGUAGE)
+    ])
+    db.session.commit()
+
+def run_size(app, db, timer, counter, user_count):
+    from models import User, NewsArticle, DeliveryLog
+    from tasks import daily_delivery_task
+    from config import Config
+
+    with app.app_context():
+        seed(db, User, NewsArticle, Config.SUPPORTED_LANGUAGES, user_count)
+        db.session.remove()
+
+        timer.reset()
+        counter.count = 0
+
+        start = time.perf_counter()
+        result = daily_delivery_task.apply().get()
+        wall = time.perf_counter() - start
+
+        sent = DeliveryLog.query.filter_by(status='sent').count()
+        failed = DeliveryLog.query.filter_by(status='failed').count()
+
+    return {
+        'users': user_count,
+        'result': result,
+        'wall_time_s': round(wall, 3),
+        'messages_sent': sent,
+        'messages_failed': failed,
+        'messages_per_second': round(sent / wall, 2) if wall else 0,
+        'db_queries': counter.count,
+        'db_queries_per_user': round(counter.count / user_count, 2),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1),
+        'stages': timer.report()
+    }
+
+def run_isolated(user_count):
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), 'run-size', str(user_count)],
+                            stdout=subprocess.PIPE, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def run_single(user_count):
+    # Child side of run_isolated(): one size against a fresh stub and database; the
+    # run is printed as JSON on the last line of stdout
+    stub = StubServer(port=0, profile=build_profile(), quiet=True).start()
+    configure_environment(stub)
+
+    from celery_app import celery
+    celery.conf.task_always_eager = True
+    celery.conf.task_eager_propagates = True
+
+    from app import app
+    from models import db
+    from services.news_service import NewsService
+    from services.ai_service import AIService
+    from services.tts_service import TTSService
+    from services.whatsapp_service import WhatsAppService
+    from services.audio_pipeline_service import AudioPipelineService
+
+    timer = StageTimer()
+    timer.wrap(NewsService, 'get_recent_articles', 'select_articles')
+    timer.wrap(AIService, 'create_daily_summary', 'llm_summary')
+    timer.wrap(TTSService, 'create_daily_audio', 'tts_audio')
+    timer.wrap(AudioPipelineService, 'create_daily_briefing', 'streamed_summary_audio')
+    timer.wrap(WhatsAppService, 'send_daily_news', 'whatsapp_send')
+
+    with app.app_context():
+        counter = QueryCounter(db.engine)
+
+    run = run_size(app, db, timer, counter, user_count)
+    stub.stop()
+    print(json.dumps(run))
+
+def run_benchmark():
+    sizes = [int(n) for n in os.getenv('BENCH_SIZES', '1000,10000,100000').split(',')]
+    profile = build_profile()
+
+    print("DailyPod Pipeline Benchmark")
+    print("=" * 50)
+
+    runs = []
+    for size in sizes:
+        print(f"Running {size} subscribers...")
+        run = run_isolated(size)
+        runs.append(run)
+        print(f"   Wall time: {run['wall_time_s']}s")
+        print(f"   Sent: {run['messages_sent']} ({run['messages_per_second']} msg/s)")
+        print(f"   DB queries: {run['db_queries']} ({run['db_queries_per_user']}/user)")
+        print(f"   Peak RSS: {run['peak_rss_mb']} MB")
+        for stage, stats in run['stages'].items():
+            if stats['count']:
+                print(f"   {stage}: p50 {stats['p50_ms']}ms  p95 {stats['p95_ms']}ms  n={stats['count']}")
+
+    revision = git_revision()
+    report = {
+        'revision': revision,
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': sys.version.split()[0],
+        'profile': profile,
+        'runs': runs
+    }
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    output_path = os.path.join(OUTPUT_DIR, f"pipeline_{revision}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print("=" * 50)
+    print(f"Results saved to {output_path}")
+    return report
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    print(f"Comparing {old['revision']} -> {new['revision']}")
+    print("=" * 50)
+
+    old_runs = {run['users']: run for run in old['runs']}
+    for run in new['runs']:
+        before = old_runs.get(run['users'])
+        if not before:
+            continue
+        print(f"{run['users']} subscribers:")
+        for metric in ('wall_time_s', 'messages_per_second', 'db_queries', 'peak_rss_mb'):
+            change = (run[metric] - before[metric]) / before[metric] * 100 if before[metric] else 0
+            print(f"   {metric}: {before[metric]} -> {run[metric]} ({change:+.1f}%)")
+        for stage, stats in run['stages'].items():
+            previous = before['stages'].get(stage, {})
+            if stats.get('count') and previous.get('count'):
+                print(f"   {stage} p95: {previous['p95_ms']}ms -> {stats['p95_ms']}ms")
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == 'compare':
+        compare(sys.argv[2], sys.argv[3])
+    elif len(sys.argv) == 3 and sys.argv[1] == 'run-size':
+        run_single(int(sys.argv[2]))
+    else:
+        run_benchmark()
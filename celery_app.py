@@ -1,5 +1,10 @@
 from celery import Celery
 from config import Config
+from metrics import install_celery_hooks, install_sqlalchemy_hooks
+import tracing
+import profiling
+import usage
+import clients
 
 celery = Celery('dailypod',
                 broker=Config.REDIS_URL,
@@ -7,14 +12,26 @@ celery = Celery('dailypod',
                 include=['tasks', 'celery_beat_schedule'])
 
 celery.conf.update(
-    task_serializer='json',
-    accept_content=['json'],
-    result_serializer='json',
+    task_serializer=Config.CELERY_SERIALIZER,
+    # json stays accepted so messages queued before a serializer switch still run
+    accept_content=sorted({'json', Config.CELERY_SERIALIZER}),
+    result_serializer=Config.CELERY_SERIALIZER,
+    task_compression=Config.CELERY_COMPRESSION,
+    result_compression=Config.CELERY_COMPRESSION,
+    result_expires=Config.CELERY_RESULT_EXPIRES,
     timezone='UTC',
     enable_utc=True,
-    task_track_started=True,
     task_time_limit=30 * 60,
     task_soft_time_limit=25 * 60,
     worker_prefetch_multiplier=1,
     worker_max_tasks_per_child=1000,
-) 
\ No newline at end of file
+)
+
+install_celery_hooks()
+install_sqlalchemy_hooks()
+# Profiling hooks go first so a task's profile is saved while its trace span is still current
+profiling.install_celery_hooks()
+tracing.install_celery_hooks()
+usage.install_celery_hooks()
+# Builds provider clients in each child right after the fork
+clients.install_celery_hooks()
@@ -1,6 +1,7 @@
 from celery.schedules import crontab
 from celery_app import celery
-from tasks import fetch_news_task, daily_delivery_task, cleanup_audio_task, health_check_task
+from config import Config
+from tasks import fetch_news_task, daily_delivery_task, cleanup_audio_task, health_check_task, apply_delivery_status_task, cleanup_traces_task, delivery_slo_check_task, rollup_usage_task, rebuild_seen_filter_task
 
 @celery.on_after_configure.connect
 def setup_periodic_tasks(sender, **kwargs):
@@ -25,6 +26,41 @@ def setup_periodic_tasks(sender, **kwargs):
         name='cleanup-old-audio'
     )
     
+    # Cleanup old trace spans daily at 2:15 AM
+    sender.add_periodic_task(
+        crontab(hour=2, minute=15),
+        cleanup_traces_task.s(),
+        name='cleanup-old-traces'
+    )
+    
+    # Roll provider usage up into daily aggregates every hour
+    sender.add_periodic_task(
+        crontab(minute=5),
+        rollup_usage_task.s(),
+        name='rollup-provider-usage'
+    )
+    
+    # Rebuild the seen-article filter from the database so it is resized as the archive grows
+    sender.add_periodic_task(
+        Config.SEEN_FILTER_REBUILD_HOURS * 3600.0,
+        rebuild_seen_filter_task.s(),
+        name='rebuild-seen-filter'
+    )
+    
+    # Apply queued WhatsApp status callbacks every 10 seconds
+    sender.add_periodic_task(
+        10.0,
+        apply_delivery_status_task.s(),
+        name='apply-delivery-status'
+    )
+    
+    # Refresh delivery run progress and forecast against the deadline every minute
+    sender.add_periodic_task(
+        60.0,
+        delivery_slo_check_task.s(),
+        name='delivery-slo-check'
+    )
+    
     # Health check every hour
     sender.add_periodic_task(
         crontab(hour='*/1'),
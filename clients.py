@@ -0,0 +1,133 @@
+import os
+import time
+import threading
+from config import Config
+from metrics import metrics
+
+# Long-lived provider clients shared by every task in a worker process. Service
+# modules register a factory (and optionally a health check) per client; Celery
+# children build them all once at start-up, and a client that fails its health
+# check, outlives CLIENT_MAX_AGE or was inherited across a fork is rebuilt.
+class ClientRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.factories = {}
+        self.clients = {}
+        self.health_interval = Config.CLIENT_HEALTH_INTERVAL
+        self.max_age = Config.CLIENT_MAX_AGE
+        self.last_check = time.time()
+
+    def register(self, name, factory, healthy=None, close=None):
+        self.factories[name] = (factory, healthy, close)
+
+    def get(self, name):
+        entry = self.clients.get(name)
+        if entry is not None and entry['pid'] == os.getpid():
+            return entry['client']
+        with self.lock:
+            entry = self.clients.get(name)
+            if entry is None or entry['pid'] != os.getpid():
+                entry = self._build(name, 'lazy' if entry is None else 'forked')
+            return entry['client']
+
+    def _build(self, name, reason):
+        factory = self.factories[name][0]
+        start = time.perf_counter()
+        client = factory()
+        metrics.observe('dailypod_client_build_seconds', time.perf_counter() - start, client=name)
+        metrics.inc('dailypod_client_builds_total', client=name, reason=reason)
+        entry = self.clients[name] = {'client': client, 'pid': os.getpid(), 'built_at': time.time()}
+        return entry
+
+    def warm(self):
+        # Builds every registered client; a failing factory is retried lazily on first use
+        for name in list(self.factories):
+            with self.lock:
+                if name in self.clients and self.clients[name]['pid'] == os.getpid():
+                    continue
+                try:
+                    self._build(name, 'warm')
+                except Exception as e:
+                    print(f"Client warm-up failed for {name}: {e}")
+
+    def check(self, force=False):
+        # Rebuilds clients that are broken or too old; runs at most every
+        # CLIENT_HEALTH_INTERVAL seconds unless forced
+        now = time.time()
+        if not force and now - self.last_check < self.health_interval:
+            return []
+        self.last_check = now
+
+        rebuilt = []
+        for name, entry in list(self.clients.items()):
+            _, healthy, close = self.factories[name]
+            reason = None
+            if entry['pid'] != os.getpid():
+                reason = 'forked'
+            elif self.max_age and now - entry['built_at'] > self.max_age:
+                reason = 'expired'
+            elif healthy is not None:
+                try:
+                    if not healthy(entry['client']):
+                        reason = 'unhealthy'
+                except Exception:
+                    reason = 'unhealthy'
+            if reason is None:
+                continue
+
+            with self.lock:
+                if reason != 'forked':
+                    self._close(name, entry['client'], close)
+                try:
+                    self._build(name, reason)
+                except Exception as e:
+                    # Leave it out; the next get() builds it lazily
+                    self.clients.pop(name, None)
+                    print(f"Client rebuild failed for {name}: {e}")
+            rebuilt.append(name)
+        return rebuilt
+
+    def reset(self, name):
+        # Drops one client; the next get() builds a fresh one from its factory
+        with self.lock:
+            entry = self.clients.pop(name, None)
+            if entry is not None and entry['pid'] == os.getpid():
+                self._close(name, entry['client'], self.factories[name][2])
+
+    def close(self):
+        with self.lock:
+            for name, entry in list(self.clients.items()):
+                if entry['pid'] == os.getpid():
+                    self._close(name, entry['client'], self.factories[name][2])
+            self.clients = {}
+
+    def _close(self, name, client, close):
+        try:
+            if close is not None:
+                close(client)
+            elif hasattr(client, 'close'):
+                client.close()
+        except Exception as e:
+            print(f"Error closing client {name}: {e}")
+
+    def report(self):
+        now = time.time()
+        return {name: {'age_seconds': round(now - entry['built_at'], 1), 'pid': entry['pid']}
+                for name, entry in self.clients.items()}
+
+clients = ClientRegistry()
+
+def install_celery_hooks():
+    from celery.signals import worker_process_init, task_prerun, worker_process_shutdown
+
+    @worker_process_init.connect(weak=False)
+    def on_worker_process_init(**kwargs):
+        clients.warm()
+
+    @task_prerun.connect(weak=False)
+    def on_task_prerun(**kwargs):
+        clients.check()
+
+    @worker_process_shutdown.connect(weak=False)
+    def on_worker_process_shutdown(**kwargs):
+        clients.close()
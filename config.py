@@ -10,9 +10,23 @@ class Config:
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
     WHATSAPP_TOKEN = os.getenv('WHATSAPP_TOKEN')
     WHATSAPP_PHONE_ID = os.getenv('WHATSAPP_PHONE_ID')
+    # Comma-separated phone_id:token pairs; defaults to the single sender above
+    WHATSAPP_SENDERS = os.getenv('WHATSAPP_SENDERS', '')
+    WHATSAPP_SENDER_RATE = int(os.getenv('WHATSAPP_SENDER_RATE', 80))
+    WHATSAPP_SENDER_COOLDOWN = int(os.getenv('WHATSAPP_SENDER_COOLDOWN', 60))
+    WHATSAPP_VERIFY_TOKEN = os.getenv('WHATSAPP_VERIFY_TOKEN')
+    WHATSAPP_APP_SECRET = os.getenv('WHATSAPP_APP_SECRET')
+    # Without an app secret, status callbacks are rejected unless this is set (local testing only)
+    WHATSAPP_ALLOW_UNSIGNED_CALLBACKS = os.getenv('WHATSAPP_ALLOW_UNSIGNED_CALLBACKS', 'False').lower() == 'true'
     NEWS_API_KEY = os.getenv('NEWS_API_KEY')
     GOOGLE_CLOUD_CREDENTIALS = os.getenv('GOOGLE_CLOUD_CREDENTIALS')
     
+    # Provider endpoints; point these at stub_server.py to run without network
+    NEWS_API_BASE_URL = os.getenv('NEWS_API_BASE_URL', 'https://newsapi.org/v2')
+    OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL') or None
+    GOOGLE_TTS_ENDPOINT = os.getenv('GOOGLE_TTS_ENDPOINT') or None
+    WHATSAPP_API_BASE_URL = os.getenv('WHATSAPP_API_BASE_URL', 'https://graph.facebook.com/v17.0')
+    
     SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
     DEBUG = os.getenv('DEBUG', 'True').lower() == 'true'
     HOST = os.getenv('HOST', '0.0.0.0')
@@ -24,12 +38,138 @@ class Config:
     
     REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
     
+    METRICS_FLUSH_INTERVAL = int(os.getenv('METRICS_FLUSH_INTERVAL', 10))
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    
+    TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'True').lower() == 'true'
+    TRACE_FLUSH_BATCH_SIZE = int(os.getenv('TRACE_FLUSH_BATCH_SIZE', 500))
+    TRACE_RETENTION_DAYS = int(os.getenv('TRACE_RETENTION_DAYS', 7))
+    
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False').lower() == 'true'
+    PROFILE_TARGETS = os.getenv('PROFILE_TARGETS', '')
+    PROFILE_POLL_INTERVAL = int(os.getenv('PROFILE_POLL_INTERVAL', 5))
+    PROFILE_SAMPLE_INTERVAL_MS = int(os.getenv('PROFILE_SAMPLE_INTERVAL_MS', 5))
+    PROFILES_FOLDER = os.getenv('PROFILES_FOLDER', 'profiles')
+    
+    USAGE_FLUSH_BATCH_SIZE = int(os.getenv('USAGE_FLUSH_BATCH_SIZE', 100))
+    USAGE_FLUSH_INTERVAL = int(os.getenv('USAGE_FLUSH_INTERVAL', 30))
+    USAGE_RETENTION_DAYS = int(os.getenv('USAGE_RETENTION_DAYS', 30))
+    OPENAI_PROMPT_COST_PER_1K = float(os.getenv('OPENAI_PROMPT_COST_PER_1K', 0.0015))
+    OPENAI_COMPLETION_COST_PER_1K = float(os.getenv('OPENAI_COMPLETION_COST_PER_1K', 0.002))
+    TTS_COST_PER_MILLION_CHARS = float(os.getenv('TTS_COST_PER_MILLION_CHARS', 16.0))
+    
     SUPPORTED_LANGUAGES = os.getenv('SUPPORTED_LANGUAGES', 'en,es,fr,de,pt').split(',')
     
+    # 'per_language' writes every briefing from scratch; 'translate' writes one in
+    # BRIEFING_CANONICAL_LANGUAGE and translates it into the others
+    BRIEFING_MODE = os.getenv('BRIEFING_MODE', 'per_language')
+    BRIEFING_CANONICAL_LANGUAGE = os.getenv('BRIEFING_CANONICAL_LANGUAGE', 'en')
+    TRANSLATION_CONCURRENCY = int(os.getenv('TRANSLATION_CONCURRENCY', 4))
+    
+    # Pin prompt templates to an older version, e.g. "daily_summary=1"; latest otherwise
+    PROMPT_VERSIONS = os.getenv('PROMPT_VERSIONS', '')
+    
+    # Prompt budgets in tokens per call type; inputs are trimmed to fit, and completion
+    # limits follow from how long the audio should run
+    PROMPT_BUDGET_SUMMARIZE = int(os.getenv('PROMPT_BUDGET_SUMMARIZE', 1200))
+    PROMPT_BUDGET_DAILY_SUMMARY = int(os.getenv('PROMPT_BUDGET_DAILY_SUMMARY', 1500))
+    PROMPT_BUDGET_TRANSLATE = int(os.getenv('PROMPT_BUDGET_TRANSLATE', 1500))
+    ARTICLE_AUDIO_SECONDS = int(os.getenv('ARTICLE_AUDIO_SECONDS', 60))
+    DAILY_AUDIO_SECONDS = int(os.getenv('DAILY_AUDIO_SECONDS', 150))
+    SPEAKING_WORDS_PER_MINUTE = int(os.getenv('SPEAKING_WORDS_PER_MINUTE', 140))
+    
+    # Identical concurrent summary and TTS calls share one provider request
+    SINGLE_FLIGHT_LOCK_TTL = int(os.getenv('SINGLE_FLIGHT_LOCK_TTL', 300))
+    SINGLE_FLIGHT_WAIT_TIMEOUT = int(os.getenv('SINGLE_FLIGHT_WAIT_TIMEOUT', 240))
+    SINGLE_FLIGHT_RESULT_TTL = int(os.getenv('SINGLE_FLIGHT_RESULT_TTL', 600))
+    
+    # Per-provider circuit breakers: trip on failure or slow-call rate over the window,
+    # stay open for CIRCUIT_OPEN_SECONDS, then let probes through
+    CIRCUIT_WINDOW_SECONDS = int(os.getenv('CIRCUIT_WINDOW_SECONDS', 60))
+    CIRCUIT_MIN_CALLS = int(os.getenv('CIRCUIT_MIN_CALLS', 10))
+    CIRCUIT_FAILURE_RATE = float(os.getenv('CIRCUIT_FAILURE_RATE', 0.5))
+    CIRCUIT_SLOW_CALL_SECONDS = float(os.getenv('CIRCUIT_SLOW_CALL_SECONDS', 10))
+    CIRCUIT_SLOW_RATE = float(os.getenv('CIRCUIT_SLOW_RATE', 0.8))
+    CIRCUIT_OPEN_SECONDS = int(os.getenv('CIRCUIT_OPEN_SECONDS', 30))
+    CIRCUIT_HALF_OPEN_PROBES = int(os.getenv('CIRCUIT_HALF_OPEN_PROBES', 1))
+    
+    # Hedged feed fetches: a second request after the provider's p95 latency
+    HEDGE_FETCHES = os.getenv('HEDGE_FETCHES', 'False').lower() == 'true'
+    HEDGE_MIN_DELAY = float(os.getenv('HEDGE_MIN_DELAY', 0.2))
+    HEDGE_DEFAULT_DELAY = float(os.getenv('HEDGE_DEFAULT_DELAY', 2.0))
+    HEDGE_MIN_SAMPLES = int(os.getenv('HEDGE_MIN_SAMPLES', 20))
+    HEDGE_MAX_WORKERS = int(os.getenv('HEDGE_MAX_WORKERS', 16))
+    
+    # Provider clients are built once per worker process; each is health-checked at
+    # most every CLIENT_HEALTH_INTERVAL seconds and rebuilt after CLIENT_MAX_AGE (0: never)
+    CLIENT_HEALTH_INTERVAL = int(os.getenv('CLIENT_HEALTH_INTERVAL', 60))
+    CLIENT_MAX_AGE = int(os.getenv('CLIENT_MAX_AGE', 3600))
+    
+    # Run feed fetching, article summaries and the delivery fan-out on the async
+    # services, with up to ASYNC_CONCURRENCY provider calls in flight per worker
+    ASYNC_SERVICES = os.getenv('ASYNC_SERVICES', 'False').lower() == 'true'
+    ASYNC_CONCURRENCY = int(os.getenv('ASYNC_CONCURRENCY', 100))
+    
+    # Celery message format: json, or msgpack once the msgpack package is installed;
+    # CELERY_COMPRESSION (zlib, gzip, bzip2) compresses message bodies and results
+    CELERY_SERIALIZER = os.getenv('CELERY_SERIALIZER', 'json')
+    CELERY_COMPRESSION = os.getenv('CELERY_COMPRESSION') or None
+    CELERY_RESULT_EXPIRES = int(os.getenv('CELERY_RESULT_EXPIRES', 3600))
+    TASK_RESULT_REPORT_LIMIT = int(os.getenv('TASK_RESULT_REPORT_LIMIT', 10000))
+    
+    STREAMING_AUDIO = os.getenv('STREAMING_AUDIO', 'False').lower() == 'true'
+    STREAM_SEGMENT_MIN_CHARS = int(os.getenv('STREAM_SEGMENT_MIN_CHARS', 200))
+    STREAM_SEGMENT_MAX_CHARS = int(os.getenv('STREAM_SEGMENT_MAX_CHARS', 1200))
+    STREAM_TTS_CONCURRENCY = int(os.getenv('STREAM_TTS_CONCURRENCY', 3))
+    
     NEWS_COUNTRIES = ['us']
     NEWS_CATEGORIES = ['general', 'business', 'technology', 'sports', 'entertainment']
     
+    RSS_FEEDS = os.getenv('RSS_FEEDS', '')
+    INGEST_CONCURRENCY = int(os.getenv('INGEST_CONCURRENCY', 8))
+    INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', 100))
+    INGEST_QUEUE_SIZE = int(os.getenv('INGEST_QUEUE_SIZE', 1000))
+    
+    SEEN_FILTER_ENABLED = os.getenv('SEEN_FILTER_ENABLED', 'True').lower() == 'true'
+    SEEN_FILTER_CAPACITY = int(os.getenv('SEEN_FILTER_CAPACITY', 200000))
+    SEEN_FILTER_FP_RATE = float(os.getenv('SEEN_FILTER_FP_RATE', 0.001))
+    SEEN_FILTER_MAX_MB = float(os.getenv('SEEN_FILTER_MAX_MB', 16))
+    SEEN_FILTER_REBUILD_HOURS = float(os.getenv('SEEN_FILTER_REBUILD_HOURS', 24))
+    
+    CLUSTER_NUM_PERM = int(os.getenv('CLUSTER_NUM_PERM', 64))
+    CLUSTER_BANDS = int(os.getenv('CLUSTER_BANDS', 16))
+    CLUSTER_THRESHOLD = float(os.getenv('CLUSTER_THRESHOLD', 0.5))
+    CLUSTER_WINDOW_HOURS = int(os.getenv('CLUSTER_WINDOW_HOURS', 48))
+    
+    BRIEFING_SIZE = int(os.getenv('BRIEFING_SIZE', 5))
+    RANKING_WINDOW_HOURS = int(os.getenv('RANKING_WINDOW_HOURS', 24))
+    RANKING_POOL_LIMIT = int(os.getenv('RANKING_POOL_LIMIT', 50000))
+    RANKING_HALF_LIFE_HOURS = float(os.getenv('RANKING_HALF_LIFE_HOURS', 6))
+    RANKING_RECENCY_WEIGHT = float(os.getenv('RANKING_RECENCY_WEIGHT', 1.0))
+    RANKING_SOURCE_WEIGHT = float(os.getenv('RANKING_SOURCE_WEIGHT', 0.5))
+    RANKING_CLUSTER_WEIGHT = float(os.getenv('RANKING_CLUSTER_WEIGHT', 0.5))
+    RANKING_COVERAGE_DECAY = float(os.getenv('RANKING_COVERAGE_DECAY', 0.5))
+    RANKING_PREFERRED_BOOST = float(os.getenv('RANKING_PREFERRED_BOOST', 1.5))
+    # e.g. "Reuters=1.5,Associated Press=1.4"; unlisted sources weigh 1.0
+    RANKING_SOURCE_WEIGHTS = {
+        name.strip(): float(weight)
+        for name, weight in (pair.rsplit('=', 1) for pair in os.getenv('RANKING_SOURCE_WEIGHTS', '').split(',') if '=' in pair)
+    }
+    
     DAILY_DELIVERY_TIME = '07:30'
     
+    DELIVERY_MAX_ATTEMPTS = int(os.getenv('DELIVERY_MAX_ATTEMPTS', 5))
+    DELIVERY_RETRY_BASE_DELAY = int(os.getenv('DELIVERY_RETRY_BASE_DELAY', 60))
+    DELIVERY_RETRY_MAX_DELAY = int(os.getenv('DELIVERY_RETRY_MAX_DELAY', 1800))
+    
+    DELIVERY_STATUS_BATCH_SIZE = int(os.getenv('DELIVERY_STATUS_BATCH_SIZE', 500))
+    
+    DELIVERY_SLO_MINUTES = int(os.getenv('DELIVERY_SLO_MINUTES', 30))
+    DELIVERY_AUTOSCALE = os.getenv('DELIVERY_AUTOSCALE', 'False').lower() == 'true'
+    DELIVERY_AUTOSCALE_STEP = int(os.getenv('DELIVERY_AUTOSCALE_STEP', 2))
+    
+    TASK_STREAM_HEARTBEAT = int(os.getenv('TASK_STREAM_HEARTBEAT', 15))
+    TASK_STREAM_TIMEOUT = int(os.getenv('TASK_STREAM_TIMEOUT', 1800))
+    
     AUDIO_FOLDER = 'static/audio'
     UPLOADS_FOLDER = 'static/uploads' 
\ No newline at end of file
@@ -0,0 +1,203 @@
+import re
+import json
+import time
+import threading
+from contextlib import contextmanager
+from config import Config
+from services.redis_client import get_redis
+from tracing import tracer
+from services import async_runtime
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+BYTE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# Each process buffers increments locally and flushes them into one Redis hash
+# with HINCRBYFLOAT, so Celery prefork children and the web process all add into
+# the same series and /metrics can render them from anywhere.
+class MetricsRegistry:
+    REDIS_KEY = 'metrics:series'
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.flush_interval = Config.METRICS_FLUSH_INTERVAL
+        self.last_flush = time.time()
+        self._task_starts = {}
+
+    def _series(self, name, labels):
+        if not labels:
+            return name
+        label_text = ','.join(f'{k}="{labels[k]}"' for k in sorted(labels))
+        return f"{name}{{{label_text}}}"
+
+    def _add(self, series, value):
+        with self.lock:
+            self.pending[series] = self.pending.get(series, 0) + value
+
+    def inc(self, name, value=1, **labels):
+        self._add(self._series(name, labels), value)
+        self.maybe_flush()
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        for bound in buckets:
+            if value <= bound:
+                self._add(self._series(f"{name}_bucket", dict(labels, le=bound)), 1)
+        self._add(self._series(f"{name}_bucket", dict(labels, le='+Inf')), 1)
+        self._add(self._series(f"{name}_sum", labels), value)
+        self._add(self._series(f"{name}_count", labels), 1)
+        self.maybe_flush()
+
+    @contextmanager
+    def track_call(self, provider, operation):
+        # Every tracked provider call is also a span in the current trace
+        start = time.perf_counter()
+        outcome = 'success'
+        try:
+            with tracer.span(f"{provider}.{operation}"):
+                yield
+        except Exception:
+            outcome = 'error'
+            raise
+        finally:
+            self.observe('dailypod_provider_request_duration_seconds', time.perf_counter() - start,
+                         provider=provider, operation=operation)
+            self.inc('dailypod_provider_requests_total', provider=provider, operation=operation, outcome=outcome)
+
+    def cache_hit(self, cache):
+        self.inc('dailypod_cache_requests_total', cache=cache, result='hit')
+
+    def cache_miss(self, cache):
+        self.inc('dailypod_cache_requests_total', cache=cache, result='miss')
+
+    def maybe_flush(self):
+        if time.time() - self.last_flush >= self.flush_interval and not async_runtime.in_loop():
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.last_flush = time.time()
+        if not pending:
+            return
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for series, value in pending.items():
+                pipe.hincrbyfloat(self.REDIS_KEY, series, value)
+            pipe.execute()
+        except Exception as e:
+            # Keep the increments for the next flush rather than dropping them
+            with self.lock:
+                for series, value in pending.items():
+                    self.pending[series] = self.pending.get(series, 0) + value
+            print(f"Metrics flush failed: {e}")
+
+    def collect(self):
+        self.flush()
+        series = {}
+        try:
+            for key, value in get_redis().hgetall(self.REDIS_KEY).items():
+                series[key.decode()] = float(value)
+        except Exception as e:
+            print(f"Metrics read failed: {e}")
+        with self.lock:
+            for key, value in self.pending.items():
+                series[key] = series.get(key, 0) + value
+        return series
+
+    def render(self):
+        series = self.collect()
+        families = {}
+        for key, value in series.items():
+            name = key.split('{', 1)[0]
+            base, kind = name, 'counter'
+            for suffix in ('_bucket', '_sum', '_count'):
+                if name.endswith(suffix):
+                    base, kind = name[:-len(suffix)], 'histogram'
+                    break
+            families.setdefault((base, kind), []).append((key, value))
+
+        # Derived hit ratio per cache so dashboards do not need to compute it
+        hits, totals = {}, {}
+        for key, value in series.items():
+            if key.startswith('dailypod_cache_requests_total{'):
+                cache = key.split('cache="', 1)[1].split('"', 1)[0]
+                totals[cache] = totals.get(cache, 0) + value
+                if 'result="hit"' in key:
+                    hits[cache] = hits.get(cache, 0) + value
+        if totals:
+            families[('dailypod_cache_hit_ratio', 'gauge')] = [
+                (f'dailypod_cache_hit_ratio{{cache="{cache}"}}', hits.get(cache, 0) / total)
+                for cache, total in totals.items() if total
+            ]
+
+        lines = []
+        for (base, kind), samples in sorted(families.items()):
+            lines.append(f"# TYPE {base} {kind}")
+            for key, value in sorted(samples, key=lambda sample: self._sort_key(sample[0])):
+                lines.append(f"{key} {value:g}")
+        return '\n'.join(lines) + '\n'
+
+    def _sort_key(self, key):
+        # Order histogram buckets numerically with +Inf last
+        match = re.search(r'[{,]le="([^"]*)"', key)
+        if match:
+            bound = match.group(1)
+            return (key[:match.start(1)] + key[match.end(1):], float('inf') if bound == '+Inf' else float(bound))
+        return (key, 0)
+
+    def task_started(self, task_id):
+        self._task_starts[task_id] = time.perf_counter()
+
+    def task_finished(self, task_id, task_name, state):
+        start = self._task_starts.pop(task_id, None)
+        if start is not None:
+            self.observe('dailypod_celery_task_duration_seconds', time.perf_counter() - start,
+                         task=task_name, state=state)
+        self.inc('dailypod_celery_tasks_total', task=task_name, state=state)
+        self.flush()
+
+    def task_published(self, task_name, body):
+        # Approximate size of the message on the broker, as JSON before compression
+        self.observe('dailypod_celery_message_bytes', _json_size(body), buckets=BYTE_BUCKETS, task=task_name)
+
+    def task_result(self, task_name, result):
+        self.observe('dailypod_celery_result_bytes', _json_size(result), buckets=BYTE_BUCKETS, task=task_name)
+
+metrics = MetricsRegistry()
+
+def install_celery_hooks():
+    from celery.signals import task_prerun, task_postrun, before_task_publish, worker_process_shutdown
+
+    @task_prerun.connect(weak=False)
+    def on_task_prerun(task_id=None, task=None, **kwargs):
+        metrics.task_started(task_id)
+
+    @task_postrun.connect(weak=False)
+    def on_task_postrun(task_id=None, task=None, state=None, retval=None, **kwargs):
+        if not task.ignore_result:
+            metrics.task_result(task.name, retval)
+        metrics.task_finished(task_id, task.name, state or 'UNKNOWN')
+
+    @before_task_publish.connect(weak=False)
+    def on_before_task_publish(sender=None, body=None, **kwargs):
+        metrics.task_published(sender, body)
+
+    @worker_process_shutdown.connect(weak=False)
+    def on_worker_process_shutdown(**kwargs):
+        metrics.flush()
+
+def install_sqlalchemy_hooks():
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    if not event.contains(Session, 'after_commit', _on_commit):
+        event.listen(Session, 'after_commit', _on_commit)
+
+def _json_size(value):
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+def _on_commit(session):
+    metrics.inc('dailypod_db_commits_total')
@@ -24,23 +24,79 @@ class NewsArticle(db.Model):
     title = db.Column(db.Text, nullable=False)
     content = db.Column(db.Text, nullable=False)
     summary = db.Column(db.Text)
+    summary_prompt_version = db.Column(db.String(50))
     source = db.Column(db.String(100))
     url = db.Column(db.String(500))
     category = db.Column(db.String(50))
     language = db.Column(db.String(5), default='en')
     audio_file = db.Column(db.String(200))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    published_at = db.Column(db.DateTime, index=True)
+    cluster_id = db.Column(db.Integer, db.ForeignKey('story_cluster.id'), index=True)
+    minhash = db.Column(db.Text)
     
     def __repr__(self):
         return f'<NewsArticle {self.title[:50]}...>'
 
+class FeedState(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    feed = db.Column(db.String(200), nullable=False)
+    language = db.Column(db.String(5), nullable=False)
+    category = db.Column(db.String(50), nullable=False)
+    last_published_at = db.Column(db.DateTime)
+    content_digest = db.Column(db.String(40))
+    seen_urls_digest = db.Column(db.String(40))
+    etag = db.Column(db.String(200))
+    last_modified = db.Column(db.String(100))
+    last_fetched_at = db.Column(db.DateTime)
+    last_new_at = db.Column(db.DateTime)
+    items_seen = db.Column(db.Integer, default=0)
+    items_new = db.Column(db.Integer, default=0)
+    
+    __table_args__ = (db.UniqueConstraint('feed', 'language', 'category'),)
+    
+    def __repr__(self):
+        return f'<FeedState {self.feed} {self.language}/{self.category}>'
+
+class StoryCluster(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    language = db.Column(db.String(5), index=True)
+    representative_id = db.Column(db.Integer)
+    size = db.Column(db.Integer, default=1)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<StoryCluster {self.id} ({self.size} articles)>'
+
+class Briefing(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    # input_hash fingerprints the stories a canonical briefing was written from;
+    # translations are keyed by the hash of the canonical text they came from
+    input_hash = db.Column(db.String(64), index=True)
+    canonical_hash = db.Column(db.String(64), nullable=False)
+    language = db.Column(db.String(5), nullable=False)
+    kind = db.Column(db.String(20), default='canonical')
+    text = db.Column(db.Text, nullable=False)
+    prompt_version = db.Column(db.String(50))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('canonical_hash', 'language'),)
+    
+    def __repr__(self):
+        return f'<Briefing {self.kind} {self.language} {self.canonical_hash[:12]}>'
+
 class DeliveryLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    article_id = db.Column(db.Integer, db.ForeignKey('news_article.id'), nullable=False)
+    article_id = db.Column(db.Integer, db.ForeignKey('news_article.id'))
     status = db.Column(db.String(20), default='pending')
     sent_at = db.Column(db.DateTime, default=datetime.utcnow)
     error_message = db.Column(db.Text)
+    idempotency_key = db.Column(db.String(100), index=True)
+    attempt = db.Column(db.Integer, default=1)
+    message_id = db.Column(db.String(100), index=True)
+    status_updated_at = db.Column(db.DateTime)
     
     user = db.relationship('User', backref='deliveries')
     article = db.relationship('NewsArticle', backref='deliveries')
@@ -48,6 +104,111 @@ class DeliveryLog(db.Model):
     def __repr__(self):
         return f'<DeliveryLog {self.user_id} - {self.article_id}>'
 
+class DeadLetterDelivery(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    idempotency_key = db.Column(db.String(100), unique=True, nullable=False)
+    language = db.Column(db.String(5))
+    audio_file = db.Column(db.String(200))
+    attempts = db.Column(db.Integer, default=0)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    user = db.relationship('User', backref='dead_letters')
+    
+    def __repr__(self):
+        return f'<DeadLetterDelivery {self.idempotency_key}>'
+
+class DeliveryRun(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.String(100), unique=True, nullable=False)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    deadline = db.Column(db.DateTime, nullable=False)
+    target = db.Column(db.Integer, default=0)
+    sent = db.Column(db.Integer, default=0)
+    failed = db.Column(db.Integer, default=0)
+    skipped = db.Column(db.Integer, default=0)
+    status = db.Column(db.String(20), default='running', index=True)
+    send_rate = db.Column(db.Float)
+    forecast_completion = db.Column(db.DateTime)
+    alerted = db.Column(db.Boolean, default=False)
+    checked_at = db.Column(db.DateTime)
+    checked_done = db.Column(db.Integer)
+    completed_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<DeliveryRun {self.run_id} {self.status}>'
+
+class TraceSpan(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    trace_id = db.Column(db.String(32), index=True, nullable=False)
+    span_id = db.Column(db.String(16), nullable=False)
+    parent_id = db.Column(db.String(16))
+    name = db.Column(db.String(100), nullable=False)
+    started_at = db.Column(db.DateTime, index=True, default=datetime.utcnow)
+    duration_ms = db.Column(db.Float)
+    status = db.Column(db.String(20), default='ok')
+    attributes = db.Column(db.Text)
+    
+    def __repr__(self):
+        return f'<TraceSpan {self.name} {self.duration_ms}ms>'
+
+class ProfileRecord(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    target = db.Column(db.String(150), index=True, nullable=False)
+    mode = db.Column(db.String(20), nullable=False)
+    run_id = db.Column(db.String(100))
+    trace_id = db.Column(db.String(32))
+    duration_ms = db.Column(db.Float)
+    file_name = db.Column(db.String(250), nullable=False)
+    size_bytes = db.Column(db.Integer)
+    details = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ProfileRecord {self.target} {self.mode}>'
+
+class UsageRecord(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    provider = db.Column(db.String(30), nullable=False)
+    operation = db.Column(db.String(50), nullable=False)
+    model = db.Column(db.String(50))
+    run_id = db.Column(db.String(100), index=True)
+    trace_id = db.Column(db.String(32))
+    language = db.Column(db.String(5))
+    stage = db.Column(db.String(100))
+    prompt_tokens = db.Column(db.Integer, default=0)
+    estimated_prompt_tokens = db.Column(db.Integer)
+    cached_prompt_tokens = db.Column(db.Integer, default=0)
+    prompt_version = db.Column(db.String(50))
+    completion_tokens = db.Column(db.Integer, default=0)
+    characters = db.Column(db.Integer, default=0)
+    audio_bytes = db.Column(db.Integer, default=0)
+    latency_ms = db.Column(db.Float)
+    success = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime, index=True, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<UsageRecord {self.provider}.{self.operation}>'
+
+class UsageDaily(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False, index=True)
+    provider = db.Column(db.String(30), nullable=False)
+    operation = db.Column(db.String(50), nullable=False)
+    language = db.Column(db.String(5))
+    calls = db.Column(db.Integer, default=0)
+    errors = db.Column(db.Integer, default=0)
+    prompt_tokens = db.Column(db.Integer, default=0)
+    completion_tokens = db.Column(db.Integer, default=0)
+    characters = db.Column(db.Integer, default=0)
+    audio_bytes = db.Column(db.Integer, default=0)
+    latency_ms_total = db.Column(db.Float, default=0)
+    estimated_cost = db.Column(db.Float, default=0)
+    
+    def __repr__(self):
+        return f'<UsageDaily {self.day} {self.provider}.{self.operation}>'
+
 class SystemLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     level = db.Column(db.String(20))
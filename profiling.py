@@ -0,0 +1,257 @@
+import os
+import sys
+import json
+import time
+import uuid
+import cProfile
+import threading
+from collections import Counter
+from datetime import datetime
+from config import Config
+from models import db, ProfileRecord
+from services.redis_client import get_redis
+from tracing import tracer
+
+MODES = ('deterministic', 'sampling')
+
+class SamplingProfiler:
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path):
+        # Collapsed-stack format, readable by flamegraph.pl and speedscope
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+class ProfilingSwitch:
+    REMAINING_KEY = 'profiling:remaining'
+    MODE_KEY = 'profiling:mode'
+
+    def __init__(self):
+        self.enabled = Config.PROFILING_ENABLED
+        self.poll_interval = Config.PROFILE_POLL_INTERVAL
+        self.sample_interval = Config.PROFILE_SAMPLE_INTERVAL_MS / 1000.0
+        self.folder = Config.PROFILES_FOLDER
+        self.lock = threading.Lock()
+        self._armed = {}
+        self._local_remaining = {}
+        self._last_poll = 0
+        self._active = {}
+        self._seeds = {}
+
+        # PROFILE_TARGETS seeds targets at startup, e.g. "task:tasks.fetch_news_task=3,route:admin_dashboard=1"
+        for entry in Config.PROFILE_TARGETS.split(','):
+            if '=' in entry:
+                target, count = entry.strip().rsplit('=', 1)
+                self._seeds[target] = int(count)
+                self._local_remaining[target] = int(count)
+                self._armed[target] = 'deterministic'
+
+    def arm(self, target, count=1, mode='deterministic'):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        try:
+            pipe = get_redis().pipeline()
+            pipe.hset(self.REMAINING_KEY, target, int(count))
+            pipe.hset(self.MODE_KEY, target, mode)
+            pipe.execute()
+        except Exception as e:
+            print(f"Redis unavailable, arming {target} in this process only: {e}")
+        with self.lock:
+            self._local_remaining[target] = int(count)
+            self._armed[target] = mode
+
+    def disarm(self, target):
+        try:
+            pipe = get_redis().pipeline()
+            pipe.hdel(self.REMAINING_KEY, target)
+            pipe.hdel(self.MODE_KEY, target)
+            pipe.execute()
+        except Exception as e:
+            print(f"Redis error disarming {target}: {e}")
+        with self.lock:
+            self._local_remaining.pop(target, None)
+            self._armed.pop(target, None)
+
+    def armed_targets(self):
+        self._refresh(force=True)
+        with self.lock:
+            return {target: {'mode': mode, 'remaining': self._local_remaining.get(target)}
+                    for target, mode in self._armed.items()}
+
+    def _refresh(self, force=False):
+        now = time.time()
+        if not force and now - self._last_poll < self.poll_interval:
+            return
+        self._last_poll = now
+        try:
+            pipe = get_redis().pipeline()
+            for target, count in self._seeds.items():
+                pipe.hsetnx(self.REMAINING_KEY, target, count)
+                pipe.hsetnx(self.MODE_KEY, target, 'deterministic')
+            pipe.hgetall(self.REMAINING_KEY)
+            pipe.hgetall(self.MODE_KEY)
+            remaining, modes = pipe.execute()[-2:]
+            self._seeds = {}
+        except Exception:
+            return
+        armed = {}
+        counts = {}
+        for target, count in remaining.items():
+            if int(count) > 0:
+                target = target.decode()
+                armed[target] = modes.get(target.encode(), b'deterministic').decode()
+                counts[target] = int(count)
+        with self.lock:
+            self._armed = armed
+            self._local_remaining = counts
+
+    def _claim(self, target):
+        # Cheap path when nothing is armed: one dict lookup, Redis polled at most every poll_interval
+        self._refresh()
+        mode = self._armed.get(target)
+        if mode is None:
+            return None
+        try:
+            left = get_redis().hincrby(self.REMAINING_KEY, target, -1)
+            if left <= 0:
+                get_redis().hdel(self.REMAINING_KEY, target)
+                with self.lock:
+                    self._armed.pop(target, None)
+            return mode if left >= 0 else None
+        except Exception:
+            with self.lock:
+                left = self._local_remaining.get(target, 0) - 1
+                self._local_remaining[target] = left
+                if left <= 0:
+                    self._armed.pop(target, None)
+            return mode if left >= 0 else None
+
+    def idle(self):
+        # True while nothing can be armed, without touching Redis
+        return not self.enabled or (not self._armed and time.time() - self._last_poll < self.poll_interval)
+
+    def start(self, key, target):
+        # Returns whether a profile was started for key
+        if self.idle():
+            return False
+        mode = self._claim(target)
+        if mode is None:
+            return False
+        if mode == 'sampling':
+            profiler = SamplingProfiler(threading.get_ident(), self.sample_interval)
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another deterministic profile is already running on this thread
+                return False
+        self._active[key] = (target, mode, profiler, time.perf_counter())
+        return True
+
+    def stop(self, key, run_id, metadata=None):
+        entry = self._active.pop(key, None)
+        if entry is None:
+            return None
+        target, mode, profiler, started = entry
+        if mode == 'sampling':
+            profiler.stop()
+        else:
+            profiler.disable()
+        duration_ms = (time.perf_counter() - started) * 1000
+        return self._save(target, mode, profiler, run_id, duration_ms, metadata or {})
+
+    def _save(self, target, mode, profiler, run_id, duration_ms, metadata):
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            safe_target = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in target)
+            extension = 'folded' if mode == 'sampling' else 'prof'
+            file_name = f"{safe_target}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.{extension}"
+            path = os.path.join(self.folder, file_name)
+            if mode == 'sampling':
+                profiler.dump(path)
+            else:
+                profiler.dump_stats(path)
+
+            span = tracer.current_span()
+            row = {
+                'target': target,
+                'mode': mode,
+                'run_id': run_id,
+                'trace_id': span.trace_id if span else None,
+                'duration_ms': duration_ms,
+                'file_name': file_name,
+                'size_bytes': os.path.getsize(path),
+                'details': json.dumps(metadata, default=str),
+                'created_at': datetime.utcnow()
+            }
+            # Own connection so saving never commits the profiled code's session
+            with db.engine.begin() as connection:
+                connection.execute(ProfileRecord.__table__.insert(), [row])
+            return file_name
+        except Exception as e:
+            print(f"Failed to save profile for {target}: {e}")
+            return None
+
+profiling = ProfilingSwitch()
+
+def install_celery_hooks():
+    if not profiling.enabled:
+        return
+    from celery.signals import task_prerun, task_postrun
+
+    @task_prerun.connect(weak=False)
+    def on_task_prerun(task_id=None, task=None, **kwargs):
+        profiling.start(task_id, f"task:{task.name}")
+
+    @task_postrun.connect(weak=False)
+    def on_task_postrun(task_id=None, task=None, state=None, args=None, **kwargs):
+        profiling.stop(task_id, task_id, {'task': task.name, 'state': state, 'args': len(args or ())})
+
+def install_flask_hooks(app):
+    if not profiling.enabled:
+        return
+    from flask import request, g
+
+    @app.before_request
+    def start_request_profile():
+        if profiling.idle():
+            return
+        key = f"request:{uuid.uuid4().hex}"
+        if profiling.start(key, f"route:{request.endpoint}"):
+            g.profile_key = key
+
+    @app.teardown_request
+    def stop_request_profile(exc=None):
+        key = g.pop('profile_key', None)
+        if key:
+            profiling.stop(key, key.split(':', 1)[1], {
+                'method': request.method,
+                'path': request.path,
+                'error': str(exc) if exc else None
+            })
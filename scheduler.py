@@ -143,6 +143,7 @@ class NewsScheduler:
                     )
                     if summary:
                         article.summary = summary
+                        article.summary_prompt_version = self.ai_service.prompt_version('summarize_article')
             
             db.session.commit()
             
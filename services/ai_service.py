@@ -1,43 +1,62 @@
+import time
+import asyncio
+import contextvars
 import openai
 from config import Config
 from models import db, SystemLog
+from usage import usage
+from metrics import metrics
+from tracing import tracer
+from clients import clients
+from services import async_runtime
+from services.token_budget import TokenBudget
+from services.prompt_registry import prompts, language_name
+from services.single_flight import SingleFlight, fingerprint
+from services.circuit_breaker import breaker
+from services.pending_writes import PendingWrites
+
+# A manual delivery overlapping the scheduled run, or two workers on one language,
+# share a single summary call
+summary_flight = SingleFlight('daily_summary')
+
+clients.register('openai',
+                 lambda: openai.OpenAI(api_key=Config.OPENAI_API_KEY, base_url=Config.OPENAI_BASE_URL),
+                 healthy=lambda client: not client.is_closed())
+clients.register('openai_async',
+                 lambda: openai.AsyncOpenAI(api_key=Config.OPENAI_API_KEY, base_url=Config.OPENAI_BASE_URL),
+                 healthy=lambda client: not client.is_closed(),
+                 close=lambda client: async_runtime.run(client.close()))
 
 class AIService:
-    def __init__(self):
-        self.client = openai.OpenAI(api_key=Config.OPENAI_API_KEY)
+    def __init__(self, client=None):
+        self.client = client or clients.get('openai')
+        self.budget = TokenBudget("gpt-3.5-turbo")
+        
+    def prompt_version(self, name):
+        return prompts.get(name).key
+    
+    def _summarize_messages(self, template, title, content, language):
+        values = {'language_name': language_name(language), 'title': title}
         
+        # Whatever the frame leaves of the budget goes to the article body
+        room = Config.PROMPT_BUDGET_SUMMARIZE - self.budget.count_messages(template.render(content='', **values))
+        return template.render(content=self.budget.truncate(content, room), **values)
+    
     def summarize_article(self, title, content, language='en'):
         try:
-            language_prompts = {
-                'en': 'English',
-                'es': 'Spanish',
-                'fr': 'French',
-                'de': 'German',
-                'pt': 'Portuguese'
-            }
-            
-            lang_name = language_prompts.get(language, 'English')
+            template = prompts.get('summarize_article')
+            messages = self._summarize_messages(template, title, content, language)
             
-            prompt = f"""
-            Please summarize the following news article in {lang_name}. 
-            Make it concise and engaging, suitable for a daily news podcast.
-            Keep it under 150 words and focus on the key points.
-            
-            Title: {title}
-            Content: {content}
-            
-            Summary:
-            """
-            
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a professional news summarizer. Create concise, engaging summaries suitable for audio delivery."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=200,
-                temperature=0.7
-            )
+            with breaker('openai').guard(), usage.track('openai', 'summarize_article', language=language, model="gpt-3.5-turbo") as call:
+                call['prompt_version'] = template.key
+                call['estimated_prompt_tokens'] = self.budget.count_messages(messages)
+                response = self.client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=messages,
+                    max_tokens=self.budget.max_tokens_for_audio(Config.ARTICLE_AUDIO_SECONDS, language),
+                    temperature=0.7
+                )
+                self._record_usage(call, response)
             
             summary = response.choices[0].message.content.strip()
             
@@ -49,60 +68,154 @@ class AIService:
             self._log_system('error', f"Error summarizing article: {str(e)}")
             return None
     
+    def _daily_summary_messages(self, template, articles, language):
+        articles = articles[:5]
+        
+        def stories_text(bodies):
+            articles_text = ""
+            for i, (article, body) in enumerate(zip(articles, bodies), 1):
+                articles_text += f"{i}. {article.title}\n"
+                articles_text += f"   {body}\n\n"
+            return articles_text.strip()
+        
+        # Stories share what the frame leaves of the budget; short ones stay whole
+        bodies = [article.summary or article.content or '' for article in articles]
+        frame = template.render(language_name=language_name(language), stories=stories_text([''] * len(articles)))
+        room = Config.PROMPT_BUDGET_DAILY_SUMMARY - self.budget.count_messages(frame)
+        return template.render(language_name=language_name(language), stories=stories_text(self.budget.fit(bodies, room)))
+    
     def create_daily_summary(self, articles, language='en'):
         try:
             if not articles:
                 return None
             
-            language_prompts = {
-                'en': 'English',
-                'es': 'Spanish',
-                'fr': 'French',
-                'de': 'German',
-                'pt': 'Portuguese'
-            }
+            template = prompts.get('daily_summary')
+            messages = self._daily_summary_messages(template, articles, language)
+            max_tokens = self.budget.max_tokens_for_audio(Config.DAILY_AUDIO_SECONDS, language)
             
-            lang_name = language_prompts.get(language, 'English')
+            key = fingerprint("gpt-3.5-turbo", template.key, language, max_tokens, messages)
+            summary = summary_flight.do(key, lambda: self._complete_daily_summary(template, messages, language, max_tokens))
             
-            articles_text = ""
-            for i, article in enumerate(articles[:5], 1):
-                articles_text += f"{i}. {article.title}\n"
-                if article.summary:
-                    articles_text += f"   {article.summary}\n\n"
-                else:
-                    articles_text += f"   {article.content[:200]}...\n\n"
-            
-            prompt = f"""
-            Create a daily news summary in {lang_name} for a podcast format.
-            Combine the following top stories into a cohesive 2-3 minute summary.
-            Make it engaging and conversational, as if you're speaking to listeners.
-            
-            Stories:
-            {articles_text}
+            self._log_system('info', f"Created daily summary for {len(articles)} articles in {language}")
             
-            Daily Summary:
-            """
+            return summary
             
+        except Exception as e:
+            self._log_system('error', f"Error creating daily summary: {str(e)}")
+            return None
+    
+    def _complete_daily_summary(self, template, messages, language, max_tokens):
+        with breaker('openai').guard(), usage.track('openai', 'daily_summary', language=language, model="gpt-3.5-turbo") as call:
+            call['prompt_version'] = template.key
+            call['estimated_prompt_tokens'] = self.budget.count_messages(messages)
             response = self.client.chat.completions.create(
                 model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a professional news anchor creating a daily news podcast. Make the summary engaging and conversational."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=500,
+                messages=messages,
+                max_tokens=max_tokens,
                 temperature=0.7
             )
+            self._record_usage(call, response)
+        
+        return response.choices[0].message.content.strip()
+    
+    def stream_daily_summary(self, articles, language='en'):
+        # Same briefing as create_daily_summary, yielded as text deltas while it is
+        # generated. Errors propagate so the caller can fall back to the blocking call.
+        # Shares summary_flight with create_daily_summary: if the same briefing is
+        # already being written, its finished text arrives as a single delta.
+        template = prompts.get('daily_summary')
+        messages = self._daily_summary_messages(template, articles, language)
+        max_tokens = self.budget.max_tokens_for_audio(Config.DAILY_AUDIO_SECONDS, language)
+        
+        key = fingerprint("gpt-3.5-turbo", template.key, language, max_tokens, messages)
+        yield from summary_flight.stream(key, lambda: self._stream_daily_summary(template, messages, language, max_tokens))
+        
+        self._log_system('info', f"Streamed daily summary for {len(articles)} articles in {language}")
+    
+    def _stream_daily_summary(self, template, messages, language, max_tokens):
+        # No span or usage context stays open across a yield: between deltas the caller
+        # runs its own TTS calls, which must not be attributed to this one. The usage
+        # row is written once the stream ends, from the span current when it started.
+        span = tracer.current_span()
+        start = time.perf_counter()
+        # Streamed responses carry no usage block; count chunks and estimate the prompt
+        call = {
+            'model': "gpt-3.5-turbo",
+            'prompt_version': template.key,
+            'prompt_tokens': self.budget.count_messages(messages),
+            'completion_tokens': 0
+        }
+        success = False
+        try:
+            # Only the wait for the first response counts towards the breaker's latency
+            with breaker('openai').guard(), metrics.track_call('openai', 'daily_summary_stream'):
+                stream = self.client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=0.7,
+                    stream=True
+                )
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    call['completion_tokens'] += 1
+                    yield delta
+            success = True
+        finally:
+            usage.record('openai', 'daily_summary_stream',
+                         latency_ms=(time.perf_counter() - start) * 1000,
+                         success=success,
+                         language=language,
+                         stage=span.name if span else None,
+                         trace_id=span.trace_id if span else None,
+                         **call)
+    
+    def translate_summary(self, summary, language='en'):
+        try:
+            template = prompts.get('translate_summary')
+            messages = self._translate_messages(template, summary, language)
             
-            summary = response.choices[0].message.content.strip()
+            with breaker('openai').guard(), usage.track('openai', 'translate_summary', language=language, model="gpt-3.5-turbo") as call:
+                call['prompt_version'] = template.key
+                call['estimated_prompt_tokens'] = self.budget.count_messages(messages)
+                response = self.client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=messages,
+                    max_tokens=self.budget.max_tokens_for_audio(Config.DAILY_AUDIO_SECONDS, language),
+                    temperature=0.3
+                )
+                self._record_usage(call, response)
             
-            self._log_system('info', f"Created daily summary for {len(articles)} articles in {language}")
+            translation = response.choices[0].message.content.strip()
             
-            return summary
+            self._log_system('info', f"Translated daily summary into {language}")
+            
+            return translation
             
         except Exception as e:
-            self._log_system('error', f"Error creating daily summary: {str(e)}")
+            self._log_system('error', f"Error translating daily summary: {str(e)}")
             return None
     
+    def _translate_messages(self, template, summary, language):
+        return template.render(language_name=language_name(language),
+                               script=self.budget.truncate(summary, Config.PROMPT_BUDGET_TRANSLATE))
+    
+    def _record_usage(self, call, response):
+        if not response.usage:
+            return
+        call['prompt_tokens'] = response.usage.prompt_tokens
+        call['completion_tokens'] = response.usage.completion_tokens
+        # Prompt tokens the provider served from its prefix cache; newer API versions
+        # report them under prompt_tokens_details
+        details = getattr(response.usage, 'prompt_tokens_details', None)
+        if isinstance(details, dict):
+            call['cached_prompt_tokens'] = details.get('cached_tokens') or 0
+        elif details is not None:
+            call['cached_prompt_tokens'] = getattr(details, 'cached_tokens', 0) or 0
+    
     def _log_system(self, level, message):
         try:
             log = SystemLog(level=level, message=message)
@@ -110,4 +223,109 @@ class AIService:
             db.session.commit()
         except Exception as e:
             # If we can't log to database, just print the message
-            print(f"[{level.upper()}] {message}") 
\ No newline at end of file
+            print(f"[{level.upper()}] {message}")
+
+class AsyncAIService(PendingWrites, AIService):
+    # AIService on openai.AsyncOpenAI: same prompts, budgets, breaker and usage
+    # records, but each call only holds the event loop while it is being sent.
+    # System log rows wait in pending for save_pending.
+    def __init__(self, client=None):
+        super().__init__(client or clients.get('openai_async'))
+        self.pending = []
+    
+    def _log_system(self, level, message):
+        self._save(SystemLog(level=level, message=message))
+    
+    async def summarize_article(self, title, content, language='en'):
+        try:
+            template = prompts.get('summarize_article')
+            messages = self._summarize_messages(template, title, content, language)
+            
+            with breaker('openai').guard(), usage.track('openai', 'summarize_article', language=language, model="gpt-3.5-turbo") as call:
+                call['prompt_version'] = template.key
+                call['estimated_prompt_tokens'] = self.budget.count_messages(messages)
+                response = await self.client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=messages,
+                    max_tokens=self.budget.max_tokens_for_audio(Config.ARTICLE_AUDIO_SECONDS, language),
+                    temperature=0.7
+                )
+                self._record_usage(call, response)
+            
+            summary = response.choices[0].message.content.strip()
+            
+            self._log_system('info', f"Successfully summarized article: {title[:50]}...")
+            
+            return summary
+            
+        except Exception as e:
+            self._log_system('error', f"Error summarizing article: {str(e)}")
+            return None
+    
+    async def create_daily_summary(self, articles, language='en'):
+        try:
+            if not articles:
+                return None
+            
+            template = prompts.get('daily_summary')
+            messages = self._daily_summary_messages(template, articles, language)
+            max_tokens = self.budget.max_tokens_for_audio(Config.DAILY_AUDIO_SECONDS, language)
+            key = fingerprint("gpt-3.5-turbo", template.key, language, max_tokens, messages)
+            
+            # The flight blocks while it waits for another caller, so it waits on an
+            # executor thread; if this call leads, the request itself runs on the loop
+            loop = asyncio.get_running_loop()
+            
+            def complete():
+                return asyncio.run_coroutine_threadsafe(
+                    self._complete_daily_summary(template, messages, language, max_tokens), loop).result()
+            
+            summary = await loop.run_in_executor(None, contextvars.copy_context().run, summary_flight.do, key, complete)
+            
+            self._log_system('info', f"Created daily summary for {len(articles)} articles in {language}")
+            
+            return summary
+            
+        except Exception as e:
+            self._log_system('error', f"Error creating daily summary: {str(e)}")
+            return None
+    
+    async def _complete_daily_summary(self, template, messages, language, max_tokens):
+        with breaker('openai').guard(), usage.track('openai', 'daily_summary', language=language, model="gpt-3.5-turbo") as call:
+            call['prompt_version'] = template.key
+            call['estimated_prompt_tokens'] = self.budget.count_messages(messages)
+            response = await self.client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=0.7
+            )
+            self._record_usage(call, response)
+        
+        return response.choices[0].message.content.strip()
+    
+    async def translate_summary(self, summary, language='en'):
+        try:
+            template = prompts.get('translate_summary')
+            messages = self._translate_messages(template, summary, language)
+            
+            with breaker('openai').guard(), usage.track('openai', 'translate_summary', language=language, model="gpt-3.5-turbo") as call:
+                call['prompt_version'] = template.key
+                call['estimated_prompt_tokens'] = self.budget.count_messages(messages)
+                response = await self.client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=messages,
+                    max_tokens=self.budget.max_tokens_for_audio(Config.DAILY_AUDIO_SECONDS, language),
+                    temperature=0.3
+                )
+                self._record_usage(call, response)
+            
+            translation = response.choices[0].message.content.strip()
+            
+            self._log_system('info', f"Translated daily summary into {language}")
+            
+            return translation
+            
+        except Exception as e:
+            self._log_system('error', f"Error translating daily summary: {str(e)}")
+            return None
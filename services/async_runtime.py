@@ -0,0 +1,81 @@
+import os
+import asyncio
+import inspect
+import weakref
+import threading
+import contextvars
+from config import Config
+
+_local = threading.local()
+_bound_loops = weakref.WeakKeyDictionary()
+
+def get_loop():
+    # One event loop per worker process (and thread), kept open between tasks so
+    # async clients and their connection pools survive from one task to the next.
+    # A forked child never reuses its parent's loop.
+    loop = getattr(_local, 'loop', None)
+    if loop is None or loop.is_closed() or getattr(_local, 'pid', None) != os.getpid():
+        loop = asyncio.new_event_loop()
+        _local.loop = loop
+        _local.pid = os.getpid()
+    return loop
+
+def run(coro):
+    # Bridge for Celery tasks and other sync code: runs coro on this worker's loop
+    # and returns its result. The coroutine sees the caller's context variables, so
+    # the Flask app context, usage run and trace span carry over.
+    return get_loop().run_until_complete(coro)
+
+def in_loop():
+    # True inside a coroutine on a running loop; buffered writers (usage, traces,
+    # metrics) leave their periodic flushes to the next call made off the loop
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+def on_loop(factory):
+    # Builds a client on this worker's loop. gRPC aio channels bind to the loop they
+    # are created on, so one built elsewhere fails on first use. Callers already on
+    # a running loop build it there.
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    
+    if loop is not None:
+        client = factory()
+    else:
+        loop = get_loop()
+        
+        async def build():
+            return factory()
+        
+        client = run(build())
+    _bound_loops[client] = loop
+    return client
+
+def bound_here(client):
+    # Whether a client from on_loop belongs to this process's current worker loop
+    loop = _bound_loops.get(client)
+    return loop is not None and not loop.is_closed() and loop is get_loop()
+
+def resolve(value):
+    # For sync code that takes either service variant: awaitables returned by an
+    # async service run on this worker's loop, plain results pass through
+    return run(value) if inspect.isawaitable(value) else value
+
+async def bounded(coros, limit=None):
+    # Like gather(return_exceptions=True), with at most limit coroutines in flight
+    semaphore = asyncio.Semaphore(limit or Config.ASYNC_CONCURRENCY)
+
+    async def guarded(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*[guarded(coro) for coro in coros], return_exceptions=True)
+
+async def run_blocking(fn, *args):
+    # Runs a blocking call on the loop's default executor without losing context
+    return await asyncio.get_running_loop().run_in_executor(None, contextvars.copy_context().run, fn, *args)
@@ -0,0 +1,112 @@
+import re
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from config import Config
+from models import db, SystemLog
+from metrics import metrics
+from tracing import tracer
+
+SENTENCE_END = re.compile(r'[.!?…。]["\'”’)\]]*\s+')
+
+def segments(deltas, min_chars=200, max_chars=1200):
+    # Cuts a stream of text deltas into sentence-complete segments of at least
+    # min_chars, so each TTS request is worth its overhead. A run-on passage is
+    # cut at the last space before max_chars.
+    buffer = ''
+    for delta in deltas:
+        buffer += delta
+        while True:
+            cut = None
+            for match in SENTENCE_END.finditer(buffer):
+                if match.end() > max_chars:
+                    break
+                cut = match.end()
+                if cut >= min_chars:
+                    break
+            if cut is not None and cut >= min_chars:
+                yield buffer[:cut].strip()
+                buffer = buffer[cut:]
+            elif len(buffer) > max_chars:
+                cut = buffer.rfind(' ', 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                yield buffer[:cut].strip()
+                buffer = buffer[cut:]
+            else:
+                break
+    if buffer.strip():
+        yield buffer.strip()
+
+class AudioPipelineService:
+    # Streams the daily summary from the LLM and synthesizes each finished segment
+    # while the rest is still being written; the audio is ready shortly after the
+    # last token instead of after the full LLM time plus the full TTS time
+    def __init__(self, ai_service, tts_service):
+        self.ai_service = ai_service
+        self.tts_service = tts_service
+        self.min_chars = Config.STREAM_SEGMENT_MIN_CHARS
+        self.max_chars = Config.STREAM_SEGMENT_MAX_CHARS
+        self.concurrency = Config.STREAM_TTS_CONCURRENCY
+
+    def create_daily_briefing(self, articles, language='en'):
+        # Returns (summary, audio_filename); (None, None) if the stream failed, so the
+        # caller can fall back, or (summary, None) if only synthesis failed
+        started = time.perf_counter()
+        parts = []
+        futures = []
+        streamed = False
+        app = current_app._get_current_object()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                for segment in segments(self._collect(articles, language, parts), self.min_chars, self.max_chars):
+                    futures.append(executor.submit(contextvars.copy_context().run, self._synthesize,
+                                                   app, segment, language))
+                    if len(futures) == 1:
+                        futures[0].add_done_callback(lambda future: self._first_audio(started, language))
+                streamed = True
+                generated = time.perf_counter() - started
+                audio = [future.result() for future in futures]
+        except Exception as e:
+            self._log_system('error', f"Streaming briefing failed for {language}: {str(e)}")
+            if not streamed:
+                return None, None
+            return ''.join(parts).strip() or None, None
+
+        summary = ''.join(parts).strip()
+        if not summary:
+            return None, None
+        filename = self.tts_service.save_audio(b''.join(audio), self.tts_service.daily_audio_filename(language))
+        total = time.perf_counter() - started
+        metrics.observe('dailypod_streaming_audio_seconds', total, language=language)
+
+        span = tracer.current_span()
+        if span:
+            span.set_attribute('segments', len(futures))
+            span.set_attribute('generation_seconds', round(generated, 3))
+            span.set_attribute('audio_ready_seconds', round(total, 3))
+        self._log_system('info', f"Streamed daily briefing for {language} in {len(futures)} segments: "
+                                 f"text {generated:.2f}s, audio {total:.2f}s")
+        return summary, filename
+
+    def _collect(self, articles, language, parts):
+        for delta in self.ai_service.stream_daily_summary(articles, language):
+            parts.append(delta)
+            yield delta
+
+    def _synthesize(self, app, segment, language):
+        with app.app_context():
+            return self.tts_service.synthesize(segment, language)
+
+    def _first_audio(self, started, language):
+        metrics.observe('dailypod_time_to_first_audio_seconds', time.perf_counter() - started, language=language)
+
+    def _log_system(self, level, message):
+        try:
+            log = SystemLog(level=level, message=message)
+            db.session.add(log)
+            db.session.commit()
+        except Exception as e:
+            # If we can't log to database, just print the message
+            print(f"[{level.upper()}] {message}")
@@ -0,0 +1,119 @@
+import hashlib
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from config import Config
+from models import db, Briefing, SystemLog
+from metrics import metrics
+from services import async_runtime
+from services.ai_service import AIService
+
+def text_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def articles_fingerprint(articles, prompt_version=''):
+    # The canonical briefing only depends on which stories it covers, what they say
+    # and which prompt version wrote it
+    digest = hashlib.sha256(f"{prompt_version}\x1e".encode('utf-8'))
+    for article in articles[:5]:
+        digest.update(f"{article.id}\x1f{article.title}\x1f{article.summary or article.content[:200]}\x1e".encode('utf-8'))
+    return digest.hexdigest()
+
+class BriefingService:
+    def __init__(self, ai_service=None):
+        self.ai_service = ai_service or AIService()
+        self.mode = Config.BRIEFING_MODE
+        self.canonical_language = Config.BRIEFING_CANONICAL_LANGUAGE
+        self.concurrency = Config.TRANSLATION_CONCURRENCY
+
+    def canonical(self, articles):
+        # Returns the canonical briefing's hash, writing it only if these stories
+        # have not been briefed before
+        prompt_version = self.ai_service.prompt_version('daily_summary')
+        input_hash = articles_fingerprint(articles, prompt_version)
+        cached = Briefing.query.filter_by(input_hash=input_hash, language=self.canonical_language,
+                                          kind='canonical').first()
+        if cached:
+            metrics.cache_hit('canonical_briefing')
+            return cached.canonical_hash
+        metrics.cache_miss('canonical_briefing')
+
+        text = self.ai_service.create_daily_summary(articles, self.canonical_language)
+        if not text:
+            return None
+        canonical_hash = text_hash(text)
+        self._store(Briefing(input_hash=input_hash, canonical_hash=canonical_hash,
+                             language=self.canonical_language, kind='canonical', text=text,
+                             prompt_version=prompt_version))
+        return canonical_hash
+
+    def prepare(self, articles, languages):
+        # Canonical briefing first, then every missing translation in parallel.
+        # Provider calls run on threads; cache reads and writes stay on this one.
+        canonical_hash = self.canonical(articles)
+        if not canonical_hash:
+            return None
+        canonical_text = self._lookup(canonical_hash, self.canonical_language)
+
+        missing = [language for language in languages
+                   if language != self.canonical_language and not self._lookup(canonical_hash, language)]
+        if missing:
+            app = current_app._get_current_object()
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(missing))) as executor:
+                futures = {language: executor.submit(contextvars.copy_context().run, self._translate,
+                                                     app, canonical_text, language)
+                           for language in missing}
+                for language, future in futures.items():
+                    translation = future.result()
+                    if translation:
+                        self._store(Briefing(canonical_hash=canonical_hash, language=language,
+                                             kind='translation', text=translation,
+                                             prompt_version=self.ai_service.prompt_version('translate_summary')))
+
+        self._log_system('info', f"Prepared briefing {canonical_hash[:12]} in {self.canonical_language} "
+                                 f"with {len(missing)} new translations")
+        return canonical_hash
+
+    def summary_for(self, canonical_hash, language):
+        # A language's briefing text, translating on demand if prepare missed it
+        text = self._lookup(canonical_hash, language)
+        if text:
+            metrics.cache_hit('briefing_translation')
+            return text
+        metrics.cache_miss('briefing_translation')
+
+        canonical_text = self._lookup(canonical_hash, self.canonical_language)
+        if not canonical_text:
+            return None
+        translation = async_runtime.resolve(self.ai_service.translate_summary(canonical_text, language))
+        if translation:
+            self._store(Briefing(canonical_hash=canonical_hash, language=language,
+                                 kind='translation', text=translation,
+                                 prompt_version=self.ai_service.prompt_version('translate_summary')))
+        return translation
+
+    def _translate(self, app, canonical_text, language):
+        with app.app_context():
+            return self.ai_service.translate_summary(canonical_text, language)
+
+    def _lookup(self, canonical_hash, language):
+        briefing = Briefing.query.filter_by(canonical_hash=canonical_hash, language=language).first()
+        return briefing.text if briefing else None
+
+    def _store(self, briefing):
+        try:
+            db.session.add(briefing)
+            db.session.commit()
+        except Exception as e:
+            # Another worker stored the same briefing first; theirs is as good as ours
+            db.session.rollback()
+            print(f"Briefing cache write skipped: {e}")
+
+    def _log_system(self, level, message):
+        try:
+            log = SystemLog(level=level, message=message)
+            db.session.add(log)
+            db.session.commit()
+        except Exception as e:
+            # If we can't log to database, just print the message
+            print(f"[{level.upper()}] {message}")
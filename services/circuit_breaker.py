@@ -0,0 +1,190 @@
+import math
+import time
+import asyncio
+import threading
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from config import Config
+from metrics import metrics
+from services.redis_client import get_redis
+
+class CircuitOpenError(Exception):
+    def __init__(self, provider):
+        super().__init__(f"Circuit open for {provider}")
+        self.provider = provider
+
+class CircuitBreaker:
+    # Trips when too many recent calls failed or ran slow, rejects calls while open,
+    # then lets a few probes through; a successful probe closes it again. The open
+    # state is shared through Redis so every worker stops calling a provider at once.
+    def __init__(self, provider):
+        self.provider = provider
+        self.window = Config.CIRCUIT_WINDOW_SECONDS
+        self.min_calls = Config.CIRCUIT_MIN_CALLS
+        self.failure_rate = Config.CIRCUIT_FAILURE_RATE
+        self.slow_call = Config.CIRCUIT_SLOW_CALL_SECONDS
+        self.slow_rate = Config.CIRCUIT_SLOW_RATE
+        self.open_seconds = Config.CIRCUIT_OPEN_SECONDS
+        self.half_open_probes = Config.CIRCUIT_HALF_OPEN_PROBES
+        self.lock = threading.Lock()
+        self.calls = deque()
+        self.latencies = deque(maxlen=200)
+        self.state = 'closed'
+        self.opened_until = 0
+        self.probes = 0
+
+    @property
+    def redis_key(self):
+        return f"circuit:open:{self.provider}"
+
+    def allow(self):
+        # Returns whether a call may go ahead; True for a half-open probe as well
+        now = time.time()
+        with self.lock:
+            if self.state == 'open':
+                if now < self.opened_until:
+                    return False
+                self._transition('half_open')
+            if self.state == 'half_open':
+                if self.probes >= self.half_open_probes:
+                    return False
+                self.probes += 1
+                return True
+        try:
+            # Another worker tripped the breaker; follow it until its key expires
+            ttl = get_redis().ttl(self.redis_key)
+        except Exception:
+            return True
+        if ttl and ttl > 0:
+            with self.lock:
+                if self.state == 'closed':
+                    self.opened_until = now + ttl
+                    self._transition('open')
+            return False
+        return True
+
+    def record(self, success, latency):
+        now = time.time()
+        with self.lock:
+            if success:
+                self.latencies.append(latency)
+            if self.state == 'half_open':
+                self.probes = max(self.probes - 1, 0)
+                if success and latency < self.slow_call:
+                    self.calls.clear()
+                    self._transition('closed')
+                else:
+                    self._open(now)
+                return
+
+            self.calls.append((now, success, latency >= self.slow_call))
+            while self.calls and self.calls[0][0] < now - self.window:
+                self.calls.popleft()
+            if self.state != 'closed' or len(self.calls) < self.min_calls:
+                return
+            failures = sum(1 for _, ok, _ in self.calls if not ok)
+            slow = sum(1 for _, _, is_slow in self.calls if is_slow)
+            if failures >= self.failure_rate * len(self.calls) or slow >= self.slow_rate * len(self.calls):
+                self._open(now)
+
+    def _open(self, now):
+        self.opened_until = now + self.open_seconds
+        self.calls.clear()
+        self._transition('open')
+        try:
+            get_redis().set(self.redis_key, 1, ex=max(int(math.ceil(self.open_seconds)), 1))
+        except Exception as e:
+            print(f"Redis error sharing open circuit for {self.provider}: {e}")
+
+    def _transition(self, state):
+        self.state = state
+        self.probes = 0
+        metrics.inc('dailypod_circuit_transitions_total', provider=self.provider, state=state)
+
+    @contextmanager
+    def guard(self, is_failure=None):
+        # is_failure decides which exceptions count against the provider; client
+        # errors such as a bad phone number say nothing about its health
+        if not self.allow():
+            metrics.inc('dailypod_circuit_rejections_total', provider=self.provider)
+            raise CircuitOpenError(self.provider)
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            failed = is_failure(e) if is_failure else True
+            self.record(not failed, time.perf_counter() - start)
+            raise
+        self.record(True, time.perf_counter() - start)
+
+    def percentile(self, fraction):
+        with self.lock:
+            samples = sorted(self.latencies)
+        if len(samples) < Config.HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+    def hedge_delay(self):
+        p95 = self.percentile(0.95)
+        if p95 is None:
+            return Config.HEDGE_DEFAULT_DELAY
+        return max(p95, Config.HEDGE_MIN_DELAY)
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def breaker(provider):
+    with _breakers_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker(provider)
+        return _breakers[provider]
+
+# Hedges run beside the worker's own threads; a losing request is left to finish
+# in the background, bounded by its own timeout
+_hedge_executor = ThreadPoolExecutor(max_workers=Config.HEDGE_MAX_WORKERS, thread_name_prefix='hedge')
+
+def hedged(provider, fn):
+    # For idempotent reads only: if fn has not returned within the provider's p95
+    # latency, a second identical call is started and the first to succeed wins
+    primary = _hedge_executor.submit(fn)
+    done, _ = wait([primary], timeout=breaker(provider).hedge_delay())
+    if done:
+        return primary.result()
+
+    backup = _hedge_executor.submit(fn)
+    pending = {primary: 'primary', backup: 'hedge'}
+    error = None
+    while pending:
+        done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+        for future in done:
+            winner = pending.pop(future)
+            if future.exception() is None:
+                metrics.inc('dailypod_hedged_requests_total', provider=provider, winner=winner)
+                return future.result()
+            error = future.exception()
+    metrics.inc('dailypod_hedged_requests_total', provider=provider, winner='none')
+    raise error
+
+async def hedged_async(provider, fn):
+    # hedged() for coroutines; the losing request is cancelled instead of left running
+    primary = asyncio.ensure_future(fn())
+    done, _ = await asyncio.wait([primary], timeout=breaker(provider).hedge_delay())
+    if done:
+        return primary.result()
+
+    backup = asyncio.ensure_future(fn())
+    pending = {primary: 'primary', backup: 'hedge'}
+    error = None
+    while pending:
+        done, _ = await asyncio.wait(list(pending), return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            winner = pending.pop(task)
+            if task.exception() is None:
+                for other in pending:
+                    other.cancel()
+                metrics.inc('dailypod_hedged_requests_total', provider=provider, winner=winner)
+                return task.result()
+            error = task.exception()
+    metrics.inc('dailypod_hedged_requests_total', provider=provider, winner='none')
+    raise error
@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta
+from config import Config
+from models import db, DeliveryRun, SystemLog
+from services.task_progress_service import TaskProgressService
+from metrics import metrics
+
+class DeliveryProgressService:
+    OUTCOMES = ('sent', 'failed', 'skipped')
+
+    def __init__(self):
+        self.task_progress = TaskProgressService()
+        self.slo_minutes = Config.DELIVERY_SLO_MINUTES
+        self.autoscale = Config.DELIVERY_AUTOSCALE
+        self.autoscale_step = Config.DELIVERY_AUTOSCALE_STEP
+
+    def start_run(self, run_id, target):
+        now = datetime.utcnow()
+        run = DeliveryRun(
+            run_id=run_id,
+            started_at=now,
+            deadline=now + timedelta(minutes=self.slo_minutes),
+            target=target,
+            status='running'
+        )
+        db.session.add(run)
+        db.session.commit()
+
+        # The run's counters live in the task progress hash of the delivery task,
+        # so /api/task/<id>/stream follows the run as it fans out
+        self.task_progress.update(run_id, target=target, sent=0, failed=0, skipped=0, state='running')
+        return run
+
+    def record(self, run_id, outcome, count=1):
+        # Hot path: one pipelined Redis round trip per send; the database row is refreshed by check_runs
+        if not run_id or count <= 0:
+            return
+        state = self.task_progress.increment(run_id, outcome, count)
+        if state is None:
+            try:
+                column = getattr(DeliveryRun, outcome)
+                DeliveryRun.query.filter_by(run_id=run_id).update({column: column + count}, synchronize_session=False)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Failed to record {outcome} for run {run_id}: {e}")
+            state = self.task_progress.snapshot(run_id)
+        if state.get('target') and sum(int(state.get(key, 0)) for key in self.OUTCOMES) >= int(state['target']):
+            self.task_progress.update(run_id, state='completed')
+
+    def snapshot(self, run):
+        state = self.task_progress.snapshot(run.run_id)
+        if 'target' in state:
+            counts = {key: int(state.get(key, 0)) for key in ('target',) + self.OUTCOMES}
+        else:
+            counts = {'target': run.target, 'sent': run.sent or 0, 'failed': run.failed or 0, 'skipped': run.skipped or 0}
+        counts['remaining'] = max(counts['target'] - counts['sent'] - counts['failed'] - counts['skipped'], 0)
+        return counts
+
+    def forecast(self, run, counts, now=None):
+        now = now or datetime.utcnow()
+        done = counts['target'] - counts['remaining']
+        elapsed = (now - run.started_at).total_seconds()
+
+        # Prefer the rate since the last check so a slow start or a mid-run
+        # slowdown shows up quickly; fall back to the whole-run average
+        rate = done / elapsed if elapsed > 0 else 0
+        if run.checked_at and run.checked_done is not None:
+            window = (now - run.checked_at).total_seconds()
+            if window > 0 and done > run.checked_done:
+                rate = (done - run.checked_done) / window
+
+        if counts['remaining'] == 0:
+            return rate, now
+        if rate <= 0:
+            return rate, None
+        return rate, now + timedelta(seconds=counts['remaining'] / rate)
+
+    def check_run(self, run, now=None):
+        now = now or datetime.utcnow()
+        counts = self.snapshot(run)
+        rate, forecast = self.forecast(run, counts, now)
+
+        run.sent = counts['sent']
+        run.failed = counts['failed']
+        run.skipped = counts['skipped']
+        run.send_rate = rate
+        run.forecast_completion = forecast
+        run.checked_at = now
+        run.checked_done = counts['target'] - counts['remaining']
+
+        if counts['remaining'] == 0:
+            run.completed_at = now
+            run.status = 'completed' if now <= run.deadline else 'missed'
+            self.task_progress.update(run.run_id, state=run.status)
+            self._log_system('info' if run.status == 'completed' else 'warning',
+                             f"Delivery run {run.run_id} {run.status}: {run.sent} sent, {run.failed} failed "
+                             f"in {(now - run.started_at).total_seconds():.0f}s")
+        elif forecast is None or forecast > run.deadline:
+            if not run.alerted:
+                run.alerted = True
+                self._alert(run, counts, forecast)
+        db.session.commit()
+        return run
+
+    def check_runs(self):
+        runs = DeliveryRun.query.filter_by(status='running').all()
+        for run in runs:
+            self.check_run(run)
+        return runs
+
+    def _alert(self, run, counts, forecast):
+        projected = forecast.strftime('%H:%M:%S') if forecast else 'never (no progress)'
+        self._log_system('alert', f"Delivery run {run.run_id} forecast {projected} misses deadline "
+                                  f"{run.deadline.strftime('%H:%M:%S')}: {counts['remaining']} remaining "
+                                  f"at {run.send_rate or 0:.1f} msg/s")
+        metrics.inc('dailypod_delivery_slo_alerts_total')
+
+        if self.autoscale:
+            try:
+                from celery_app import celery
+                celery.control.pool_grow(self.autoscale_step)
+                self._log_system('info', f"Grew worker pools by {self.autoscale_step} for run {run.run_id}")
+            except Exception as e:
+                self._log_system('error', f"Failed to scale workers for run {run.run_id}: {str(e)}")
+
+    def _log_system(self, level, message):
+        try:
+            log = SystemLog(level=level, message=message)
+            db.session.add(log)
+            db.session.commit()
+        except Exception as e:
+            # If we can't log to database, just print the message
+            print(f"[{level.upper()}] {message}")
@@ -0,0 +1,171 @@
+import hmac
+import hashlib
+import json
+from datetime import datetime
+from config import Config
+from models import db, DeliveryLog, SystemLog
+from services.redis_client import get_redis
+
+class DeliveryStatusService:
+    QUEUE_KEY = 'whatsapp:status_events'
+    DRAIN_FLAG_KEY = 'whatsapp:status_drain_pending'
+    MAX_REQUEUE = 3
+    
+    # Callbacks can arrive out of order; never move a message backwards
+    STATUS_RANK = {
+        'sent': 1,
+        'failed': 2,
+        'delivered': 3,
+        'read': 4
+    }
+    
+    def __init__(self):
+        self.app_secret = Config.WHATSAPP_APP_SECRET
+        self.allow_unsigned = Config.WHATSAPP_ALLOW_UNSIGNED_CALLBACKS
+        self.verify_token = Config.WHATSAPP_VERIFY_TOKEN
+        self.batch_size = Config.DELIVERY_STATUS_BATCH_SIZE
+    
+    def verify_subscription(self, mode, token):
+        return mode == 'subscribe' and bool(self.verify_token) and hmac.compare_digest(token or '', self.verify_token)
+    
+    def verify_signature(self, raw_body, signature_header):
+        if not self.app_secret:
+            return self.allow_unsigned
+        if not signature_header or not signature_header.startswith('sha256='):
+            return False
+        expected = hmac.new(self.app_secret.encode(), raw_body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(signature_header[len('sha256='):], expected)
+    
+    def extract_events(self, payload):
+        events = []
+        for entry in payload.get('entry', []):
+            for change in entry.get('changes', []):
+                for status in change.get('value', {}).get('statuses', []):
+                    if not status.get('id') or status.get('status') not in self.STATUS_RANK:
+                        continue
+                    timestamp = self._parse_timestamp(status.get('timestamp'))
+                    if timestamp is None:
+                        print(f"Skipping status event {status['id']} with invalid timestamp {status.get('timestamp')!r}")
+                        continue
+                    errors = status.get('errors') or []
+                    events.append({
+                        'id': status['id'],
+                        'status': status['status'],
+                        'timestamp': timestamp,
+                        'error': errors[0].get('title') if errors else None
+                    })
+        return events
+    
+    def _parse_timestamp(self, value):
+        # A missing timestamp falls back to the time the event is applied. One that is
+        # not a usable Unix time drops that event instead of failing the whole callback.
+        if not value:
+            return 0
+        try:
+            timestamp = int(value)
+            datetime.utcfromtimestamp(timestamp)
+            return timestamp
+        except (TypeError, ValueError, OverflowError, OSError):
+            return None
+    
+    def enqueue(self, events):
+        if not events:
+            return
+        try:
+            redis_client = get_redis()
+            queued = redis_client.rpush(self.QUEUE_KEY, *[json.dumps(e) for e in events])
+            if queued >= self.batch_size and redis_client.set(self.DRAIN_FLAG_KEY, 1, nx=True, ex=30):
+                from tasks import apply_delivery_status_task
+                apply_delivery_status_task.delay()
+        except Exception as e:
+            # Without the queue we still must not lose the callback
+            print(f"Redis enqueue failed, applying {len(events)} status events inline: {e}")
+            self.apply_events(events)
+    
+    def drain(self, max_batches=20):
+        redis_client = get_redis()
+        redis_client.delete(self.DRAIN_FLAG_KEY)
+        
+        applied = 0
+        for _ in range(max_batches):
+            pipe = redis_client.pipeline()
+            pipe.lrange(self.QUEUE_KEY, 0, self.batch_size - 1)
+            pipe.ltrim(self.QUEUE_KEY, self.batch_size, -1)
+            raw_events, _ = pipe.execute()
+            if not raw_events:
+                break
+            
+            unmatched = self.apply_events([json.loads(raw) for raw in raw_events])
+            if unmatched is None:
+                # The database write failed; put the batch back at the head of the
+                # queue in its original order and leave it for the next drain
+                redis_client.lpush(self.QUEUE_KEY, *reversed(raw_events))
+                break
+            applied += len(raw_events) - len(unmatched)
+            
+            # The callback can beat the DeliveryLog commit; give it a few more passes
+            requeue = [dict(e, requeued=e.get('requeued', 0) + 1) for e in unmatched
+                       if e.get('requeued', 0) < self.MAX_REQUEUE]
+            if requeue:
+                redis_client.rpush(self.QUEUE_KEY, *[json.dumps(e) for e in requeue])
+            
+            if len(raw_events) < self.batch_size:
+                break
+        
+        return applied
+    
+    def apply_events(self, events):
+        # Returns the events with no DeliveryLog row yet, or None if the write failed
+        latest = {}
+        for event in events:
+            current = latest.get(event['id'])
+            if current is None or self._is_newer(event, current):
+                latest[event['id']] = event
+        
+        if not latest:
+            return []
+        
+        try:
+            rows = db.session.query(DeliveryLog.id, DeliveryLog.message_id, DeliveryLog.status).filter(
+                DeliveryLog.message_id.in_(list(latest.keys()))
+            ).all()
+            
+            updates = []
+            matched = set()
+            for row_id, message_id, status in rows:
+                matched.add(message_id)
+                event = latest[message_id]
+                if self.STATUS_RANK.get(event['status'], 0) <= self.STATUS_RANK.get(status, 0):
+                    continue
+                updates.append({
+                    'id': row_id,
+                    'status': event['status'],
+                    'status_updated_at': datetime.utcfromtimestamp(event['timestamp']) if event['timestamp'] else datetime.utcnow(),
+                    'error_message': event['error']
+                })
+            
+            if updates:
+                db.session.execute(db.update(DeliveryLog), updates)
+            db.session.commit()
+            
+            return [e for message_id, e in latest.items() if message_id not in matched]
+        except Exception as e:
+            db.session.rollback()
+            self._log_system('error', f"Error applying {len(latest)} delivery status events: {str(e)}")
+            return None
+    
+    def _is_newer(self, event, current):
+        rank = self.STATUS_RANK.get(event['status'], 0)
+        current_rank = self.STATUS_RANK.get(current['status'], 0)
+        if rank != current_rank:
+            return rank > current_rank
+        return event['timestamp'] > current['timestamp']
+    
+    def _log_system(self, level, message):
+        try:
+            log = SystemLog(level=level, message=message)
+            db.session.add(log)
+            db.session.commit()
+        except Exception as e:
+            # If we can't log to database, just print the message
+            print(f"[{level.upper()}] {message}")
@@ -1,118 +1,241 @@
-import requests
-import json
-from datetime import datetime, timedelta
+import queue
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from config import Config
-from models import db, NewsArticle, SystemLog
+from models import db, NewsArticle, StoryCluster, FeedState, SystemLog
+from metrics import metrics
+from clients import clients
+from services import async_runtime
+from services.story_cluster_service import StoryClusterService
+from services.source_adapters import NewsAPIAdapter, default_adapters
+from services.seen_filter_service import SeenFilterService, article_key
 
 class NewsService:
-    def __init__(self):
+    def __init__(self, adapters=None):
         self.api_key = Config.NEWS_API_KEY
-        self.base_url = "https://newsapi.org/v2"
+        self.base_url = Config.NEWS_API_BASE_URL
+        self.adapters = adapters if adapters is not None else default_adapters()
+        self.concurrency = Config.INGEST_CONCURRENCY
+        self.batch_size = Config.INGEST_BATCH_SIZE
+        self.queue_size = Config.INGEST_QUEUE_SIZE
+        self.seen_filter = None
         
     def fetch_news(self, category='general', language='en', count=10):
-        try:
-            url = f"{self.base_url}/top-headlines"
-            params = {
-                'country': 'us',
-                'category': category,
-                'language': language,
-                'pageSize': count,
-                'apiKey': self.api_key
-            }
-            
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if data['status'] == 'ok':
-                articles = []
-                for article_data in data['articles']:
-                    try:
-                        existing = NewsArticle.query.filter_by(
-                            title=article_data['title'],
-                            source=article_data['source']['name']
-                        ).first()
-                        
-                        if not existing:
-                            article = NewsArticle(
-                                title=article_data['title'],
-                                content=article_data.get('description', '') or article_data.get('content', ''),
-                                source=article_data['source']['name'],
-                                url=article_data['url'],
-                                category=category,
-                                language=language
-                            )
-                            db.session.add(article)
-                            articles.append(article)
-                    except Exception as e:
-                        # If database operation fails, still return the article data
-                        print(f"Database error for article {article_data['title']}: {e}")
-                        # Create a simple article object without database
-                        class SimpleArticle:
-                            def __init__(self, title, content, source, url, category, language):
-                                self.title = title
-                                self.content = content
-                                self.source = source
-                                self.url = url
-                                self.category = category
-                                self.language = language
-                                self.summary = None
-                        
-                        article = SimpleArticle(
-                            title=article_data['title'],
-                            content=article_data.get('description', '') or article_data.get('content', ''),
-                            source=article_data['source']['name'],
-                            url=article_data['url'],
-                            category=category,
-                            language=language
-                        )
-                        articles.append(article)
-                
-                try:
-                    db.session.commit()
-                except Exception as e:
-                    print(f"Database commit error: {e}")
-                
-                self._log_system('info', f"Fetched {len(articles)} new articles for category: {category}, language: {language}")
-                
-                return articles
-            else:
-                self._log_system('error', f"NewsAPI error: {data.get('message', 'Unknown error')}")
-                return []
-                
-        except requests.exceptions.RequestException as e:
-            self._log_system('error', f"NewsAPI request failed: {str(e)}")
-            return []
-        except Exception as e:
-            self._log_system('error', f"Error fetching news: {str(e)}")
-            return []
+        return self.ingest([NewsAPIAdapter(page_size=count).feed(language, category)])
     
     def fetch_all_categories(self, language='en'):
-        all_articles = []
+        return self.ingest(self.feeds([language]))
+    
+    def fetch_multilingual_news(self):
+        return self.ingest(self.feeds(Config.SUPPORTED_LANGUAGES))
+    
+    def feeds(self, languages, categories=None):
+        feeds = []
+        for adapter in self.adapters:
+            feeds.extend(adapter.feeds(languages, categories or Config.NEWS_CATEGORIES))
+        return feeds
+    
+    def ingest(self, feeds):
+        # Feeds are fetched concurrently; their records stream through a bounded queue
+        # into this thread, which owns the database session and inserts them in batches
+        if not feeds:
+            return []
+        
+        states = self._load_feed_states(feeds)
+        self.seen_filter = SeenFilterService().load()
+        records = queue.Queue(maxsize=self.queue_size)
+        articles = []
+        batch = []
+        finished = 0
+        
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(feeds))) as executor:
+            for feed in feeds:
+                executor.submit(contextvars.copy_context().run, self._run_feed, feed, states[self._feed_key(feed)], records)
+            
+            while finished < len(feeds):
+                kind, feed, payload = records.get()
+                if kind == 'record':
+                    batch.append((feed, payload))
+                    if len(batch) >= self.batch_size:
+                        articles.extend(self._insert_batch(batch, states))
+                        batch = []
+                    continue
+                
+                finished += 1
+                self._feed_finished(feed, states, payload)
         
-        for category in Config.NEWS_CATEGORIES:
-            articles = self.fetch_news(category=category, language=language, count=5)
-            all_articles.extend(articles)
+        if batch:
+            articles.extend(self._insert_batch(batch, states))
         
-        return all_articles
+        return self._finish_ingest(feeds, states, articles)
     
-    def fetch_multilingual_news(self):
-        all_articles = []
+    def _feed_finished(self, feed, states, error):
+        state = states[self._feed_key(feed)]
+        if error:
+            state['ingest_failed'] = True
+            self._log_system('error', f"{feed.adapter.name} fetch failed for {feed.language}/{feed.category}: {error}")
+            metrics.inc('dailypod_feed_fetches_total', feed=feed.adapter.name, result='error')
+        elif state.pop('unchanged', False):
+            metrics.inc('dailypod_feed_fetches_total', feed=feed.adapter.name, result='unchanged')
+        else:
+            metrics.inc('dailypod_feed_fetches_total', feed=feed.adapter.name, result='changed')
+    
+    def _finish_ingest(self, feeds, states, articles):
+        self._save_feed_states(feeds, states)
         
-        for language in Config.SUPPORTED_LANGUAGES:
-            articles = self.fetch_all_categories(language=language)
-            all_articles.extend(articles)
+        try:
+            StoryClusterService().assign([a for a in articles if isinstance(a, NewsArticle)])
+        except Exception as e:
+            print(f"Story clustering error: {e}")
+        
+        languages = sorted({feed.language for feed in feeds})
+        self._log_system('info', f"Fetched {len(articles)} new articles from {len(feeds)} feeds for: {', '.join(languages)}")
+        return articles
+    
+    def _run_feed(self, feed, state, records):
+        error = None
+        try:
+            for record in feed.adapter.fetch(feed, state):
+                records.put(('record', feed, record))
+        except Exception as e:
+            error = str(e)
+        finally:
+            records.put(('done', feed, error))
+    
+    def _insert_batch(self, batch, states):
+        # Titles the seen-article filter has never seen are new without asking the
+        # database; the rest are checked with one existence query per batch
+        articles = []
+        seen_filter = self.seen_filter
+        try:
+            maybe_seen = [(record['title'], record['source']) for _, record in batch
+                          if seen_filter is None or article_key(record['title'], record['source']) in seen_filter]
+            existing = set()
+            if maybe_seen:
+                existing = set(db.session.query(NewsArticle.title, NewsArticle.source).filter(
+                    NewsArticle.title.in_({title for title, _ in maybe_seen})
+                ).all())
+            if seen_filter is not None:
+                SeenFilterService().record_checks(len(batch) - len(maybe_seen), len(maybe_seen),
+                                                  sum(1 for key in maybe_seen if key not in existing))
+            
+            for feed, record in batch:
+                key = (record['title'], record['source'])
+                if key in existing:
+                    continue
+                existing.add(key)
+                state = states[self._feed_key(feed)]
+                state['items_new'] = state.get('items_new', 0) + 1
+                article = NewsArticle(
+                    title=record['title'],
+                    content=record['content'],
+                    source=record['source'],
+                    url=record['url'],
+                    category=record['category'],
+                    language=record['language'],
+                    published_at=record['published_at']
+                )
+                db.session.add(article)
+                articles.append(article)
+            
+            db.session.commit()
+            if seen_filter is not None:
+                for article in articles:
+                    seen_filter.add(article_key(article.title, article.source))
+        except Exception as e:
+            # If database operation fails, still return the article data
+            print(f"Database error inserting {len(batch)} articles: {e}")
+            db.session.rollback()
+            for feed, _ in batch:
+                states[self._feed_key(feed)]['ingest_failed'] = True
+            # Create a simple article object without database
+            class SimpleArticle:
+                def __init__(self, title, content, source, url, category, language):
+                    self.title = title
+                    self.content = content
+                    self.source = source
+                    self.url = url
+                    self.category = category
+                    self.language = language
+                    self.summary = None
+            
+            articles = [SimpleArticle(
+                title=record['title'],
+                content=record['content'],
+                source=record['source'],
+                url=record['url'],
+                category=record['category'],
+                language=record['language']
+            ) for _, record in batch]
         
-        return all_articles
+        metrics.inc('dailypod_feed_items_total', len(batch) - len(articles), result='known')
+        metrics.inc('dailypod_feed_items_total', len(articles), result='new')
+        return articles
     
-    def get_recent_articles(self, language='en', category=None, limit=10):
+    def _feed_key(self, feed):
+        return (feed.key, feed.language, feed.category)
+    
+    def _load_feed_states(self, feeds):
+        # Plain dicts, so fetch threads never touch the database session
+        states = {self._feed_key(feed): {} for feed in feeds}
+        try:
+            rows = FeedState.query.filter(FeedState.feed.in_({feed.key for feed in feeds})).all()
+            for row in rows:
+                key = (row.feed, row.language, row.category)
+                if key in states:
+                    states[key] = {
+                        'last_published_at': row.last_published_at,
+                        'content_digest': row.content_digest,
+                        'seen_urls_digest': row.seen_urls_digest,
+                        'etag': row.etag,
+                        'last_modified': row.last_modified
+                    }
+        except Exception as e:
+            print(f"Database error loading feed states: {e}")
+        return states
+    
+    def _save_feed_states(self, feeds, states):
+        try:
+            rows = {(row.feed, row.language, row.category): row for row in
+                    FeedState.query.filter(FeedState.feed.in_({feed.key for feed in feeds})).all()}
+            for feed in feeds:
+                key = self._feed_key(feed)
+                state = states[key]
+                # A feed whose records did not all reach the database keeps its old
+                # validators and high-water mark, so the next fetch returns them again
+                if 'last_fetched_at' not in state or state.get('ingest_failed'):
+                    continue
+                row = rows.get(key)
+                if row is None:
+                    row = FeedState(feed=feed.key, language=feed.language, category=feed.category)
+                    db.session.add(row)
+                row.last_fetched_at = state['last_fetched_at']
+                for field in ('last_published_at', 'content_digest', 'seen_urls_digest', 'etag', 'last_modified'):
+                    if field in state:
+                        setattr(row, field, state[field])
+                row.items_seen = (row.items_seen or 0) + state.get('items_seen', 0)
+                row.items_new = (row.items_new or 0) + state.get('items_new', 0)
+                if state.get('items_new'):
+                    row.last_new_at = state['last_fetched_at']
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Database error saving feed states: {e}")
+    
+    def get_recent_articles(self, language='en', category=None, limit=10, distinct_stories=False):
         try:
             query = NewsArticle.query.filter_by(language=language)
             
             if category:
                 query = query.filter_by(category=category)
             
+            if distinct_stories:
+                # One article per story cluster: its representative
+                query = query.outerjoin(StoryCluster, NewsArticle.cluster_id == StoryCluster.id).filter(
+                    db.or_(NewsArticle.cluster_id.is_(None), StoryCluster.representative_id == NewsArticle.id)
+                )
+            
             return query.order_by(NewsArticle.created_at.desc()).limit(limit).all()
         except Exception as e:
             print(f"Database error getting recent articles: {e}")
@@ -125,4 +248,47 @@ class NewsService:
             db.session.commit()
         except Exception as e:
             # If we can't log to database, just print the message
-            print(f"[{level.upper()}] {message}") 
\ No newline at end of file
+            print(f"[{level.upper()}] {message}") 
+
+class AsyncNewsService(NewsService):
+    # NewsService with feeds fetched on the worker's event loop instead of a thread
+    # pool. Feed states and the seen filter are loaded before the fetches and the
+    # inserts run after them, all on the calling thread, so only the requests and
+    # parsing run on the loop; parsing, deduplication and inserts are shared with
+    # the sync service. Every feed's records are held until the fetches finish.
+    
+    def ingest(self, feeds):
+        if not feeds:
+            return []
+        
+        states = self._load_feed_states(feeds)
+        self.seen_filter = SeenFilterService().load()
+        results = async_runtime.run(self._fetch_feeds(feeds, states))
+        
+        articles = []
+        batch = []
+        for feed, records, error in results:
+            for record in records:
+                batch.append((feed, record))
+                if len(batch) >= self.batch_size:
+                    articles.extend(self._insert_batch(batch, states))
+                    batch = []
+            self._feed_finished(feed, states, error)
+        
+        if batch:
+            articles.extend(self._insert_batch(batch, states))
+        
+        return self._finish_ingest(feeds, states, articles)
+    
+    async def _fetch_feeds(self, feeds, states):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        client = clients.get('feeds_http_async')
+        
+        async def fetch(feed):
+            async with semaphore:
+                try:
+                    return feed, await feed.adapter.fetch_async(feed, states[self._feed_key(feed)], client), None
+                except Exception as e:
+                    return feed, [], str(e)
+        
+        return await asyncio.gather(*[fetch(feed) for feed in feeds])
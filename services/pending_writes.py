@@ -0,0 +1,25 @@
+from models import db
+
+class PendingWrites:
+    # Mixed into the async services: rows they would commit go to self.pending while
+    # a coroutine runs, and the sync caller writes them with save_pending once it is
+    # back from the event loop, so the loop never waits on the database
+    def _save(self, row):
+        self.pending.append(row)
+
+    @staticmethod
+    def save_pending(services):
+        # One commit for every row the services buffered, plus whatever else the
+        # session holds for them (e.g. user.last_delivery)
+        services = list(services)
+        rows = [row for service in services for row in service.pending]
+        if not rows:
+            return
+        try:
+            db.session.add_all(rows)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Failed to save {len(rows)} buffered rows: {e}")
+        for service in services:
+            service.pending = []
@@ -0,0 +1,146 @@
+import hashlib
+import textwrap
+from config import Config
+
+LANGUAGE_NAMES = {
+    'en': 'English',
+    'es': 'Spanish',
+    'fr': 'French',
+    'de': 'German',
+    'pt': 'Portuguese'
+}
+
+def language_name(language):
+    return LANGUAGE_NAMES.get(language, 'English')
+
+class PromptTemplate:
+    # The system message is the stable prefix and must not vary between calls;
+    # everything call-specific belongs in the user message, after it
+    def __init__(self, name, version, system, user):
+        self.name = name
+        self.version = version
+        self.system = textwrap.dedent(system).strip()
+        self.user = textwrap.dedent(user).strip()
+
+    @property
+    def key(self):
+        return f"{self.name}@{self.version}"
+
+    @property
+    def prefix_hash(self):
+        return hashlib.sha256(self.system.encode('utf-8')).hexdigest()[:12]
+
+    def render(self, **values):
+        return [
+            {"role": "system", "content": self.system.format(**values)},
+            {"role": "user", "content": self.user.format(**values)}
+        ]
+
+class PromptRegistry:
+    def __init__(self, pins=''):
+        self.templates = {}
+        # PROMPT_VERSIONS pins a template to an older version, e.g. "daily_summary=1"
+        self.pins = {}
+        for entry in pins.split(','):
+            if '=' in entry:
+                name, version = entry.split('=', 1)
+                self.pins[name.strip()] = int(version)
+
+    def register(self, template):
+        self.templates.setdefault(template.name, {})[template.version] = template
+        return template
+
+    def get(self, name, version=None):
+        versions = self.templates[name]
+        version = version or self.pins.get(name) or max(versions)
+        return versions[version]
+
+    def versions(self):
+        return {name: sorted(versions) for name, versions in self.templates.items()}
+
+prompts = PromptRegistry(Config.PROMPT_VERSIONS)
+
+# Version 1 of each prompt is the original inline f-string, kept so old summaries
+# can be reproduced; version 2 moves every instruction into the shared prefix.
+# At 60-75 tokens these prefixes are below the 1024-token provider cache threshold.
+
+prompts.register(PromptTemplate('summarize_article', 1,
+    system="You are a professional news summarizer. Create concise, engaging summaries suitable for audio delivery.",
+    user="""
+        Please summarize the following news article in {language_name}.
+        Make it concise and engaging, suitable for a daily news podcast.
+        Keep it under 150 words and focus on the key points.
+
+        Title: {title}
+        Content: {content}
+
+        Summary:
+    """))
+
+prompts.register(PromptTemplate('summarize_article', 2,
+    system="""
+        You are a professional news summarizer for a daily news podcast.
+        Summarize the news article in the user message in the language it names.
+        Make the summary concise and engaging, suitable for audio delivery.
+        Keep it under 150 words and focus on the key points.
+        Reply with the summary only.
+    """,
+    user="""
+        Language: {language_name}
+
+        Title: {title}
+        Content: {content}
+    """))
+
+prompts.register(PromptTemplate('daily_summary', 1,
+    system="You are a professional news anchor creating a daily news podcast. Make the summary engaging and conversational.",
+    user="""
+        Create a daily news summary in {language_name} for a podcast format.
+        Combine the following top stories into a cohesive 2-3 minute summary.
+        Make it engaging and conversational, as if you're speaking to listeners.
+
+        Stories:
+        {stories}
+
+        Daily Summary:
+    """))
+
+prompts.register(PromptTemplate('daily_summary', 2,
+    system="""
+        You are a professional news anchor creating a daily news podcast.
+        Combine the top stories in the user message into one cohesive 2-3 minute summary,
+        written in the language the user message names.
+        Make it engaging and conversational, as if you're speaking to listeners.
+        Reply with the script only.
+    """,
+    user="""
+        Language: {language_name}
+
+        Stories:
+        {stories}
+    """))
+
+prompts.register(PromptTemplate('translate_summary', 1,
+    system="You are a professional translator for a news podcast. Translate faithfully and naturally.",
+    user="""
+        Translate the following daily news podcast script into {language_name}.
+        Keep the conversational tone and the order of the stories.
+        Reply with the translation only.
+
+        Script:
+        {script}
+    """))
+
+prompts.register(PromptTemplate('translate_summary', 2,
+    system="""
+        You are a professional translator for a news podcast.
+        Translate the script in the user message into the language it names, faithfully and naturally.
+        Keep the conversational tone and the order of the stories.
+        Reply with the translation only.
+    """,
+    user="""
+        Language: {language_name}
+
+        Script:
+        {script}
+    """))
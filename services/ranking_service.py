@@ -0,0 +1,102 @@
+import numpy as np
+from datetime import datetime, timedelta
+from config import Config
+from models import db, NewsArticle, StoryCluster
+
+def factorize(values):
+    # Distinct values and an integer code per item; integer groups sort far faster than strings
+    codes = {}
+    indexes = np.fromiter((codes.setdefault(value or '', len(codes)) for value in values), dtype=np.int64, count=len(values))
+    return list(codes), indexes
+
+def rank_within_group(scores, groups):
+    # Position of every item inside its group by descending score (0 = best), from one sort
+    order = np.lexsort((-scores, groups))
+    sorted_groups = groups[order]
+    starts = np.r_[0, np.flatnonzero(sorted_groups[1:] != sorted_groups[:-1]) + 1]
+    counts = np.diff(np.r_[starts, len(order)])
+    ranks = np.empty(len(scores), dtype=np.int64)
+    ranks[order] = np.arange(len(order)) - np.repeat(starts, counts)
+    return ranks
+
+def top_k_by_group(scores, groups, k):
+    ranks = rank_within_group(scores, groups)
+    selected = np.flatnonzero(ranks < k)
+    return selected[np.lexsort((ranks[selected], groups[selected]))]
+
+class RankingService:
+    def __init__(self):
+        self.window_hours = Config.RANKING_WINDOW_HOURS
+        self.half_life_hours = Config.RANKING_HALF_LIFE_HOURS
+        self.source_weights = Config.RANKING_SOURCE_WEIGHTS
+        self.recency_weight = Config.RANKING_RECENCY_WEIGHT
+        self.source_weight = Config.RANKING_SOURCE_WEIGHT
+        self.cluster_weight = Config.RANKING_CLUSTER_WEIGHT
+        self.coverage_decay = Config.RANKING_COVERAGE_DECAY
+        self.preferred_boost = Config.RANKING_PREFERRED_BOOST
+        self.pool_limit = Config.RANKING_POOL_LIMIT
+
+    def score(self, age_hours, source_weight, cluster_size, coverage_groups, boost=None):
+        scores = (self.recency_weight * np.exp(-np.log(2) * age_hours / self.half_life_hours) +
+                  self.source_weight * source_weight +
+                  self.cluster_weight * np.log1p(cluster_size - 1))
+        if boost is not None:
+            scores = scores * boost
+
+        # Category coverage: the second story from a category is worth coverage_decay
+        # of its raw score, the third coverage_decay squared, and so on
+        return scores * self.coverage_decay ** rank_within_group(scores, coverage_groups)
+
+    def load_candidates(self, languages):
+        since = datetime.utcnow() - timedelta(hours=self.window_hours)
+        # Columns only, one representative per story; full rows are loaded for the winners
+        return db.session.query(
+            NewsArticle.id,
+            NewsArticle.language,
+            NewsArticle.category,
+            NewsArticle.source,
+            db.func.coalesce(NewsArticle.published_at, NewsArticle.created_at),
+            StoryCluster.size
+        ).outerjoin(StoryCluster, NewsArticle.cluster_id == StoryCluster.id).filter(
+            NewsArticle.language.in_(languages),
+            NewsArticle.created_at >= since,
+            db.or_(NewsArticle.cluster_id.is_(None), StoryCluster.representative_id == NewsArticle.id)
+        ).order_by(NewsArticle.created_at.desc()).limit(self.pool_limit).all()
+
+    def rank(self, rows, k, now=None, preferred_categories=None):
+        # rows are (id, language, category, source, published_at, cluster_size); returns
+        # {language: [article ids, best first]} with the top k of every language
+        if not rows:
+            return {}
+        now = now or datetime.utcnow()
+        ids, languages, categories, sources, created, sizes = zip(*rows)
+        ids = np.array(ids, dtype=np.int64)
+        language_names, language_codes = factorize(languages)
+        category_names, category_codes = factorize(categories)
+        # Weights are looked up once per distinct source, not once per article
+        source_names, source_codes = factorize(sources)
+        source_weight = np.array([self.source_weights.get(name, 1.0) for name in source_names])[source_codes]
+        age_hours = np.fromiter(((now - value).total_seconds() if value else self.window_hours * 3600.0
+                                 for value in created), dtype=np.float64, count=len(rows)) / 3600.0
+        cluster_size = np.array([size or 1 for size in sizes], dtype=np.float64)
+
+        boost = None
+        if preferred_categories:
+            preferred = np.array([name in preferred_categories for name in category_names])
+            boost = np.where(preferred[category_codes], self.preferred_boost, 1.0)
+
+        # Coverage is judged within each language's own briefing
+        coverage_groups = language_codes * len(category_names) + category_codes
+        scores = self.score(np.maximum(age_hours, 0), source_weight, cluster_size, coverage_groups, boost)
+
+        ranked = {}
+        for index in top_k_by_group(scores, language_codes, k):
+            ranked.setdefault(language_names[language_codes[index]], []).append(int(ids[index]))
+        return ranked
+
+    def select(self, languages, k=5, preferred_categories=None):
+        return self.rank(self.load_candidates(languages), k, preferred_categories=preferred_categories)
+
+    def load_articles(self, article_ids):
+        articles = {article.id: article for article in NewsArticle.query.filter(NewsArticle.id.in_(article_ids)).all()}
+        return [articles[article_id] for article_id in article_ids if article_id in articles]
@@ -0,0 +1,10 @@
+import redis
+from config import Config
+
+_client = None
+
+def get_redis():
+    global _client
+    if _client is None:
+        _client = redis.from_url(Config.REDIS_URL)
+    return _client
@@ -0,0 +1,84 @@
+import random
+from datetime import datetime
+from config import Config
+from models import db, DeliveryLog, DeadLetterDelivery, SystemLog
+from services.redis_client import get_redis
+
+class RetryService:
+    def __init__(self):
+        self.max_attempts = Config.DELIVERY_MAX_ATTEMPTS
+        self.base_delay = Config.DELIVERY_RETRY_BASE_DELAY
+        self.max_delay = Config.DELIVERY_RETRY_MAX_DELAY
+        self.claim_ttl = self.max_delay * (self.max_attempts + 1)
+    
+    def edition_for(self, when=None):
+        when = when or datetime.utcnow()
+        return when.strftime('%Y-%m-%d')
+    
+    def idempotency_key(self, user_id, edition):
+        return f"daily:{edition}:{user_id}"
+    
+    def backoff_delay(self, attempt):
+        # Equal jitter: spread retries over the upper half of the backoff window so
+        # a burst of failures at the peak does not come back as a synchronized burst
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(ceiling / 2, ceiling)
+    
+    def already_delivered(self, key):
+        try:
+            # Status callbacks move a sent row on to delivered/read
+            return DeliveryLog.query.filter(
+                DeliveryLog.idempotency_key == key,
+                DeliveryLog.status.in_(['sent', 'delivered', 'read'])
+            ).first() is not None
+        except Exception as e:
+            print(f"Database error checking delivery {key}: {e}")
+            return False
+    
+    def claim(self, key):
+        try:
+            return bool(get_redis().set(f"delivery:claim:{key}", 1, nx=True, ex=self.claim_ttl))
+        except Exception as e:
+            # Without Redis we fall back to the DeliveryLog check alone
+            print(f"Redis claim failed for {key}: {e}")
+            return True
+    
+    def release(self, key):
+        try:
+            get_redis().delete(f"delivery:claim:{key}")
+        except Exception as e:
+            print(f"Redis release failed for {key}: {e}")
+    
+    def should_retry(self, attempt, status_code=None):
+        if attempt >= self.max_attempts:
+            return False
+        # Network errors carry no status; 4xx other than throttling will not heal
+        if status_code is None:
+            return True
+        return status_code == 429 or status_code >= 500
+    
+    def dead_letter(self, user_id, key, language, audio_filename, attempts, error_message=None):
+        try:
+            entry = DeadLetterDelivery.query.filter_by(idempotency_key=key).first()
+            if not entry:
+                entry = DeadLetterDelivery(user_id=user_id, idempotency_key=key)
+                db.session.add(entry)
+            entry.language = language
+            entry.audio_file = audio_filename
+            entry.attempts = attempts
+            entry.last_error = error_message
+            db.session.commit()
+            
+            self._log_system('warning', f"Delivery {key} moved to dead letter after {attempts} attempts")
+        except Exception as e:
+            db.session.rollback()
+            self._log_system('error', f"Error writing dead letter for {key}: {str(e)}")
+    
+    def _log_system(self, level, message):
+        try:
+            log = SystemLog(level=level, message=message)
+            db.session.add(log)
+            db.session.commit()
+        except Exception as e:
+            # If we can't log to database, just print the message
+            print(f"[{level.upper()}] {message}")
@@ -0,0 +1,170 @@
+import json
+import math
+import time
+import hashlib
+import threading
+from config import Config
+from models import db, NewsArticle, SystemLog
+from metrics import metrics
+from services.redis_client import get_redis
+
+class BloomFilter:
+    def __init__(self, capacity, fp_rate, max_bytes=None):
+        # Optimal size for the target rate, clamped to the memory budget; a clamped
+        # filter simply runs at a higher false-positive rate, which expected_fp_rate shows
+        bits = int(math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        if max_bytes:
+            bits = min(bits, int(max_bytes) * 8)
+        self.bits = max(bits, 64)
+        self.hashes = max(1, int(round(self.bits / float(capacity) * math.log(2))))
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.items = 0
+        self.data = bytearray((self.bits + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'big')
+        second = int.from_bytes(digest[8:], 'big') | 1
+        return [(first + i * second) % self.bits for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.data[position >> 3] |= 1 << (position & 7)
+        self.items += 1
+
+    def __contains__(self, key):
+        return all(self.data[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def expected_fp_rate(self):
+        return (1 - math.exp(-self.hashes * self.items / float(self.bits))) ** self.hashes
+
+    def meta(self):
+        return {'bits': self.bits, 'hashes': self.hashes, 'capacity': self.capacity,
+                'fp_rate': self.fp_rate, 'items': self.items}
+
+    @classmethod
+    def restore(cls, meta, data):
+        bloom = cls.__new__(cls)
+        bloom.bits = meta['bits']
+        bloom.hashes = meta['hashes']
+        bloom.capacity = meta['capacity']
+        bloom.fp_rate = meta['fp_rate']
+        bloom.items = meta['items']
+        bloom.data = bytearray(data)
+        return bloom
+
+def article_key(title, source):
+    return f"{title}\x1f{source or ''}"
+
+class SeenFilterService:
+    # A Bloom filter of every stored (title, source). A miss means the article is
+    # certainly new and needs no database check; a hit still goes to the database.
+    REDIS_KEY = 'seen:articles:filter'
+    META_KEY = 'seen:articles:meta'
+
+    # One filter per process, shared by every ingest that process runs
+    _filter = None
+    _meta = None
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self.enabled = Config.SEEN_FILTER_ENABLED
+        self.capacity = Config.SEEN_FILTER_CAPACITY
+        self.fp_rate = Config.SEEN_FILTER_FP_RATE
+        self.max_bytes = int(Config.SEEN_FILTER_MAX_MB * 1024 * 1024)
+
+    def load(self):
+        # Returns a filter covering every article committed so far, or None when disabled
+        if not self.enabled:
+            return None
+        try:
+            with self._lock:
+                stored = self._stored_meta()
+                cls = type(self)
+                if stored and (cls._meta is None or stored['version'] != cls._meta['version']):
+                    data = get_redis().get(self.REDIS_KEY)
+                    if data is not None:
+                        cls._filter, cls._meta = BloomFilter.restore(stored, data), dict(stored)
+                if cls._filter is None:
+                    self._build()
+                self._catch_up()
+                if cls._filter.items > cls._filter.capacity:
+                    # Past capacity the false-positive rate climbs quickly; resize now
+                    self._build()
+                return cls._filter
+        except Exception as e:
+            print(f"Seen-article filter unavailable: {e}")
+            return None
+
+    def rebuild(self):
+        with self._lock:
+            self._build()
+            return self.report()
+
+    def _build(self):
+        cls = type(self)
+        count = NewsArticle.query.count()
+        # Headroom so the filter is not rebuilt again straight after it fills up
+        bloom = BloomFilter(max(self.capacity, count * 2), self.fp_rate, self.max_bytes)
+        watermark = 0
+        rows = db.session.query(NewsArticle.id, NewsArticle.title, NewsArticle.source).yield_per(5000)
+        for article_id, title, source in rows:
+            bloom.add(article_key(title, source))
+            watermark = max(watermark, article_id)
+        cls._filter = bloom
+        cls._meta = dict(bloom.meta(), watermark=watermark, version=time.time())
+        self._save()
+        report = self.report()
+        self._log_system('info', f"Seen-article filter rebuilt: {report['items']} items, "
+                                 f"{report['bytes'] // 1024} KiB, {report['hashes']} hashes, "
+                                 f"expected false-positive rate {report['expected_fp_rate']:.5f} "
+                                 f"(target {report['fp_rate']})")
+
+    def _catch_up(self):
+        # Articles stored since the filter was built, by this or any other process
+        cls = type(self)
+        rows = db.session.query(NewsArticle.id, NewsArticle.title, NewsArticle.source).filter(
+            NewsArticle.id > cls._meta['watermark']
+        ).order_by(NewsArticle.id).all()
+        for article_id, title, source in rows:
+            cls._filter.add(article_key(title, source))
+            cls._meta['watermark'] = article_id
+
+    def _stored_meta(self):
+        try:
+            value = get_redis().get(self.META_KEY)
+            return json.loads(value) if value else None
+        except Exception:
+            return None
+
+    def _save(self):
+        cls = type(self)
+        try:
+            pipe = get_redis().pipeline()
+            pipe.set(self.REDIS_KEY, bytes(cls._filter.data))
+            pipe.set(self.META_KEY, json.dumps(cls._meta))
+            pipe.execute()
+        except Exception as e:
+            print(f"Could not persist seen-article filter: {e}")
+
+    def report(self):
+        bloom = type(self)._filter
+        if bloom is None:
+            return {}
+        return dict(bloom.meta(), bytes=len(bloom.data), expected_fp_rate=bloom.expected_fp_rate())
+
+    def record_checks(self, new, maybe, false_positives):
+        metrics.inc('dailypod_seen_filter_checks_total', new, result='new')
+        metrics.inc('dailypod_seen_filter_checks_total', maybe, result='maybe')
+        metrics.inc('dailypod_seen_filter_false_positives_total', false_positives)
+
+    def _log_system(self, level, message):
+        try:
+            log = SystemLog(level=level, message=message)
+            db.session.add(log)
+            db.session.commit()
+        except Exception as e:
+            # If we can't log to database, just print the message
+            print(f"[{level.upper()}] {message}")
@@ -0,0 +1,143 @@
+import asyncio
+import bisect
+import hashlib
+import threading
+import time
+from config import Config
+from services import async_runtime
+from services.redis_client import get_redis
+
+class Sender:
+    def __init__(self, phone_id, token):
+        self.phone_id = phone_id
+        self.token = token
+        self.base_url = f"{Config.WHATSAPP_API_BASE_URL}/{phone_id}"
+    
+    def __repr__(self):
+        return f'<Sender {self.phone_id}>'
+
+class SenderPool:
+    VIRTUAL_NODES = 100
+    THROTTLE_WAIT = 0.05
+    MAX_THROTTLE_WAIT = 1.0
+    
+    def __init__(self, senders=None):
+        self.senders = senders or self._senders_from_config()
+        self.rate = Config.WHATSAPP_SENDER_RATE
+        self.cooldown = Config.WHATSAPP_SENDER_COOLDOWN
+        
+        # Local fallbacks when Redis is unavailable; route_async updates them from executor threads
+        self._local_windows = {}
+        self._local_degraded = {}
+        self._local_lock = threading.Lock()
+        
+        self._ring = []
+        for index, sender in enumerate(self.senders):
+            for node in range(self.VIRTUAL_NODES):
+                self._ring.append((self._hash(f"{sender.phone_id}#{node}"), index))
+        self._ring.sort()
+        self._ring_keys = [point for point, _ in self._ring]
+    
+    def _senders_from_config(self):
+        senders = []
+        for pair in Config.WHATSAPP_SENDERS.split(','):
+            if ':' in pair:
+                phone_id, token = pair.strip().split(':', 1)
+                senders.append(Sender(phone_id, token))
+        if not senders:
+            senders.append(Sender(Config.WHATSAPP_PHONE_ID, Config.WHATSAPP_TOKEN))
+        return senders
+    
+    def _hash(self, value):
+        return int(hashlib.md5(value.encode()).hexdigest()[:16], 16)
+    
+    def candidates(self, recipient):
+        # Walk the ring clockwise from the recipient's point; the first sender is
+        # its home number and the rest are failover targets in a stable order
+        start = bisect.bisect(self._ring_keys, self._hash(recipient))
+        seen = []
+        for offset in range(len(self._ring)):
+            index = self._ring[(start + offset) % len(self._ring)][1]
+            if index not in seen:
+                seen.append(index)
+                if len(seen) == len(self.senders):
+                    break
+        return [self.senders[index] for index in seen]
+    
+    def route(self, recipient):
+        candidates = self.candidates(recipient)
+        healthy = [sender for sender in candidates if self.is_healthy(sender)]
+        if not healthy:
+            # Everything is cooling down; trying the home sender beats failing outright
+            yield candidates[0]
+            return
+        
+        waited = 0.0
+        tried = set()
+        while len(tried) < len(healthy):
+            acquired = False
+            for sender in healthy:
+                if sender.phone_id in tried or not self.acquire(sender):
+                    continue
+                acquired = True
+                tried.add(sender.phone_id)
+                yield sender
+            if not acquired:
+                if waited >= self.MAX_THROTTLE_WAIT:
+                    return
+                time.sleep(self.THROTTLE_WAIT)
+                waited += self.THROTTLE_WAIT
+    
+    async def route_async(self, recipient):
+        # route() for the event loop: the Redis checks run on the executor and the
+        # throttle wait is a sleep on the loop, so neither blocks other sends
+        candidates = self.candidates(recipient)
+        healthy = [sender for sender in candidates if await async_runtime.run_blocking(self.is_healthy, sender)]
+        if not healthy:
+            yield candidates[0]
+            return
+        
+        waited = 0.0
+        tried = set()
+        while len(tried) < len(healthy):
+            acquired = False
+            for sender in healthy:
+                if sender.phone_id in tried or not await async_runtime.run_blocking(self.acquire, sender):
+                    continue
+                acquired = True
+                tried.add(sender.phone_id)
+                yield sender
+            if not acquired:
+                if waited >= self.MAX_THROTTLE_WAIT:
+                    return
+                await asyncio.sleep(self.THROTTLE_WAIT)
+                waited += self.THROTTLE_WAIT
+    
+    def acquire(self, sender):
+        window = int(time.time())
+        try:
+            key = f"whatsapp:rate:{sender.phone_id}:{window}"
+            pipe = get_redis().pipeline()
+            pipe.incr(key)
+            pipe.expire(key, 2)
+            count, _ = pipe.execute()
+        except Exception:
+            with self._local_lock:
+                local_window, count = self._local_windows.get(sender.phone_id, (window, 0))
+                count = count + 1 if local_window == window else 1
+                self._local_windows[sender.phone_id] = (window, count)
+        return count <= self.rate
+    
+    def is_healthy(self, sender):
+        try:
+            return not get_redis().exists(f"whatsapp:degraded:{sender.phone_id}")
+        except Exception:
+            return self._local_degraded.get(sender.phone_id, 0) < time.time()
+    
+    def mark_degraded(self, sender, seconds=None):
+        seconds = seconds or self.cooldown
+        self._local_degraded[sender.phone_id] = time.time() + seconds
+        try:
+            get_redis().set(f"whatsapp:degraded:{sender.phone_id}", 1, ex=seconds)
+        except Exception as e:
+            print(f"Redis error marking sender {sender.phone_id} degraded: {e}")
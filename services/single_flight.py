@@ -0,0 +1,173 @@
+import json
+import time
+import hashlib
+import threading
+from config import Config
+from metrics import metrics
+from services.redis_client import get_redis
+
+def fingerprint(*parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    # Concurrent calls with the same key share one execution: threads in this process
+    # wait on the local leader, and processes wait on whichever one holds the Redis
+    # lock, picking its result up from Redis. Results must be JSON-serializable.
+    def __init__(self, namespace):
+        self.namespace = namespace
+        self.lock_ttl = Config.SINGLE_FLIGHT_LOCK_TTL
+        self.wait_timeout = Config.SINGLE_FLIGHT_WAIT_TIMEOUT
+        self.result_ttl = Config.SINGLE_FLIGHT_RESULT_TTL
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+
+        if not leader:
+            metrics.inc('dailypod_single_flight_total', namespace=self.namespace, role='local_follower')
+            if not call.done.wait(self.wait_timeout):
+                return fn()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._shared(key, fn)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                self.calls.pop(key, None)
+            call.done.set()
+
+    def stream(self, key, fn):
+        # do() for a generator of text chunks: the leader passes its chunks through as
+        # they arrive, followers get the leader's whole text as one chunk once it is done
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+
+        if not leader:
+            metrics.inc('dailypod_single_flight_total', namespace=self.namespace, role='local_follower')
+            if call.done.wait(self.wait_timeout) and call.error is not None:
+                raise call.error
+            if call.result is not None:
+                yield call.result
+            else:
+                # Timed out, or the leader's reader stopped before the end
+                yield from fn()
+            return
+
+        try:
+            found, result, redis_client, lock = self._join(key)
+            if found:
+                call.result = result
+                yield result
+                return
+            try:
+                parts = []
+                for chunk in fn():
+                    parts.append(chunk)
+                    yield chunk
+                call.result = ''.join(parts).strip()
+                self._publish(redis_client, key, call.result)
+            finally:
+                self._release(lock)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                self.calls.pop(key, None)
+            call.done.set()
+
+    def _shared(self, key, fn):
+        found, result, redis_client, lock = self._join(key)
+        if found:
+            return result
+        try:
+            result = fn()
+            self._publish(redis_client, key, result)
+            return result
+        finally:
+            self._release(lock)
+
+    def _result_key(self, key):
+        return f"singleflight:{self.namespace}:{key}:result"
+
+    def _join(self, key):
+        # Returns (found, result, redis_client, lock). found means another caller's
+        # result can be used as is; otherwise this caller leads, holding lock if it
+        # could take it. redis_client is None when Redis is unavailable.
+        result_key = self._result_key(key)
+        try:
+            redis_client = get_redis()
+            cached = redis_client.get(result_key)
+            if cached is not None:
+                metrics.inc('dailypod_single_flight_total', namespace=self.namespace, role='cached')
+                return True, json.loads(cached), redis_client, None
+            lock = redis_client.lock(f"singleflight:{self.namespace}:{key}:lock", timeout=self.lock_ttl)
+            acquired = lock.acquire(blocking=False)
+        except Exception:
+            # No Redis: coalescing stays within this process
+            metrics.inc('dailypod_single_flight_total', namespace=self.namespace, role='leader')
+            return False, None, None, None
+
+        if not acquired:
+            found, result = self._wait_for(redis_client, result_key, lock)
+            if found:
+                metrics.inc('dailypod_single_flight_total', namespace=self.namespace, role='remote_follower')
+                return True, result, redis_client, None
+            # The other leader failed or is too slow; do the work here instead
+
+        metrics.inc('dailypod_single_flight_total', namespace=self.namespace, role='leader')
+        return False, None, redis_client, lock if acquired else None
+
+    def _publish(self, redis_client, key, result):
+        if redis_client is None or result is None:
+            return
+        try:
+            redis_client.set(self._result_key(key), json.dumps(result), ex=self.result_ttl)
+        except Exception as e:
+            print(f"Single-flight result not shared: {e}")
+
+    def _release(self, lock):
+        if lock is None:
+            return
+        try:
+            lock.release()
+        except Exception:
+            pass
+
+    def _wait_for(self, redis_client, result_key, lock):
+        deadline = time.time() + self.wait_timeout
+        delay = 0.05
+        while time.time() < deadline:
+            try:
+                cached = redis_client.get(result_key)
+                if cached is not None:
+                    return True, json.loads(cached)
+                if not lock.locked():
+                    # Released without a result: the leader failed
+                    cached = redis_client.get(result_key)
+                    return (True, json.loads(cached)) if cached is not None else (False, None)
+            except Exception:
+                return False, None
+            time.sleep(delay)
+            delay = min(delay * 2, 1.0)
+        return False, None
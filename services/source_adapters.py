@@ -0,0 +1,231 @@
+import re
+import html
+import json
+import hashlib
+import httpx
+import requests
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from config import Config
+from metrics import metrics
+from clients import clients
+from services import async_runtime
+from services.circuit_breaker import breaker, hedged, hedged_async
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+def _feed_session():
+    # Sized for every ingest thread plus a hedge each
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=Config.INGEST_CONCURRENCY * 2)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+clients.register('feeds_http', _feed_session)
+clients.register('feeds_http_async', lambda: httpx.AsyncClient(timeout=30),
+                 healthy=lambda client: not client.is_closed,
+                 close=lambda client: async_runtime.run(client.aclose()))
+
+def parse_timestamp(value):
+    # ISO 8601 (NewsAPI, Atom) or RFC 822 (RSS), normalised to naive UTC
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        published = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            published = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if published.tzinfo:
+        published = published.astimezone(timezone.utc).replace(tzinfo=None)
+    return published
+
+def strip_html(text):
+    return re.sub(r'\s+', ' ', html.unescape(re.sub(r'<[^>]+>', ' ', text or ''))).strip()
+
+class Feed:
+    def __init__(self, adapter, key, language, category, url, params=None):
+        self.adapter = adapter
+        self.key = key
+        self.language = language
+        self.category = category
+        self.url = url
+        self.params = params or {}
+
+    def __repr__(self):
+        return f'<Feed {self.key} {self.language}/{self.category}>'
+
+class SourceAdapter:
+    name = None
+    operation = 'fetch'
+
+    def feeds(self, languages, categories):
+        raise NotImplementedError
+
+    def parse(self, feed, content):
+        raise NotImplementedError
+
+    def request_headers(self, state):
+        headers = {}
+        if state.get('etag'):
+            headers['If-None-Match'] = state['etag']
+        if state.get('last_modified'):
+            headers['If-Modified-Since'] = state['last_modified']
+        return headers
+
+    def fetch(self, feed, state):
+        # Yields normalized article records for items newer than the feed's high-water
+        # mark, updating state (validators, digest, newest item, counters) as it goes
+        headers = self.request_headers(state)
+
+        def request():
+            return clients.get('feeds_http').get(feed.url, params=feed.params, headers=headers, timeout=30)
+
+        # Feed reads are idempotent, so a slow one may be hedged with a second request
+        with breaker(self.name).guard(), metrics.track_call(self.name, self.operation):
+            response = hedged(self.name, request) if Config.HEDGE_FETCHES else request()
+            if response.status_code != 304:
+                response.raise_for_status()
+
+        yield from self.records(feed, state, response.status_code, response.content, response.headers)
+
+    async def fetch_async(self, feed, state, client):
+        # fetch() on an httpx.AsyncClient; returns the records as a list
+        headers = self.request_headers(state)
+
+        async def request():
+            return await client.get(feed.url, params=feed.params, headers=headers, timeout=30)
+
+        with breaker(self.name).guard(), metrics.track_call(self.name, self.operation):
+            response = await (hedged_async(self.name, request) if Config.HEDGE_FETCHES else request())
+            if response.status_code != 304:
+                response.raise_for_status()
+
+        return list(self.records(feed, state, response.status_code, response.content, response.headers))
+
+    def records(self, feed, state, status_code, content, headers):
+        state['last_fetched_at'] = datetime.utcnow()
+        digest = hashlib.sha1(content).hexdigest() if status_code != 304 else None
+        if status_code == 304 or digest == state.get('content_digest'):
+            state['unchanged'] = True
+            return
+
+        state['etag'] = headers.get('ETag')
+        state['last_modified'] = headers.get('Last-Modified')
+        state['content_digest'] = digest
+
+        # A new body can still list the same items (e.g. only lastBuildDate moved);
+        # the digest of the item URLs catches that before any per-item work
+        parsed = list(self.parse(feed, content))
+        state['items_seen'] = state.get('items_seen', 0) + len(parsed)
+        seen_urls_digest = hashlib.sha1('\n'.join(sorted(r.get('url') or '' for r in parsed)).encode()).hexdigest()
+        if seen_urls_digest == state.get('seen_urls_digest'):
+            state['unchanged'] = True
+            return
+        state['seen_urls_digest'] = seen_urls_digest
+
+        high_water = state.get('last_published_at')
+        newest = high_water
+        for record in parsed:
+            if not record.get('title'):
+                continue
+            published_at = record.get('published_at')
+            if published_at and (newest is None or published_at > newest):
+                newest = published_at
+            if high_water and published_at and published_at < high_water:
+                continue
+            yield record
+        state['last_published_at'] = newest
+
+class NewsAPIAdapter(SourceAdapter):
+    name = 'newsapi'
+    operation = 'top_headlines'
+
+    def __init__(self, page_size=5):
+        self.api_key = Config.NEWS_API_KEY
+        self.base_url = Config.NEWS_API_BASE_URL
+        self.page_size = page_size
+
+    def feed(self, language, category):
+        return Feed(self, 'newsapi:top-headlines', language, category, f"{self.base_url}/top-headlines", {
+            'country': 'us',
+            'category': category,
+            'language': language,
+            'pageSize': self.page_size,
+            'apiKey': self.api_key
+        })
+
+    def feeds(self, languages, categories):
+        if not self.api_key:
+            return []
+        return [self.feed(language, category) for language in languages for category in categories]
+
+    def parse(self, feed, content):
+        data = json.loads(content)
+        if data.get('status') != 'ok':
+            raise ValueError(f"NewsAPI error: {data.get('message', 'Unknown error')}")
+        for article_data in data['articles']:
+            yield {
+                'title': article_data.get('title'),
+                'content': article_data.get('description', '') or article_data.get('content', '') or '',
+                'source': (article_data.get('source') or {}).get('name'),
+                'url': article_data.get('url'),
+                'category': feed.category,
+                'language': feed.language,
+                'published_at': parse_timestamp(article_data.get('publishedAt'))
+            }
+
+class RSSAdapter(SourceAdapter):
+    name = 'rss'
+
+    def __init__(self, feeds=None):
+        # RSS_FEEDS entries look like "en|technology|https://example.com/feed.xml", comma separated
+        self.configured = []
+        for entry in (feeds if feeds is not None else Config.RSS_FEEDS.split(',')):
+            parts = entry.strip().split('|', 2)
+            if len(parts) == 3:
+                self.configured.append(tuple(part.strip() for part in parts))
+
+    def feeds(self, languages, categories):
+        return [Feed(self, f"rss:{url}", language, category, url)
+                for language, category, url in self.configured
+                if language in languages and category in categories]
+
+    def parse(self, feed, content):
+        root = ET.fromstring(content)
+        if root.tag == f'{ATOM}feed':
+            source = root.findtext(f'{ATOM}title') or feed.url
+            for entry in root.iter(f'{ATOM}entry'):
+                link = entry.find(f'{ATOM}link')
+                yield self._record(feed, source,
+                                   entry.findtext(f'{ATOM}title'),
+                                   entry.findtext(f'{ATOM}summary') or entry.findtext(f'{ATOM}content'),
+                                   link.get('href') if link is not None else None,
+                                   entry.findtext(f'{ATOM}published') or entry.findtext(f'{ATOM}updated'))
+        else:
+            channel = root.find('channel')
+            source = channel.findtext('title') if channel is not None else feed.url
+            for item in root.iter('item'):
+                yield self._record(feed, source,
+                                   item.findtext('title'),
+                                   item.findtext('description'),
+                                   item.findtext('link'),
+                                   item.findtext('pubDate'))
+
+    def _record(self, feed, source, title, content, url, published):
+        return {
+            'title': strip_html(title),
+            'content': strip_html(content),
+            'source': strip_html(source)[:100],
+            'url': (url or '').strip(),
+            'category': feed.category,
+            'language': feed.language,
+            'published_at': parse_timestamp(published)
+        }
+
+def default_adapters():
+    return [NewsAPIAdapter(), RSSAdapter()]
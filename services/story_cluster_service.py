@@ -0,0 +1,149 @@
+import re
+import random
+import hashlib
+import unicodedata
+from datetime import datetime, timedelta
+from config import Config
+from models import db, NewsArticle, StoryCluster, SystemLog
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+class LSHIndex:
+    # Banded MinHash index: two signatures that agree on every row of any band share
+    # a bucket, so only those pairs are compared
+    def __init__(self, bands, rows):
+        self.bands = bands
+        self.rows = rows
+        self.buckets = [{} for _ in range(bands)]
+        self.signatures = {}
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            yield band, tuple(signature[band * self.rows:(band + 1) * self.rows])
+
+    def add(self, key, signature):
+        self.signatures[key] = signature
+        for band, band_key in self._band_keys(signature):
+            self.buckets[band].setdefault(band_key, []).append(key)
+
+    def candidates(self, signature):
+        found = set()
+        for band, band_key in self._band_keys(signature):
+            found.update(self.buckets[band].get(band_key, ()))
+        return found
+
+class StoryClusterService:
+    def __init__(self):
+        self.num_perm = Config.CLUSTER_NUM_PERM
+        self.bands = Config.CLUSTER_BANDS
+        self.rows = self.num_perm // self.bands
+        self.threshold = Config.CLUSTER_THRESHOLD
+        self.window_hours = Config.CLUSTER_WINDOW_HOURS
+
+        # Fixed seed so signatures stay comparable across processes and restarts
+        generator = random.Random(1337)
+        self.permutations = [(generator.randrange(1, MERSENNE_PRIME), generator.randrange(0, MERSENNE_PRIME))
+                             for _ in range(self.num_perm)]
+
+    def normalize(self, text):
+        text = unicodedata.normalize('NFKD', text or '')
+        text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+        text = re.sub(r'\[\+\d+ chars\]', ' ', text)
+        return re.findall(r'\w+', text)
+
+    def shingles(self, article, size=3):
+        # NewsAPI titles end in " - Outlet Name", which would keep copies of a story apart
+        title = re.sub(r'\s+[-|]\s+[^-|]+$', '', article.title or '')
+        words = self.normalize(f"{title} {article.content or ''}")
+        if len(words) < size:
+            return {' '.join(words)} if words else set()
+        return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+    def signature(self, shingles):
+        hashes = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), 'big') for s in shingles]
+        if not hashes:
+            return [MAX_HASH] * self.num_perm
+        return [min(((a * h + b) % MERSENNE_PRIME) & MAX_HASH for h in hashes) for a, b in self.permutations]
+
+    def similarity(self, left, right):
+        return sum(1 for x, y in zip(left, right) if x == y) / float(len(left))
+
+    def _load_index(self, language):
+        since = datetime.utcnow() - timedelta(hours=self.window_hours)
+        rows = db.session.query(NewsArticle.id, NewsArticle.cluster_id, NewsArticle.minhash).filter(
+            NewsArticle.language == language,
+            NewsArticle.created_at >= since,
+            NewsArticle.minhash.isnot(None)
+        ).all()
+        index = LSHIndex(self.bands, self.rows)
+        clusters = {}
+        for article_id, cluster_id, minhash in rows:
+            index.add(article_id, [int(value) for value in minhash.split(',')])
+            clusters[article_id] = cluster_id
+        return index, clusters
+
+    def assign(self, articles):
+        # Articles must already have ids; each joins the cluster of its most similar
+        # recent neighbour above the threshold, or starts a new one as its representative
+        articles = [article for article in articles if getattr(article, 'id', None)]
+        if not articles:
+            return 0
+
+        try:
+            by_language = {}
+            for article in articles:
+                by_language.setdefault(article.language, []).append(article)
+
+            new_clusters = 0
+            for language, group in by_language.items():
+                index, clusters = self._load_index(language)
+                for article in group:
+                    signature = self.signature(self.shingles(article))
+                    article.minhash = ','.join(str(value) for value in signature)
+
+                    best, best_score = None, self.threshold
+                    for candidate in index.candidates(signature):
+                        score = self.similarity(signature, index.signatures[candidate])
+                        if score >= best_score and clusters.get(candidate):
+                            best, best_score = candidate, score
+
+                    if best is not None:
+                        article.cluster_id = clusters[best]
+                        StoryCluster.query.filter_by(id=article.cluster_id).update(
+                            {StoryCluster.size: StoryCluster.size + 1, StoryCluster.updated_at: datetime.utcnow()},
+                            synchronize_session=False
+                        )
+                    else:
+                        cluster = StoryCluster(language=language, representative_id=article.id, size=1)
+                        db.session.add(cluster)
+                        db.session.flush()
+                        article.cluster_id = cluster.id
+                        new_clusters += 1
+
+                    index.add(article.id, signature)
+                    clusters[article.id] = article.cluster_id
+
+            db.session.commit()
+            self._log_system('info', f"Clustered {len(articles)} articles into {new_clusters} new stories")
+            return new_clusters
+        except Exception as e:
+            db.session.rollback()
+            self._log_system('error', f"Error clustering articles: {str(e)}")
+            return 0
+
+    def is_representative(self, article):
+        cluster_id = getattr(article, 'cluster_id', None)
+        if not cluster_id:
+            return True
+        cluster = StoryCluster.query.get(cluster_id)
+        return cluster is None or cluster.representative_id == article.id
+
+    def _log_system(self, level, message):
+        try:
+            log = SystemLog(level=level, message=message)
+            db.session.add(log)
+            db.session.commit()
+        except Exception as e:
+            # If we can't log to database, just print the message
+            print(f"[{level.upper()}] {message}")
@@ -0,0 +1,90 @@
+import json
+import zlib
+import base64
+from config import Config
+from services.redis_client import get_redis
+
+RESULT_KEY_PATTERN = 'celery-task-meta-*'
+
+def pack_ids(ids):
+    # Compact, JSON-safe form of a set of row ids for task arguments: runs of
+    # consecutive ids become [first, last] ranges; scattered ids become a zlib
+    # compressed array of varint deltas. Whichever is smaller is sent.
+    ids = sorted(set(int(i) for i in ids))
+    ranges = []
+    for i in ids:
+        if ranges and ranges[-1][1] == i - 1:
+            ranges[-1][1] = i
+        else:
+            ranges.append([i, i])
+    if len(ranges) <= 16:
+        return {'ranges': ranges}
+    
+    buffer = bytearray()
+    previous = 0
+    for i in ids:
+        delta = i - previous
+        previous = i
+        while delta >= 0x80:
+            buffer.append((delta & 0x7f) | 0x80)
+            delta >>= 7
+        buffer.append(delta)
+    packed = base64.b64encode(zlib.compress(bytes(buffer), 9)).decode('ascii')
+    if len(packed) < len(json.dumps(ranges)):
+        return {'packed': packed, 'count': len(ids)}
+    return {'ranges': ranges}
+
+def unpack_ids(payload):
+    # Plain lists are still accepted so messages queued before an upgrade go through
+    if payload is None:
+        return []
+    if isinstance(payload, list):
+        return payload
+    if 'ranges' in payload:
+        return [i for first, last in payload['ranges'] for i in range(first, last + 1)]
+    
+    data = zlib.decompress(base64.b64decode(payload['packed']))
+    ids = []
+    value = shift = previous = 0
+    for byte in data:
+        value |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        previous += value
+        ids.append(previous)
+        value = shift = 0
+    return ids
+
+def result_report(limit=None):
+    # How many task results the Redis backend holds, their size and how soon
+    # they expire; scans at most limit keys so it stays cheap on a busy broker
+    limit = limit or Config.TASK_RESULT_REPORT_LIMIT
+    try:
+        redis_client = get_redis()
+        keys = []
+        for key in redis_client.scan_iter(match=RESULT_KEY_PATTERN, count=500):
+            keys.append(key)
+            if len(keys) >= limit:
+                break
+        pipe = redis_client.pipeline()
+        for key in keys:
+            pipe.strlen(key)
+            pipe.ttl(key)
+        replies = pipe.execute()
+    except Exception as e:
+        print(f"Redis error reading task results: {e}")
+        return None
+    
+    sizes = replies[0::2]
+    ttls = [ttl for ttl in replies[1::2] if ttl is not None and ttl >= 0]
+    return {
+        'results': len(keys),
+        'truncated': len(keys) >= limit,
+        'bytes': sum(sizes),
+        'largest_bytes': max(sizes, default=0),
+        'persistent': len(keys) - len(ttls),
+        'min_ttl_seconds': min(ttls, default=None),
+        'max_ttl_seconds': max(ttls, default=None),
+        'result_expires': Config.CELERY_RESULT_EXPIRES,
+    }
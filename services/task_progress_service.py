@@ -0,0 +1,135 @@
+import json
+import time
+import threading
+from config import Config
+from services.redis_client import get_redis
+
+FINISHED_STATES = ('completed', 'missed', 'failed')
+
+class TaskProgressService:
+    KEY_PREFIX = 'task:progress:'
+    KEY_TTL = 2 * 24 * 3600
+
+    # In-process fallback when Redis is down; only useful when the task and the
+    # stream share a process (eager Celery in development)
+    _local = {}
+    _changed = threading.Condition()
+
+    def __init__(self):
+        self.heartbeat = Config.TASK_STREAM_HEARTBEAT
+        self.timeout = Config.TASK_STREAM_TIMEOUT
+
+    def key(self, task_id):
+        return self.KEY_PREFIX + task_id
+
+    def channel(self, task_id):
+        return self.KEY_PREFIX + task_id + ':events'
+
+    def update(self, task_id, **fields):
+        if not task_id:
+            return
+        fields['updated_at'] = time.time()
+        try:
+            pipe = get_redis().pipeline()
+            pipe.hset(self.key(task_id), mapping={k: v for k, v in fields.items() if v is not None})
+            pipe.expire(self.key(task_id), self.KEY_TTL)
+            pipe.publish(self.channel(task_id), json.dumps(fields))
+            pipe.execute()
+        except Exception:
+            with self._changed:
+                self._local.setdefault(task_id, {}).update(fields)
+                self._changed.notify_all()
+
+    def stage(self, task_id, stage, language=None):
+        if language:
+            self.update(task_id, **{'stage': f"{language}: {stage}", f"stage:{language}": stage})
+        else:
+            self.update(task_id, stage=stage)
+
+    def increment(self, task_id, field, count=1):
+        # One round trip: bump the counter, return the new state, wake any streams
+        if not task_id:
+            return {}
+        try:
+            pipe = get_redis().pipeline()
+            pipe.hincrby(self.key(task_id), field, count)
+            pipe.expire(self.key(task_id), self.KEY_TTL)
+            pipe.hgetall(self.key(task_id))
+            pipe.publish(self.channel(task_id), field)
+            values = pipe.execute()[2]
+            return self._decode(values)
+        except Exception:
+            # None tells callers the counter only exists in this process
+            with self._changed:
+                state = self._local.setdefault(task_id, {})
+                state[field] = int(state.get(field, 0)) + count
+                self._changed.notify_all()
+            return None
+
+    def snapshot(self, task_id):
+        try:
+            values = get_redis().hgetall(self.key(task_id))
+            if values:
+                return self._decode(values)
+        except Exception:
+            pass
+        with self._changed:
+            return dict(self._local.get(task_id, {}))
+
+    def _decode(self, values):
+        state = {}
+        for key, value in values.items():
+            key, value = key.decode(), value.decode()
+            try:
+                state[key] = float(value) if '.' in value else int(value)
+            except ValueError:
+                state[key] = value
+        return state
+
+    def stream(self, task_id, celery_state=None):
+        # Server-sent events: the current state first, then a fresh state whenever the
+        # task publishes. Bursts of counter updates are coalesced into one read.
+        last = None
+        started = time.time()
+        pubsub = None
+        try:
+            pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(self.channel(task_id))
+        except Exception:
+            pubsub = None
+
+        last_beat = time.time()
+        while time.time() - started < self.timeout:
+            state = self.snapshot(task_id)
+            if celery_state:
+                state['task_state'] = celery_state(task_id)
+            if state != last:
+                last = state
+                yield f"event: progress\ndata: {json.dumps(state, default=str)}\n\n"
+                last_beat = time.time()
+            if state.get('state') in FINISHED_STATES or state.get('task_state') == 'FAILURE':
+                yield f"event: done\ndata: {json.dumps(state, default=str)}\n\n"
+                break
+
+            if time.time() - last_beat >= self.heartbeat:
+                yield ": keep-alive\n\n"
+                last_beat = time.time()
+
+            if pubsub is not None:
+                try:
+                    message = pubsub.get_message(timeout=self.heartbeat)
+                    if message is not None:
+                        time.sleep(0.25)
+                        while pubsub.get_message(timeout=0):
+                            pass
+                    continue
+                except Exception:
+                    pubsub = None
+            with self._changed:
+                self._changed.wait(timeout=self.heartbeat)
+
+        if pubsub is not None:
+            try:
+                pubsub.close()
+            except Exception:
+                pass
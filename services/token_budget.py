@@ -0,0 +1,85 @@
+import re
+import math
+from config import Config
+
+try:
+    import tiktoken
+except ImportError:
+    # Optional; without it token counts are estimated from UTF-8 length
+    tiktoken = None
+
+# Roughly how many tokens one spoken word costs; accented and compound-heavy
+# languages split into more tokens than English
+TOKENS_PER_WORD = {
+    'en': 1.3,
+    'es': 1.6,
+    'fr': 1.6,
+    'de': 1.8,
+    'pt': 1.6
+}
+
+class TokenBudget:
+    def __init__(self, model='gpt-3.5-turbo'):
+        self.model = model
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                self.encoding = tiktoken.encoding_for_model(model)
+            except Exception:
+                self.encoding = None
+
+    def count(self, text):
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        # About four bytes per token, which also charges accented text more
+        return int(math.ceil(len(text.encode('utf-8')) / 4.0))
+
+    def count_messages(self, messages):
+        # Chat framing adds a few tokens per message
+        return sum(self.count(message['content']) + 4 for message in messages) + 3
+
+    def truncate(self, text, max_tokens):
+        # Longest prefix within max_tokens, cut back to a sentence or word boundary
+        if not text or self.count(text) <= max_tokens:
+            return text or ''
+        if max_tokens <= 0:
+            return ''
+        if self.encoding is not None:
+            prefix = self.encoding.decode(self.encoding.encode(text)[:max_tokens])
+        else:
+            prefix = text.encode('utf-8')[:max_tokens * 4].decode('utf-8', errors='ignore')
+
+        sentence = max(prefix.rfind('. '), prefix.rfind('! '), prefix.rfind('? '))
+        if sentence > len(prefix) // 2:
+            return prefix[:sentence + 1]
+        space = prefix.rfind(' ')
+        if space > 0:
+            prefix = prefix[:space]
+        return re.sub(r'[\s,;:]+$', '', prefix) + '...'
+
+    def fit(self, texts, budget):
+        # Shares budget across texts: short texts are kept whole and what they do not
+        # use is split evenly among the longer ones
+        counts = [self.count(text) for text in texts]
+        allowed = [0] * len(texts)
+        remaining = budget
+        pending = sorted(range(len(texts)), key=lambda i: counts[i])
+        while pending:
+            share = remaining // len(pending)
+            index = pending[0]
+            if counts[index] > share:
+                break
+            allowed[index] = counts[index]
+            remaining -= counts[index]
+            pending.pop(0)
+        for index in pending:
+            allowed[index] = max(remaining // len(pending), 0)
+        return [text if allowed[i] >= counts[i] else self.truncate(text, allowed[i])
+                for i, text in enumerate(texts)]
+
+    def max_tokens_for_audio(self, seconds, language='en'):
+        # Completion limit for a script that reads in about the given number of seconds
+        words = seconds / 60.0 * Config.SPEAKING_WORDS_PER_MINUTE
+        return int(math.ceil(words * TOKENS_PER_WORD.get(language, 1.5) * 1.15))
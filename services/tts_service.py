@@ -1,13 +1,26 @@
 import os
+import asyncio
+import contextvars
+import httpx
 from google.cloud import texttospeech
 from config import Config
 from models import db, SystemLog
+from usage import usage
+from clients import clients
+from services import async_runtime
+from services.single_flight import SingleFlight, fingerprint
+from services.circuit_breaker import breaker
+from services.pending_writes import PendingWrites
 import uuid
 
+# Identical concurrent synthesis requests share one call and one audio file
+audio_flight = SingleFlight('text_to_speech')
+
 class TTSService:
-    def __init__(self):
-        os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = Config.GOOGLE_CLOUD_CREDENTIALS
-        self.client = texttospeech.TextToSpeechClient()
+    client_name = 'google_tts'
+    
+    def __init__(self, client=None):
+        self.client = client or clients.get(self.client_name)
         
         self.language_codes = {
             'en': 'en-US',
@@ -27,41 +40,77 @@ class TTSService:
         
         os.makedirs(Config.AUDIO_FOLDER, exist_ok=True)
     
+    @classmethod
+    def create_client(cls):
+        if Config.GOOGLE_TTS_ENDPOINT:
+            return cls._create_endpoint_client(Config.GOOGLE_TTS_ENDPOINT)
+        os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = Config.GOOGLE_CLOUD_CREDENTIALS
+        return texttospeech.TextToSpeechClient()
+    
+    @classmethod
+    def _create_endpoint_client(cls, endpoint):
+        # Custom endpoints (e.g. the local stub server) speak REST without Google auth
+        from google.auth.credentials import AnonymousCredentials
+        from google.cloud.texttospeech_v1.services.text_to_speech.transports.rest import TextToSpeechRestTransport
+        
+        url_scheme = 'http' if endpoint.startswith('http://') else 'https'
+        transport = TextToSpeechRestTransport(
+            host=endpoint,
+            credentials=AnonymousCredentials(),
+            url_scheme=url_scheme
+        )
+        return texttospeech.TextToSpeechClient(transport=transport)
+    
+    def _synthesis_request(self, text, language):
+        language_code = self.language_codes.get(language, 'en-US')
+        voice_name = self.voice_mapping.get(language, 'en-US-Neural2-F')
+        
+        synthesis_input = texttospeech.SynthesisInput(text=text)
+        
+        voice = texttospeech.VoiceSelectionParams(
+            language_code=language_code,
+            name=voice_name
+        )
+        
+        audio_config = texttospeech.AudioConfig(
+            audio_encoding=texttospeech.AudioEncoding.MP3,
+            speaking_rate=0.9,
+            pitch=0.0,
+            volume_gain_db=0.0
+        )
+        
+        return {'input': synthesis_input, 'voice': voice, 'audio_config': audio_config}
+    
+    def synthesize(self, text, language='en'):
+        # Raw MP3 bytes for text; raises on failure
+        voice_name = self.voice_mapping.get(language, 'en-US-Neural2-F')
+        
+        with breaker('google_tts').guard(), usage.track('google_tts', 'synthesize', language=language, model=voice_name) as call:
+            call['characters'] = len(text)
+            response = self.client.synthesize_speech(**self._synthesis_request(text, language))
+            call['audio_bytes'] = len(response.audio_content)
+        
+        return response.audio_content
+    
+    def save_audio(self, audio_content, filename=None):
+        if not filename:
+            filename = f"{uuid.uuid4().hex}.mp3"
+        
+        file_path = os.path.join(Config.AUDIO_FOLDER, filename)
+        
+        with open(file_path, "wb") as out:
+            out.write(audio_content)
+        
+        return filename
+    
     def text_to_speech(self, text, language='en', filename=None):
         try:
             if not text:
                 return None
             
-            language_code = self.language_codes.get(language, 'en-US')
             voice_name = self.voice_mapping.get(language, 'en-US-Neural2-F')
-            
-            synthesis_input = texttospeech.SynthesisInput(text=text)
-            
-            voice = texttospeech.VoiceSelectionParams(
-                language_code=language_code,
-                name=voice_name
-            )
-            
-            audio_config = texttospeech.AudioConfig(
-                audio_encoding=texttospeech.AudioEncoding.MP3,
-                speaking_rate=0.9,
-                pitch=0.0,
-                volume_gain_db=0.0
-            )
-            
-            response = self.client.synthesize_speech(
-                input=synthesis_input,
-                voice=voice,
-                audio_config=audio_config
-            )
-            
-            if not filename:
-                filename = f"{uuid.uuid4().hex}.mp3"
-            
-            file_path = os.path.join(Config.AUDIO_FOLDER, filename)
-            
-            with open(file_path, "wb") as out:
-                out.write(response.audio_content)
+            filename = audio_flight.do(fingerprint(voice_name, language, text),
+                                       lambda: self.save_audio(self.synthesize(text, language), filename))
             
             self._log_system('info', f"Successfully converted text to speech: {filename}")
             
@@ -71,33 +120,35 @@ class TTSService:
             self._log_system('error', f"TTS conversion failed: {str(e)}")
             return None
     
+    def daily_audio_filename(self, language='en'):
+        from datetime import datetime
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        return f"daily_summary_{language}_{timestamp}.mp3"
+    
     def create_daily_audio(self, summary_text, language='en'):
         try:
             if not summary_text:
                 return None
             
-            from datetime import datetime
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"daily_summary_{language}_{timestamp}.mp3"
-            
-            return self.text_to_speech(summary_text, language, filename)
+            return self.text_to_speech(summary_text, language, self.daily_audio_filename(language))
             
         except Exception as e:
             self._log_system('error', f"Error creating daily audio: {str(e)}")
             return None
     
+    def article_audio_filename(self, article_title, language='en'):
+        from datetime import datetime
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        safe_title = "".join(c for c in article_title if c.isalnum() or c in (' ', '-', '_')).rstrip()
+        safe_title = safe_title[:30]
+        return f"article_{safe_title}_{language}_{timestamp}.mp3"
+    
     def create_article_audio(self, article_title, summary_text, language='en'):
         try:
             if not summary_text:
                 return None
             
-            from datetime import datetime
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            safe_title = "".join(c for c in article_title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-            safe_title = safe_title[:30]
-            filename = f"article_{safe_title}_{language}_{timestamp}.mp3"
-            
-            return self.text_to_speech(summary_text, language, filename)
+            return self.text_to_speech(summary_text, language, self.article_audio_filename(article_title, language))
             
         except Exception as e:
             self._log_system('error', f"Error creating article audio: {str(e)}")
@@ -136,4 +187,100 @@ class TTSService:
             db.session.commit()
         except Exception as e:
             # If we can't log to database, just print the message
-            print(f"[{level.upper()}] {message}") 
\ No newline at end of file
+            print(f"[{level.upper()}] {message}") 
+
+class AsyncRestTTSClient:
+    # synthesize_speech over the REST API on httpx, for custom endpoints such as the
+    # local stub server; the library's own REST transport has no async variant
+    def __init__(self, endpoint):
+        if not endpoint.startswith(('http://', 'https://')):
+            endpoint = f"https://{endpoint}"
+        self.http = httpx.AsyncClient(base_url=endpoint, timeout=30)
+    
+    @property
+    def is_closed(self):
+        return self.http.is_closed
+    
+    async def close(self):
+        await self.http.aclose()
+    
+    async def synthesize_speech(self, input, voice, audio_config):
+        request = texttospeech.SynthesizeSpeechRequest(input=input, voice=voice, audio_config=audio_config)
+        response = await self.http.post('/v1/text:synthesize', content=texttospeech.SynthesizeSpeechRequest.to_json(request),
+                                         headers={'Content-Type': 'application/json'})
+        response.raise_for_status()
+        return texttospeech.SynthesizeSpeechResponse.from_json(response.text, ignore_unknown_fields=True)
+
+class AsyncTTSService(PendingWrites, TTSService):
+    # TTSService on Google's asyncio client; voices, file naming and storage are
+    # shared. System log rows wait in pending for save_pending.
+    client_name = 'google_tts_async'
+    
+    def __init__(self, client=None):
+        # The worker's client is only usable on the loop it was built on
+        if client is None and not async_runtime.bound_here(clients.get(self.client_name)):
+            clients.reset(self.client_name)
+        super().__init__(client)
+        self.pending = []
+    
+    def _log_system(self, level, message):
+        self._save(SystemLog(level=level, message=message))
+    
+    @classmethod
+    def create_client(cls):
+        if Config.GOOGLE_TTS_ENDPOINT:
+            return async_runtime.on_loop(lambda: AsyncRestTTSClient(Config.GOOGLE_TTS_ENDPOINT))
+        os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = Config.GOOGLE_CLOUD_CREDENTIALS
+        return async_runtime.on_loop(texttospeech.TextToSpeechAsyncClient)
+    
+    async def synthesize(self, text, language='en'):
+        voice_name = self.voice_mapping.get(language, 'en-US-Neural2-F')
+        
+        with breaker('google_tts').guard(), usage.track('google_tts', 'synthesize', language=language, model=voice_name) as call:
+            call['characters'] = len(text)
+            response = await self.client.synthesize_speech(**self._synthesis_request(text, language))
+            call['audio_bytes'] = len(response.audio_content)
+        
+        return response.audio_content
+    
+    async def text_to_speech(self, text, language='en', filename=None):
+        try:
+            if not text:
+                return None
+            
+            # As in AsyncAIService: wait for the flight on an executor thread, lead on the loop
+            loop = asyncio.get_running_loop()
+            
+            def synthesize_and_save():
+                audio_content = asyncio.run_coroutine_threadsafe(self.synthesize(text, language), loop).result()
+                return self.save_audio(audio_content, filename)
+            
+            voice_name = self.voice_mapping.get(language, 'en-US-Neural2-F')
+            filename = await loop.run_in_executor(None, contextvars.copy_context().run, audio_flight.do,
+                                                  fingerprint(voice_name, language, text), synthesize_and_save)
+            
+            self._log_system('info', f"Successfully converted text to speech: {filename}")
+            
+            return filename
+            
+        except Exception as e:
+            self._log_system('error', f"TTS conversion failed: {str(e)}")
+            return None
+    
+    async def create_daily_audio(self, summary_text, language='en'):
+        if not summary_text:
+            return None
+        return await self.text_to_speech(summary_text, language, self.daily_audio_filename(language))
+    
+    async def create_article_audio(self, article_title, summary_text, language='en'):
+        if not summary_text:
+            return None
+        return await self.text_to_speech(summary_text, language, self.article_audio_filename(article_title, language))
+
+def _close_async_client(client):
+    async_runtime.run(client.close() if isinstance(client, AsyncRestTTSClient) else client.transport.close())
+
+clients.register('google_tts', TTSService.create_client, close=lambda client: client.transport.close())
+clients.register('google_tts_async', AsyncTTSService.create_client,
+                 healthy=lambda client: not getattr(client, 'is_closed', False) and async_runtime.bound_here(client),
+                 close=_close_async_client)
@@ -1,34 +1,80 @@
+import httpx
 import requests
 import json
 from config import Config
 from models import db, User, DeliveryLog, SystemLog
+from services.sender_pool import SenderPool
+from services.pending_writes import PendingWrites
+from metrics import metrics
+from clients import clients
+from services import async_runtime
+from services.circuit_breaker import breaker
+from urllib3.exceptions import NewConnectionError, ConnectTimeoutError
+
+def _provider_failure(error):
+    # Outages and server errors count against the Graph API; a rejected message or a
+    # throttled sender does not, the sender pool already handles those
+    if isinstance(error, (requests.exceptions.HTTPError, httpx.HTTPStatusError)) and error.response is not None:
+        return error.response.status_code >= 500
+    return isinstance(error, (requests.exceptions.RequestException, httpx.RequestError))
+
+def _request_not_sent(error):
+    # Only a failure to connect proves the Graph API never saw the message. A read
+    # timeout or a dropped connection may follow a send that went through, so those
+    # must not fail over to another sender and risk delivering the briefing twice.
+    if isinstance(error, (requests.exceptions.ConnectTimeout, httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        return isinstance(getattr(error.args[0], 'reason', None), (NewConnectionError, ConnectTimeoutError))
+    return False
+
+# Pooled, kept-alive connections to the Graph API for every task in the process, and
+# one sender pool so its hash ring and local rate windows are built once
+clients.register('whatsapp_http', requests.Session)
+clients.register('whatsapp_sender_pool', SenderPool)
+clients.register('whatsapp_http_async',
+                 lambda: httpx.AsyncClient(timeout=30, limits=httpx.Limits(max_connections=Config.ASYNC_CONCURRENCY)),
+                 healthy=lambda client: not client.is_closed,
+                 close=lambda client: async_runtime.run(client.aclose()))
 
 class WhatsAppService:
-    def __init__(self):
-        self.token = Config.WHATSAPP_TOKEN
-        self.phone_id = Config.WHATSAPP_PHONE_ID
-        self.base_url = f"https://graph.facebook.com/v17.0/{self.phone_id}"
+    CAPTION_SUMMARY_CHARS = 200
+    
+    def __init__(self, sender_pool=None):
+        self.sender_pool = sender_pool or clients.get('whatsapp_sender_pool')
+        self.token = self.sender_pool.senders[0].token
+        self.phone_id = self.sender_pool.senders[0].phone_id
+        self.base_url = self.sender_pool.senders[0].base_url
+        self.last_status_code = None
+        self.last_outcome_unknown = False
+        self.last_sender = None
+        self.http = clients.get('whatsapp_http')
         
+    def _text_payload(self, phone_number, message):
+        return {
+            "messaging_product": "whatsapp",
+            "to": phone_number,
+            "type": "text",
+            "text": {"body": message}
+        }
+    
+    def _audio_payload(self, phone_number, audio_url, caption=None):
+        data = {
+            "messaging_product": "whatsapp",
+            "to": phone_number,
+            "type": "audio",
+            "audio": {
+                "link": audio_url
+            }
+        }
+        
+        if caption:
+            data["audio"]["caption"] = caption
+        return data
+    
     def send_text_message(self, phone_number, message):
         try:
-            url = f"{self.base_url}/messages"
-            
-            headers = {
-                "Authorization": f"Bearer {self.token}",
-                "Content-Type": "application/json"
-            }
-            
-            data = {
-                "messaging_product": "whatsapp",
-                "to": phone_number,
-                "type": "text",
-                "text": {"body": message}
-            }
-            
-            response = requests.post(url, headers=headers, json=data, timeout=30)
-            response.raise_for_status()
-            
-            result = response.json()
+            result = self._post_message(phone_number, self._text_payload(phone_number, message))
             
             self._log_system('info', f"Text message sent to {phone_number}")
             
@@ -43,29 +89,7 @@ class WhatsAppService:
     
     def send_audio_message(self, phone_number, audio_url, caption=None):
         try:
-            url = f"{self.base_url}/messages"
-            
-            headers = {
-                "Authorization": f"Bearer {self.token}",
-                "Content-Type": "application/json"
-            }
-            
-            data = {
-                "messaging_product": "whatsapp",
-                "to": phone_number,
-                "type": "audio",
-                "audio": {
-                    "link": audio_url
-                }
-            }
-            
-            if caption:
-                data["audio"]["caption"] = caption
-            
-            response = requests.post(url, headers=headers, json=data, timeout=30)
-            response.raise_for_status()
-            
-            result = response.json()
+            result = self._post_message(phone_number, self._audio_payload(phone_number, audio_url, caption))
             
             self._log_system('info', f"Audio message sent to {phone_number}")
             
@@ -78,29 +102,78 @@ class WhatsAppService:
             self._log_system('error', f"Error sending audio message: {str(e)}")
             return None
     
-    def send_daily_news(self, user, audio_filename, summary_text):
-        try:
-            audio_url = f"https://your-domain.com/static/audio/{audio_filename}"
+    def _post_message(self, phone_number, data):
+        self.last_status_code = None
+        self.last_outcome_unknown = False
+        self.last_sender = None
+        last_error = None
+        
+        # Home sender first; throttled or failing senders hand over to the next one
+        for sender in self.sender_pool.route(phone_number):
+            self.last_sender = sender
+            headers = {
+                "Authorization": f"Bearer {sender.token}",
+                "Content-Type": "application/json"
+            }
+            try:
+                with breaker('whatsapp').guard(_provider_failure), metrics.track_call('whatsapp', 'send_message'):
+                    response = self.http.post(f"{sender.base_url}/messages", headers=headers, json=data, timeout=30)
+                    self.last_status_code = response.status_code
+                    response.raise_for_status()
+                return response.json()
+            except requests.exceptions.HTTPError as e:
+                last_error = e
+                if response.status_code != 429 and response.status_code < 500:
+                    raise
+                retry_after = response.headers.get('Retry-After', '')
+                self.sender_pool.mark_degraded(sender, int(retry_after) if retry_after.isdigit() else None)
+            except requests.exceptions.RequestException as e:
+                last_error = e
+                self.last_status_code = None
+                self.sender_pool.mark_degraded(sender)
+                if not _request_not_sent(e):
+                    # Outcome unknown; the retry path dead-letters it instead of sending again
+                    self.last_outcome_unknown = True
+                    metrics.inc('dailypod_whatsapp_ambiguous_sends_total')
+                    raise
+        
+        if last_error is None:
+            self.last_status_code = 429
+            last_error = requests.exceptions.RequestException("All WhatsApp senders are rate limited")
+        raise last_error
+    
+    def _daily_news_message(self, audio_filename, summary_text):
+        audio_url = f"https://your-domain.com/static/audio/{audio_filename}"
+        
+        caption = f"Daily News Summary\n\n{summary_text[:self.CAPTION_SUMMARY_CHARS]}..."
+        
+        return audio_url, caption
+    
+    def _record_daily_news(self, user, result, idempotency_key, attempt):
+        if result:
+            from datetime import datetime
+            user.last_delivery = datetime.utcnow()
             
-            caption = f"Daily News Summary\n\n{summary_text[:200]}..."
+            messages = result.get('messages') or [{}]
+            self._log_delivery(user.id, None, 'sent', idempotency_key=idempotency_key, attempt=attempt,
+                               message_id=messages[0].get('id'))
+            
+            return True
+        else:
+            self._log_delivery(user.id, None, 'failed', "WhatsApp API error", idempotency_key, attempt)
+            return False
+    
+    def send_daily_news(self, user, audio_filename, summary_text, idempotency_key=None, attempt=1):
+        try:
+            audio_url, caption = self._daily_news_message(audio_filename, summary_text)
             
             result = self.send_audio_message(user.phone_number, audio_url, caption)
             
-            if result:
-                from datetime import datetime
-                user.last_delivery = datetime.utcnow()
-                db.session.commit()
-                
-                self._log_delivery(user.id, None, 'sent')
-                
-                return True
-            else:
-                self._log_delivery(user.id, None, 'failed', "WhatsApp API error")
-                return False
+            return self._record_daily_news(user, result, idempotency_key, attempt)
                 
         except Exception as e:
             self._log_system('error', f"Error sending daily news to {user.phone_number}: {str(e)}")
-            self._log_delivery(user.id, None, 'failed', str(e))
+            self._log_delivery(user.id, None, 'failed', str(e), idempotency_key, attempt)
             return False
     
     def send_welcome_message(self, phone_number, language='en'):
@@ -139,17 +212,120 @@ class WhatsAppService:
         message = error_messages.get(language, error_messages['en'])
         return self.send_text_message(phone_number, message)
     
-    def _log_delivery(self, user_id, article_id, status, error_message=None):
+    def _log_delivery(self, user_id, article_id, status, error_message=None, idempotency_key=None, attempt=1,
+                      message_id=None):
         delivery = DeliveryLog(
             user_id=user_id,
             article_id=article_id,
             status=status,
-            error_message=error_message
+            error_message=error_message,
+            idempotency_key=idempotency_key,
+            attempt=attempt,
+            message_id=message_id
         )
-        db.session.add(delivery)
-        db.session.commit()
+        self._save(delivery)
     
     def _log_system(self, level, message):
         log = SystemLog(level=level, message=message)
-        db.session.add(log)
-        db.session.commit() 
\ No newline at end of file
+        self._save(log)
+    
+    def _save(self, row):
+        db.session.add(row)
+        db.session.commit()
+
+class AsyncWhatsAppService(PendingWrites, WhatsAppService):
+    # WhatsAppService on httpx. last_status_code, last_outcome_unknown and last_sender
+    # describe the last message, so use one instance per in-flight message and pass
+    # every instance the same sender_pool and client to share rate limits and
+    # connections. The welcome, unsubscribe and error helpers return awaitables here.
+    def __init__(self, sender_pool=None, client=None):
+        super().__init__(sender_pool)
+        self.client = client or clients.get('whatsapp_http_async')
+        self.pending = []
+    
+    async def send_text_message(self, phone_number, message):
+        try:
+            result = await self._post_message(phone_number, self._text_payload(phone_number, message))
+            
+            self._log_system('info', f"Text message sent to {phone_number}")
+            
+            return result
+            
+        except (httpx.HTTPError, requests.exceptions.RequestException) as e:
+            self._log_system('error', f"WhatsApp API request failed: {str(e)}")
+            return None
+        except Exception as e:
+            self._log_system('error', f"Error sending text message: {str(e)}")
+            return None
+    
+    async def send_audio_message(self, phone_number, audio_url, caption=None):
+        try:
+            result = await self._post_message(phone_number, self._audio_payload(phone_number, audio_url, caption))
+            
+            self._log_system('info', f"Audio message sent to {phone_number}")
+            
+            return result
+            
+        except (httpx.HTTPError, requests.exceptions.RequestException) as e:
+            self._log_system('error', f"WhatsApp API request failed: {str(e)}")
+            return None
+        except Exception as e:
+            self._log_system('error', f"Error sending audio message: {str(e)}")
+            return None
+    
+    async def _post_message(self, phone_number, data):
+        self.last_status_code = None
+        self.last_outcome_unknown = False
+        self.last_sender = None
+        last_error = None
+        
+        # Close the route when a sender answers instead of leaving it to the loop's finalizer
+        senders = self.sender_pool.route_async(phone_number)
+        try:
+            async for sender in senders:
+                self.last_sender = sender
+                headers = {
+                    "Authorization": f"Bearer {sender.token}",
+                    "Content-Type": "application/json"
+                }
+                try:
+                    with breaker('whatsapp').guard(_provider_failure), metrics.track_call('whatsapp', 'send_message'):
+                        response = await self.client.post(f"{sender.base_url}/messages", headers=headers, json=data)
+                        self.last_status_code = response.status_code
+                        response.raise_for_status()
+                    return response.json()
+                except httpx.HTTPStatusError as e:
+                    last_error = e
+                    if response.status_code != 429 and response.status_code < 500:
+                        raise
+                    retry_after = response.headers.get('Retry-After', '')
+                    await async_runtime.run_blocking(self.sender_pool.mark_degraded, sender,
+                                                     int(retry_after) if retry_after.isdigit() else None)
+                except httpx.RequestError as e:
+                    last_error = e
+                    self.last_status_code = None
+                    await async_runtime.run_blocking(self.sender_pool.mark_degraded, sender)
+                    if not _request_not_sent(e):
+                        self.last_outcome_unknown = True
+                        metrics.inc('dailypod_whatsapp_ambiguous_sends_total')
+                        raise
+        finally:
+            await senders.aclose()
+        
+        if last_error is None:
+            self.last_status_code = 429
+            last_error = requests.exceptions.RequestException("All WhatsApp senders are rate limited")
+        raise last_error
+    
+    async def send_daily_news(self, user, audio_filename, summary_text, idempotency_key=None, attempt=1):
+        try:
+            audio_url, caption = self._daily_news_message(audio_filename, summary_text)
+            
+            result = await self.send_audio_message(user.phone_number, audio_url, caption)
+            
+            return self._record_daily_news(user, result, idempotency_key, attempt)
+                
+        except Exception as e:
+            self._log_system('error', f"Error sending daily news to {user.phone_number}: {str(e)}")
+            self._log_delivery(user.id, None, 'failed', str(e), idempotency_key, attempt)
+            return False
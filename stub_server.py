@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import time
+import base64
+import hashlib
+import random
+import logging
+import threading
+from datetime import datetime, timedelta
+from flask import Flask, request, jsonify, Response
+from werkzeug.serving import make_server
+
+# Local stand-ins for NewsAPI, OpenAI, Google TTS and the WhatsApp Graph API.
+# Point the app at them with:
+#   NEWS_API_BASE_URL=http://127.0.0.1:8090/newsapi/v2
+#   OPENAI_BASE_URL=http://127.0.0.1:8090/openai/v1
+#   GOOGLE_TTS_ENDPOINT=http://127.0.0.1:8090
+#   WHATSAPP_API_BASE_URL=http://127.0.0.1:8090/graph/v17.0
+
+DEFAULT_PROFILE = {
+    'seed': None,
+    'newsapi': {
+        'latency': {'dist': 'lognormal', 'median_ms': 180, 'sigma': 0.4},
+        'error_rate': 0.0,
+        'throttle_rate': 0.0,
+        'content_chars': 600,
+        'duplicate_rate': 0.2
+    },
+    'openai': {
+        'latency': {'dist': 'lognormal', 'median_ms': 1500, 'sigma': 0.5},
+        'error_rate': 0.0,
+        'throttle_rate': 0.0,
+        'completion_words': 220,
+        'stream_chunk_ms': 15
+    },
+    'tts': {
+        'latency': {'dist': 'lognormal', 'median_ms': 600, 'sigma': 0.3},
+        'error_rate': 0.0,
+        'throttle_rate': 0.0,
+        'audio_bytes_per_char': 120
+    },
+    'whatsapp': {
+        'latency': {'dist': 'lognormal', 'median_ms': 250, 'sigma': 0.3},
+        'error_rate': 0.0,
+        'throttle_rate': 0.0
+    }
+}
+
+WORDS = (
+    'market council storm election league film startup court vaccine budget '
+    'senate launch merger drought festival striker tariff satellite verdict '
+    'rally outage treaty record strike index forecast summit recall'
+).split()
+
+SOURCES = ['Reuters', 'Associated Press', 'BBC News', 'CNN', 'Bloomberg', 'The Verge', 'ESPN', 'Variety']
+
+def _url_id(*parts):
+    # Stable across processes, unlike hash(), so seeded runs produce the same URLs
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()[:12]
+
+def load_profile():
+    profile = json.loads(json.dumps(DEFAULT_PROFILE))
+    path = os.getenv('STUB_PROFILE')
+    if path:
+        with open(path) as f:
+            overrides = json.load(f)
+        for key, value in overrides.items():
+            if isinstance(value, dict):
+                profile.setdefault(key, {}).update(value)
+            else:
+                profile[key] = value
+    return profile
+
+class StubBehaviour:
+    def __init__(self, profile):
+        self.profile = profile
+        self.random = random.Random(profile.get('seed'))
+        self.lock = threading.Lock()
+        self.counters = {name: 0 for name in ('newsapi', 'openai', 'tts', 'whatsapp')}
+        self.prefixes = set()
+
+    def sample_latency(self, provider):
+        latency = self.profile[provider]['latency']
+        dist = latency.get('dist', 'fixed')
+        with self.lock:
+            if dist == 'lognormal':
+                ms = self.random.lognormvariate(0, latency.get('sigma', 0.5)) * latency['median_ms']
+            elif dist == 'normal':
+                ms = self.random.gauss(latency['mean_ms'], latency.get('stddev_ms', 0))
+            elif dist == 'uniform':
+                ms = self.random.uniform(latency['min_ms'], latency['max_ms'])
+            elif dist == 'exponential':
+                ms = self.random.expovariate(1.0 / latency['mean_ms'])
+            else:
+                ms = latency.get('ms', 0)
+        return max(ms, 0) / 1000.0
+
+    def outcome(self, provider):
+        settings = self.profile[provider]
+        with self.lock:
+            self.counters[provider] += 1
+            roll = self.random.random()
+        if roll < settings.get('throttle_rate', 0):
+            return 429
+        if roll < settings.get('throttle_rate', 0) + settings.get('error_rate', 0):
+            return 500
+        return 200
+
+    def words(self, count):
+        with self.lock:
+            return ' '.join(self.random.choice(WORDS) for _ in range(count))
+
+    def cached_prefix_tokens(self, messages):
+        # Mimics provider prompt caching: a leading system message seen before is served
+        # from cache, in blocks of 128 tokens once it reaches 1024
+        if not messages or messages[0].get('role') != 'system':
+            return 0
+        prefix = messages[0].get('content') or ''
+        with self.lock:
+            seen = prefix in self.prefixes
+            self.prefixes.add(prefix)
+        tokens = len(prefix) // 4
+        return tokens // 128 * 128 if seen and tokens >= 1024 else 0
+
+    def sentences(self, count, per_sentence=14):
+        # Prose-shaped text, so streaming consumers have sentence boundaries to cut at
+        sentences = []
+        while count > 0:
+            size = min(per_sentence, count)
+            sentences.append(self.words(size).capitalize() + '.')
+            count -= size
+        return ' '.join(sentences)
+
+def create_stub_app(profile=None):
+    behaviour = StubBehaviour(profile or load_profile())
+    app = Flask(__name__)
+    app.config['STUB_BEHAVIOUR'] = behaviour
+
+    def simulate(provider):
+        time.sleep(behaviour.sample_latency(provider))
+        status = behaviour.outcome(provider)
+        if status == 429:
+            return jsonify({'error': {'message': 'Rate limited by stub', 'code': 429}}), 429, {'Retry-After': '1'}
+        if status == 500:
+            return jsonify({'error': {'message': 'Stub server error', 'code': 500}}), 500
+        return None
+
+    @app.route('/newsapi/v2/top-headlines')
+    @app.route('/newsapi/v2/everything')
+    def newsapi_headlines():
+        failure = simulate('newsapi')
+        if failure:
+            return failure
+
+        settings = behaviour.profile['newsapi']
+        page_size = request.args.get('pageSize', 20, type=int)
+        category = request.args.get('category', 'general')
+        now = datetime.utcnow()
+
+        articles = []
+        for i in range(page_size):
+            with behaviour.lock:
+                duplicate = articles and behaviour.random.random() < settings.get('duplicate_rate', 0)
+                source = behaviour.random.choice(SOURCES)
+                age = behaviour.random.randint(0, 360)
+            if duplicate:
+                title = articles[-1]['title']
+            else:
+                title = f"{category.title()}: {behaviour.words(8)}"
+            articles.append({
+                'source': {'id': None, 'name': source},
+                'author': None,
+                'title': title,
+                'description': behaviour.words(max(settings.get('content_chars', 600) // 7, 1)),
+                'url': f"https://stub.local/{category}/{_url_id(title, source, i)}",
+                'publishedAt': (now - timedelta(minutes=age)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'content': None
+            })
+
+        return jsonify({'status': 'ok', 'totalResults': len(articles), 'articles': articles})
+
+    @app.route('/rss/<category>.xml')
+    def rss_feed(category):
+        # RSS 2.0 stand-in for RSS_FEEDS, e.g. "en|technology|http://127.0.0.1:8090/rss/technology.xml"
+        failure = simulate('newsapi')
+        if failure:
+            return failure
+
+        settings = behaviour.profile['newsapi']
+        now = datetime.utcnow()
+        items = []
+        for i in range(request.args.get('items', 10, type=int)):
+            with behaviour.lock:
+                age = behaviour.random.randint(0, 360)
+            title = f"{category.title()}: {behaviour.words(8)}"
+            items.append(
+                f"<item><title>{title}</title>"
+                f"<link>https://stub.local/rss/{category}/{_url_id(title, i)}</link>"
+                f"<description>{behaviour.words(max(settings.get('content_chars', 600) // 7, 1))}</description>"
+                f"<pubDate>{(now - timedelta(minutes=age)).strftime('%a, %d %b %Y %H:%M:%S +0000')}</pubDate></item>"
+            )
+        body = (f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+                f'<title>Stub {category.title()} Wire</title>{"".join(items)}</channel></rss>')
+        return Response(body, mimetype='application/rss+xml')
+
+    @app.route('/openai/v1/chat/completions', methods=['POST'])
+    def openai_chat_completions():
+        failure = simulate('openai')
+        if failure:
+            return failure
+
+        settings = behaviour.profile['openai']
+        body = request.get_json(silent=True) or {}
+        prompt_chars = sum(len(m.get('content') or '') for m in body.get('messages', []))
+        words = min(settings.get('completion_words', 220), int(body.get('max_tokens') or 10 ** 6))
+        text = behaviour.sentences(words)
+        created = int(time.time())
+        model = body.get('model', 'gpt-3.5-turbo')
+        usage = {
+            'prompt_tokens': prompt_chars // 4,
+            'completion_tokens': words,
+            'total_tokens': prompt_chars // 4 + words,
+            'prompt_tokens_details': {'cached_tokens': behaviour.cached_prefix_tokens(body.get('messages', []))}
+        }
+
+        if not body.get('stream'):
+            return jsonify({
+                'id': f"chatcmpl-stub-{created}",
+                'object': 'chat.completion',
+                'created': created,
+                'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text}, 'finish_reason': 'stop'}],
+                'usage': usage
+            })
+
+        def stream():
+            tokens = text.split(' ')
+            for i, token in enumerate(tokens):
+                chunk = {
+                    'id': f"chatcmpl-stub-{created}",
+                    'object': 'chat.completion.chunk',
+                    'created': created,
+                    'model': model,
+                    'choices': [{'index': 0, 'delta': {'content': token + (' ' if i < len(tokens) - 1 else '')}, 'finish_reason': None}]
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                time.sleep(settings.get('stream_chunk_ms', 0) / 1000.0)
+            done = {
+                'id': f"chatcmpl-stub-{created}",
+                'object': 'chat.completion.chunk',
+                'created': created,
+                'model': model,
+                'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]
+            }
+            yield f"data: {json.dumps(done)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return Response(stream(), mimetype='text/event-stream')
+
+    @app.route('/v1/text:synthesize', methods=['POST'])
+    def tts_synthesize():
+        failure = simulate('tts')
+        if failure:
+            return failure
+
+        body = request.get_json(silent=True) or {}
+        text = body.get('input', {}).get('text', '')
+        size = len(text) * behaviour.profile['tts'].get('audio_bytes_per_char', 120)
+        return jsonify({'audioContent': base64.b64encode(b'\xff\xf3' + b'\x00' * max(size - 2, 0)).decode()})
+
+    @app.route('/graph/v17.0/<phone_id>/messages', methods=['POST'])
+    def whatsapp_messages(phone_id):
+        failure = simulate('whatsapp')
+        if failure:
+            return failure
+
+        body = request.get_json(silent=True) or {}
+        with behaviour.lock:
+            message_id = f"wamid.stub.{phone_id}.{behaviour.counters['whatsapp']}"
+        return jsonify({
+            'messaging_product': 'whatsapp',
+            'contacts': [{'input': body.get('to'), 'wa_id': body.get('to')}],
+            'messages': [{'id': message_id}]
+        })
+
+    @app.route('/_stub/stats')
+    def stub_stats():
+        with behaviour.lock:
+            return jsonify(dict(behaviour.counters))
+
+    return app
+
+class StubServer:
+    def __init__(self, host='127.0.0.1', port=8090, profile=None, quiet=False):
+        if quiet:
+            logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        self.app = create_stub_app(profile)
+        self.server = make_server(host, port, self.app, threaded=True)
+        self.host = host
+        self.port = self.server.server_port
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def env(self):
+        return {
+            'NEWS_API_BASE_URL': f"{self.base_url}/newsapi/v2",
+            'OPENAI_BASE_URL': f"{self.base_url}/openai/v1",
+            'GOOGLE_TTS_ENDPOINT': self.base_url,
+            'WHATSAPP_API_BASE_URL': f"{self.base_url}/graph/v17.0"
+        }
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+
+def main():
+    host = os.getenv('STUB_HOST', '127.0.0.1')
+    port = int(os.getenv('STUB_PORT', 8090))
+
+    server = StubServer(host, port)
+    print("DailyPod stub APIs running")
+    print("=" * 50)
+    for key, value in server.env().items():
+        print(f"{key}={value}")
+    print("=" * 50)
+
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStub server stopped")
+        sys.exit(0)
+
+if __name__ == '__main__':
+    main()
@@ -1,41 +1,95 @@
 from celery import shared_task
 from celery_app import celery
-from datetime import datetime
+import uuid
+from datetime import datetime, timedelta
 from config import Config
 from models import db, User, NewsArticle, DeliveryLog, SystemLog
-from services.news_service import NewsService
-from services.ai_service import AIService
-from services.tts_service import TTSService
-from services.whatsapp_service import WhatsAppService
+from services.news_service import NewsService, AsyncNewsService
+from services.ai_service import AIService, AsyncAIService
+from services.tts_service import TTSService, AsyncTTSService
+from services.whatsapp_service import WhatsAppService, AsyncWhatsAppService
+from services import async_runtime
+from services.pending_writes import PendingWrites
+from services.retry_service import RetryService
+from services.delivery_status_service import DeliveryStatusService
+from services.delivery_progress_service import DeliveryProgressService
+from services.task_progress_service import TaskProgressService
+from services.story_cluster_service import StoryClusterService
+from services.ranking_service import RankingService
+from services.seen_filter_service import SeenFilterService
+from services.briefing_service import BriefingService
+from services.audio_pipeline_service import AudioPipelineService
+from services.task_payloads import pack_ids, unpack_ids, result_report
+from metrics import metrics
+from tracing import tracer
+from usage import usage
+from clients import clients
 
 @shared_task
 def test_task(message):
     """Simple test task for load testing"""
     return f"Test task completed with message: {message}"
 
-@shared_task
+@shared_task(track_started=True)
 def fetch_news_task():
+    progress = TaskProgressService()
+    task_id = fetch_news_task.request.id
     try:
-        news_service = NewsService()
-        articles = news_service.fetch_multilingual_news()
-        
-        for article in articles:
-            if not article.summary:
-                ai_service = AIService()
-                summary = ai_service.summarize_article(
-                    article.title, 
-                    article.content, 
-                    article.language
-                )
-                if summary:
-                    article.summary = summary
+        progress.update(task_id, stage='fetching', state='running')
+        if Config.ASYNC_SERVICES:
+            articles = _fetch_news_async(task_id)
+        else:
+            news_service = NewsService()
+            articles = news_service.fetch_multilingual_news()
+            
+            progress.update(task_id, stage='summarizing', total=len(articles), done=0)
+            cluster_service = StoryClusterService()
+            for article in articles:
+                # Other copies of a story share its representative's summary in the briefing
+                if not article.summary and cluster_service.is_representative(article):
+                    ai_service = AIService()
+                    summary = ai_service.summarize_article(
+                        article.title, 
+                        article.content, 
+                        article.language
+                    )
+                    if summary:
+                        article.summary = summary
+                        article.summary_prompt_version = ai_service.prompt_version('summarize_article')
+                progress.increment(task_id, 'done')
         
         db.session.commit()
+        progress.update(task_id, stage='done', state='completed')
         return f"Fetched and processed {len(articles)} articles"
     except Exception as e:
+        progress.update(task_id, state='failed', error=str(e)[:200])
         return f"Error fetching news: {str(e)}"
 
-@shared_task
+def _fetch_news_async(task_id):
+    # fetch_news_task with every feed, then every summary, in flight at once on the
+    # worker's loop. Feed states, inserts, cluster lookups and the summaries' own
+    # rows are handled on this thread before and after each round.
+    progress = TaskProgressService()
+    articles = AsyncNewsService().fetch_multilingual_news()
+    
+    progress.update(task_id, stage='summarizing', total=len(articles), done=0)
+    cluster_service = StoryClusterService()
+    pending = [article for article in articles
+               if not article.summary and cluster_service.is_representative(article)]
+    ai_service = AsyncAIService()
+    
+    summaries = async_runtime.run(async_runtime.bounded(
+        [ai_service.summarize_article(article.title, article.content, article.language) for article in pending]))
+    PendingWrites.save_pending([ai_service])
+    
+    for article, summary in zip(pending, summaries):
+        if summary and not isinstance(summary, Exception):
+            article.summary = summary
+            article.summary_prompt_version = ai_service.prompt_version('summarize_article')
+    progress.increment(task_id, 'done', len(articles))
+    return articles
+
+@shared_task(track_started=True)
 def daily_delivery_task():
     try:
         active_users = User.query.filter_by(is_active=True).all()
@@ -50,58 +104,319 @@ def daily_delivery_task():
                 users_by_language[lang] = []
             users_by_language[lang].append(user)
         
+        run_id = daily_delivery_task.request.id or uuid.uuid4().hex
+        DeliveryProgressService().start_run(run_id, len(active_users))
+        
+        # Rank the whole day's pool once for every language; each language task
+        # then only loads its winners
+        languages = list(users_by_language.keys())
+        translate = Config.BRIEFING_MODE == 'translate'
+        if translate and Config.BRIEFING_CANONICAL_LANGUAGE not in languages:
+            languages.append(Config.BRIEFING_CANONICAL_LANGUAGE)
+        try:
+            with tracer.span('rank_articles', languages=len(languages)):
+                ranked = RankingService().select(languages, k=Config.BRIEFING_SIZE)
+        except Exception as e:
+            print(f"Article ranking failed, falling back to recency: {e}")
+            ranked = {}
+        
+        # Translate mode: write the briefing once from the canonical language's stories
+        # and translate it for everyone else; language tasks then read it from the cache
+        briefing_hash = None
+        canonical_ids = ranked.get(Config.BRIEFING_CANONICAL_LANGUAGE)
+        if translate and canonical_ids:
+            try:
+                with tracer.span('canonical_briefing', languages=len(users_by_language)), usage.run(run_id):
+                    briefing_hash = BriefingService().prepare(RankingService().load_articles(canonical_ids),
+                                                              list(users_by_language.keys()))
+            except Exception as e:
+                print(f"Canonical briefing failed, falling back to per-language summaries: {e}")
+        
         total_sent = 0
         for language, users in users_by_language.items():
-            result = process_language_delivery.delay(language, [u.id for u in users])
+            process_language_delivery.delay(language, pack_ids(u.id for u in users), run_id=run_id,
+                                            article_ids=ranked.get(language),
+                                            briefing_hash=briefing_hash)
             total_sent += len(users)
         
-        return f"Initiated delivery for {total_sent} users"
+        span = tracer.current_span()
+        trace_note = f" (trace {span.trace_id})" if span else ""
+        return f"Initiated delivery run {run_id} for {total_sent} users{trace_note}"
     except Exception as e:
         return f"Error in daily delivery: {str(e)}"
 
-@shared_task
-def process_language_delivery(language, user_ids):
+@shared_task(ignore_result=True)
+def process_language_delivery(language, user_ids, run_id=None, article_ids=None, briefing_hash=None):
+    progress = DeliveryProgressService()
+    async_services = []
     try:
+        user_ids = unpack_ids(user_ids)
         news_service = NewsService()
-        ai_service = AIService()
-        tts_service = TTSService()
+        if Config.ASYNC_SERVICES:
+            ai_service = AsyncAIService()
+            tts_service = AsyncTTSService()
+            async_services = [ai_service, tts_service]
+        else:
+            ai_service = AIService()
+            tts_service = TTSService()
         whatsapp_service = WhatsAppService()
         
-        articles = news_service.get_recent_articles(language=language, limit=10)
-        
-        if not articles:
-            articles = news_service.fetch_news(language=language, count=10)
-        
-        if not articles:
-            return f"No articles available for language: {language}"
+        summary = None
+        audio_filename = None
+        if briefing_hash:
+            progress.task_progress.stage(run_id, 'daily_summary', language)
+            with tracer.span('daily_summary', language=language, mode='translate'), usage.run(run_id):
+                summary = BriefingService(ai_service).summary_for(briefing_hash, language)
         
-        summary = ai_service.create_daily_summary(articles, language)
+        if not summary:
+            progress.task_progress.stage(run_id, 'select_articles', language)
+            with tracer.span('select_articles', language=language):
+                if article_ids:
+                    articles = RankingService().load_articles(article_ids)
+                else:
+                    articles = news_service.get_recent_articles(language=language, limit=10, distinct_stories=True)
+                
+                if articles:
+                    metrics.cache_hit('recent_articles')
+                else:
+                    metrics.cache_miss('recent_articles')
+                    articles = news_service.fetch_news(language=language, count=10)
+            
+            if not articles:
+                progress.record(run_id, 'failed', len(user_ids))
+                return f"No articles available for language: {language}"
+            
+            if Config.STREAMING_AUDIO:
+                progress.task_progress.stage(run_id, 'daily_summary_audio', language)
+                with tracer.span('daily_summary_audio', language=language), usage.run(run_id):
+                    # The streaming pipeline overlaps the two on threads, so it always takes the sync services
+                    summary, audio_filename = AudioPipelineService(AIService(), TTSService()).create_daily_briefing(articles, language)
+            
+            if not summary:
+                progress.task_progress.stage(run_id, 'daily_summary', language)
+                with tracer.span('daily_summary', language=language), usage.run(run_id):
+                    summary = async_runtime.resolve(ai_service.create_daily_summary(articles, language))
         
         if not summary:
+            progress.record(run_id, 'failed', len(user_ids))
             return f"Failed to create summary for language: {language}"
         
-        audio_filename = tts_service.create_daily_audio(summary, language)
+        if not audio_filename:
+            progress.task_progress.stage(run_id, 'daily_audio', language)
+            with tracer.span('daily_audio', language=language), usage.run(run_id):
+                audio_filename = async_runtime.resolve(tts_service.create_daily_audio(summary, language))
         
         if not audio_filename:
+            progress.record(run_id, 'failed', len(user_ids))
             return f"Failed to create audio for language: {language}"
         
+        retry_service = RetryService()
+        edition = retry_service.edition_for()
+        
         success_count = 0
-        for user_id in user_ids:
-            user = User.query.get(user_id)
-            if user and user.is_active:
-                try:
-                    if whatsapp_service.send_daily_news(user, audio_filename, summary):
-                        success_count += 1
+        retry_count = 0
+        progress.task_progress.stage(run_id, 'fan_out', language)
+        with tracer.span('fan_out', language=language, users=len(user_ids)) as fan_out:
+            if Config.ASYNC_SERVICES:
+                success_count, retry_count = _fan_out_async(language, user_ids, audio_filename, summary, edition,
+                                                            run_id=run_id)
+            else:
+                for user_id in user_ids:
+                    user = User.query.get(user_id)
+                    if user and user.is_active:
+                        key = retry_service.idempotency_key(user.id, edition)
+                        if retry_service.already_delivered(key) or not retry_service.claim(key):
+                            progress.record(run_id, 'skipped')
+                            continue
+                        try:
+                            if whatsapp_service.send_daily_news(user, audio_filename, summary, idempotency_key=key):
+                                success_count += 1
+                                progress.record(run_id, 'sent')
+                                continue
+                        except Exception as e:
+                            pass
+                        if _schedule_delivery_retry(retry_service, whatsapp_service, user, language,
+                                                    audio_filename, summary, edition, 1, run_id=run_id):
+                            retry_count += 1
                     else:
-                        whatsapp_service.send_error_message(user.phone_number, language)
-                except Exception as e:
-                    pass
+                        progress.record(run_id, 'skipped')
+            fan_out.set_attribute('sent', success_count)
+            fan_out.set_attribute('retried', retry_count)
         
-        return f"Successfully delivered to {success_count}/{len(user_ids)} users in {language}"
+        progress.task_progress.stage(run_id, 'done', language)
+        return f"Successfully delivered to {success_count}/{len(user_ids)} users in {language}, {retry_count} queued for retry"
     except Exception as e:
         return f"Error processing language {language}: {str(e)}"
+    finally:
+        PendingWrites.save_pending(async_services)
 
-@shared_task
+@shared_task(ignore_result=True)
+def retry_delivery_task(user_id, language, audio_filename, summary, edition, attempt, run_id=None):
+    progress = DeliveryProgressService()
+    try:
+        retry_service = RetryService()
+        whatsapp_service = WhatsAppService()
+        
+        user = User.query.get(user_id)
+        if not user or not user.is_active:
+            progress.record(run_id, 'skipped')
+            return f"Skipped retry for inactive user {user_id}"
+        
+        key = retry_service.idempotency_key(user.id, edition)
+        if retry_service.already_delivered(key):
+            progress.record(run_id, 'skipped')
+            return f"Already delivered {key}"
+        if not retry_service.claim(key):
+            progress.record(run_id, 'skipped')
+            return f"Delivery {key} in progress elsewhere"
+        
+        try:
+            if whatsapp_service.send_daily_news(user, audio_filename, summary, idempotency_key=key, attempt=attempt):
+                progress.record(run_id, 'sent')
+                return f"Delivered {key} on attempt {attempt}"
+        except Exception as e:
+            pass
+        
+        if _schedule_delivery_retry(retry_service, whatsapp_service, user, language,
+                                    audio_filename, summary, edition, attempt, run_id=run_id):
+            return f"Delivery {key} failed on attempt {attempt}, retry scheduled"
+        return f"Delivery {key} failed on attempt {attempt}, dead-lettered"
+    except Exception as e:
+        return f"Error retrying delivery for user {user_id}: {str(e)}"
+
+def _fan_out_async(language, user_ids, audio_filename, summary, edition, run_id=None):
+    # The fan-out with up to ASYNC_CONCURRENCY messages in flight on this worker's loop.
+    # Users, claims, progress, retries and log rows are handled here in batches before
+    # and after each round of sends, so only the WhatsApp requests run on the loop.
+    # Each message gets its own AsyncWhatsAppService over the worker's sender pool and client.
+    retry_service = RetryService()
+    progress = DeliveryProgressService()
+    sender_pool = clients.get('whatsapp_sender_pool')
+    client = clients.get('whatsapp_http_async')
+    
+    users = {user.id: user for user in User.query.filter(User.id.in_(user_ids)).all()} if user_ids else {}
+    claimed = []
+    for user_id in user_ids:
+        user = users.get(user_id)
+        if not user or not user.is_active:
+            progress.record(run_id, 'skipped')
+            continue
+        key = retry_service.idempotency_key(user.id, edition)
+        if retry_service.already_delivered(key) or not retry_service.claim(key):
+            progress.record(run_id, 'skipped')
+            continue
+        claimed.append((user, key, AsyncWhatsAppService(sender_pool, client)))
+    
+    results = async_runtime.run(async_runtime.bounded(
+        [service.send_daily_news(user, audio_filename, summary, idempotency_key=key) for user, key, service in claimed]))
+    PendingWrites.save_pending(service for _, _, service in claimed)
+    
+    sent_count = 0
+    retry_count = 0
+    failed = []
+    for (user, key, service), result in zip(claimed, results):
+        if result is True:
+            sent_count += 1
+            continue
+        if _retry_or_dead_letter(retry_service, service, user, language,
+                                 audio_filename, summary, edition, 1, run_id=run_id):
+            retry_count += 1
+        elif not service.last_outcome_unknown:
+            failed.append((user, service))
+    progress.record(run_id, 'sent', sent_count)
+    
+    if failed:
+        async_runtime.run(async_runtime.bounded(
+            [service.send_error_message(user.phone_number, language) for user, service in failed]))
+        PendingWrites.save_pending(service for _, service in failed)
+    
+    errors = [result for result in results if isinstance(result, Exception)]
+    if errors:
+        print(f"Async fan-out for {language}: {len(errors)} deliveries raised, first: {errors[0]}")
+    return sent_count, retry_count
+
+def _schedule_delivery_retry(retry_service, whatsapp_service, user, language, audio_filename, summary, edition, attempt, run_id=None):
+    if _retry_or_dead_letter(retry_service, whatsapp_service, user, language,
+                             audio_filename, summary, edition, attempt, run_id=run_id):
+        return True
+    
+    # Only tell the user once the retry budget is spent, not on every transient failure,
+    # and not when the briefing itself may have arrived
+    if not whatsapp_service.last_outcome_unknown:
+        whatsapp_service.send_error_message(user.phone_number, language)
+    return False
+
+def _retry_or_dead_letter(retry_service, whatsapp_service, user, language, audio_filename, summary, edition, attempt, run_id=None):
+    key = retry_service.idempotency_key(user.id, edition)
+    status_code = whatsapp_service.last_status_code
+    if whatsapp_service.last_outcome_unknown:
+        # The request may have reached WhatsApp, so it is never sent again. The claim is
+        # kept so an overlapping run skips this user, and the dead letter records why.
+        DeliveryProgressService().record(run_id, 'failed')
+        retry_service.dead_letter(user.id, key, language, audio_filename, attempt,
+                                  "Outcome unknown: the request may have been delivered")
+        return False
+    
+    retry_service.release(key)
+    if retry_service.should_retry(attempt, status_code):
+        retry_delivery_task.apply_async(
+            # Retries only ever send the caption, so the rest of the summary stays out of the broker
+            args=[user.id, language, audio_filename, summary[:WhatsAppService.CAPTION_SUMMARY_CHARS], edition, attempt + 1],
+            kwargs={'run_id': run_id},
+            countdown=retry_service.backoff_delay(attempt)
+        )
+        return True
+    
+    DeliveryProgressService().record(run_id, 'failed')
+    retry_service.dead_letter(user.id, key, language, audio_filename, attempt,
+                              f"HTTP {status_code}" if status_code else "WhatsApp API error")
+    return False
+
+@shared_task(ignore_result=True)
+def apply_delivery_status_task():
+    try:
+        applied = DeliveryStatusService().drain()
+        return f"Applied {applied} delivery status events"
+    except Exception as e:
+        return f"Error applying delivery status events: {str(e)}"
+
+@shared_task(ignore_result=True)
+def delivery_slo_check_task():
+    try:
+        runs = DeliveryProgressService().check_runs()
+        alerted = sum(1 for run in runs if run.alerted and run.status == 'running')
+        return f"Checked {len(runs)} delivery runs, {alerted} forecast to miss the deadline"
+    except Exception as e:
+        return f"Error checking delivery runs: {str(e)}"
+
+@shared_task(ignore_result=True)
+def rollup_usage_task():
+    try:
+        today = datetime.utcnow().date()
+        groups = usage.rollup(today) + usage.rollup(today - timedelta(days=1))
+        deleted = usage.cleanup(days=Config.USAGE_RETENTION_DAYS)
+        return f"Rolled up {groups} usage groups, deleted {deleted} old usage records"
+    except Exception as e:
+        return f"Error rolling up usage: {str(e)}"
+
+@shared_task(ignore_result=True)
+def rebuild_seen_filter_task():
+    try:
+        report = SeenFilterService().rebuild()
+        return (f"Rebuilt seen-article filter: {report['items']} items, {report['bytes']} bytes, "
+                f"expected false-positive rate {report['expected_fp_rate']:.5f}")
+    except Exception as e:
+        return f"Error rebuilding seen-article filter: {str(e)}"
+
+@shared_task(ignore_result=True)
+def cleanup_traces_task():
+    try:
+        deleted = tracer.cleanup(days=Config.TRACE_RETENTION_DAYS)
+        return f"Deleted {deleted} old trace spans"
+    except Exception as e:
+        return f"Error cleaning up traces: {str(e)}"
+
+@shared_task(ignore_result=True)
 def cleanup_audio_task():
     try:
         tts_service = TTSService()
@@ -122,6 +437,12 @@ def health_check_task():
             DeliveryLog.sent_at >= datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
         ).count()
         
-        return f"Health check - Active users: {active_users}, Recent articles: {recent_articles}, Failed deliveries: {failed_deliveries}"
+        results = result_report()
+        result_note = ""
+        if results:
+            result_note = (f", Task results: {results['results']} ({results['bytes'] // 1024} KB, "
+                           f"expiring within {results['max_ttl_seconds'] or 0}s, {results['persistent']} without expiry)")
+        
+        return f"Health check - Active users: {active_users}, Recent articles: {recent_articles}, Failed deliveries: {failed_deliveries}{result_note}"
     except Exception as e:
         return f"Error in health check: {str(e)}" 
\ No newline at end of file
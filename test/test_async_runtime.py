@@ -0,0 +1,184 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import uuid
+import asyncio
+import contextvars
+import grpc
+from concurrent import futures
+from google.cloud import texttospeech
+from google.cloud.texttospeech_v1.services.text_to_speech.transports.grpc_asyncio import TextToSpeechGrpcAsyncIOTransport
+from clients import clients
+from services import async_runtime
+from services.tts_service import AsyncTTSService
+from services.ai_service import AsyncAIService
+from usage import UsageLedger
+from services.circuit_breaker import breaker, hedged_async
+from services.sender_pool import SenderPool, Sender
+
+request_id = contextvars.ContextVar('request_id', default=None)
+
+def test_loop_is_reused_between_runs():
+    """Consecutive bridge calls share one event loop"""
+    async def current_loop():
+        return asyncio.get_running_loop()
+    
+    first = async_runtime.run(current_loop())
+    second = async_runtime.run(current_loop())
+    
+    assert first is second
+    assert not first.is_closed()
+
+def test_context_carries_into_coroutines():
+    """Context variables set by the task are visible to its coroutines"""
+    async def read():
+        results = await async_runtime.bounded([asyncio.sleep(0, result=request_id.get()) for _ in range(3)])
+        return results + [await async_runtime.run_blocking(request_id.get)]
+    
+    token = request_id.set('run-42')
+    try:
+        assert async_runtime.run(read()) == ['run-42'] * 4
+    finally:
+        request_id.reset(token)
+
+def test_resolve_runs_awaitables_only():
+    """Sync callers get the same result from either service variant"""
+    async def translate(text):
+        await asyncio.sleep(0)
+        return text.upper()
+    
+    assert async_runtime.resolve(translate('hola')) == 'HOLA'
+    assert async_runtime.resolve('hola') == 'hola'
+    assert async_runtime.resolve(None) is None
+
+def test_bounded_limits_calls_in_flight():
+    """No more than the limit run at once, and errors come back as results"""
+    state = {'active': 0, 'peak': 0}
+    
+    async def call(i):
+        state['active'] += 1
+        state['peak'] = max(state['peak'], state['active'])
+        await asyncio.sleep(0.01)
+        state['active'] -= 1
+        if i == 3:
+            raise ValueError('provider error')
+        return i
+    
+    results = async_runtime.run(async_runtime.bounded([call(i) for i in range(20)], limit=5))
+    
+    assert state['peak'] == 5
+    assert isinstance(results[3], ValueError)
+    assert results[:3] == [0, 1, 2]
+
+def test_hedged_async_cancels_the_loser():
+    """The hedge wins over a stalled request, which is cancelled"""
+    provider = f"test-{uuid.uuid4().hex[:8]}"
+    for _ in range(30):
+        breaker(provider).record(True, 0.05)
+    cancelled = []
+    calls = []
+    
+    async def fetch():
+        calls.append(1)
+        if len(calls) == 1:
+            try:
+                await asyncio.sleep(1.0)
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+            return 'slow'
+        return 'fast'
+    
+    async def run():
+        result = await hedged_async(provider, fetch)
+        await asyncio.sleep(0)
+        return result
+    
+    start = time.perf_counter()
+    assert async_runtime.run(run()) == 'fast'
+    assert time.perf_counter() - start < 0.8
+    assert cancelled == [1]
+
+def test_route_async_matches_route():
+    """The async sender route tries the same senders in the same order"""
+    pool = SenderPool([Sender(f"phone-{i}", 'token') for i in range(3)])
+    pool.rate = 1000
+    
+    async def collect():
+        return [sender.phone_id async for sender in pool.route_async('15550001111')]
+    
+    assert async_runtime.run(collect()) == [sender.phone_id for sender in pool.route('15550001111')]
+
+def start_tts_server():
+    # In-process gRPC TextToSpeech that echoes the input text as the audio
+    def synthesize(request, context):
+        return texttospeech.SynthesizeSpeechResponse(audio_content=request.input.text.encode())
+    
+    handler = grpc.method_handlers_generic_handler('google.cloud.texttospeech.v1.TextToSpeech', {
+        'SynthesizeSpeech': grpc.unary_unary_rpc_method_handler(
+            synthesize,
+            request_deserializer=texttospeech.SynthesizeSpeechRequest.deserialize,
+            response_serializer=texttospeech.SynthesizeSpeechResponse.serialize)
+    })
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    server.add_generic_rpc_handlers((handler,))
+    port = server.add_insecure_port('127.0.0.1:0')
+    server.start()
+    
+    def create_client():
+        channel = grpc.aio.insecure_channel(f"127.0.0.1:{port}")
+        return texttospeech.TextToSpeechAsyncClient(transport=TextToSpeechGrpcAsyncIOTransport(channel=channel))
+    
+    return server, create_client
+
+def test_async_tts_runs_on_the_worker_loop():
+    """A gRPC TTS client built outside the loop is replaced by one that synthesizes on it"""
+    server, create_client = start_tts_server()
+    saved = clients.factories['google_tts_async']
+    try:
+        clients.register('google_tts_async', lambda: async_runtime.on_loop(create_client), *saved[1:])
+        clients.reset('google_tts_async')
+        clients.clients['google_tts_async'] = {'client': create_client(), 'pid': os.getpid(), 'built_at': time.time()}
+        
+        service = AsyncTTSService()
+        assert async_runtime.bound_here(service.client)
+        assert async_runtime.run(service.synthesize('Good morning', 'en')) == b'Good morning'
+        assert AsyncTTSService().client is service.client
+    finally:
+        clients.reset('google_tts_async')
+        clients.register('google_tts_async', *saved)
+        server.stop(None)
+
+def test_writes_wait_until_the_loop_returns():
+    """Usage flushes and system log rows are deferred while a coroutine runs"""
+    ledger = UsageLedger()
+    flushes = []
+    ledger.flush = lambda: flushes.append(len(ledger.buffer))
+    ledger.last_flush = 0
+    service = AsyncAIService(client=object())
+    
+    async def work():
+        ledger.record('openai', 'summarize')
+        service._log_system('error', 'Summary failed')
+        return async_runtime.in_loop()
+    
+    assert async_runtime.run(work())
+    assert not async_runtime.in_loop()
+    assert flushes == []
+    assert [row.message for row in service.pending] == ['Summary failed']
+    
+    ledger.record('openai', 'summarize')
+    assert flushes == [2]
+
+if __name__ == "__main__":
+    test_loop_is_reused_between_runs()
+    test_context_carries_into_coroutines()
+    test_resolve_runs_awaitables_only()
+    test_bounded_limits_calls_in_flight()
+    test_hedged_async_cancels_the_loser()
+    test_route_async_matches_route()
+    test_async_tts_runs_on_the_worker_loop()
+    test_writes_wait_until_the_loop_returns()
+    print("Async runtime tests passed")
@@ -0,0 +1,38 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.audio_pipeline_service import segments
+
+def token_stream(text, size=3):
+    return (text[i:i + size] for i in range(0, len(text), size))
+
+def test_segments_end_on_sentences():
+    """Segments only end at sentence boundaries once they reach the minimum length"""
+    text = "First story here. Second story follows! Third one asks why? Last words."
+    result = list(segments(token_stream(text), min_chars=30, max_chars=200))
+    
+    assert result == ["First story here. Second story follows!", "Third one asks why? Last words."]
+
+def test_segments_keep_all_text():
+    """Joining the segments gives back the whole completion"""
+    text = " ".join(f"Sentence number {i} is about the market." for i in range(40))
+    result = list(segments(token_stream(text, 7), min_chars=100, max_chars=400))
+    
+    assert " ".join(result) == text
+    assert all(len(segment) <= 400 for segment in result)
+    assert len(result) > 5
+
+def test_run_on_text_is_cut_at_a_space():
+    """A passage without sentence breaks is cut before the maximum length"""
+    text = "word " * 100
+    result = list(segments(token_stream(text), min_chars=50, max_chars=120))
+    
+    assert all(len(segment) <= 120 for segment in result)
+    assert " ".join(result).split() == text.split()
+
+if __name__ == "__main__":
+    test_segments_end_on_sentences()
+    test_segments_keep_all_text()
+    test_run_on_text_is_cut_at_a_space()
+    print("Audio pipeline tests passed")
@@ -0,0 +1,34 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import NewsArticle
+from services.briefing_service import articles_fingerprint, text_hash
+
+def make_articles(count=5):
+    return [NewsArticle(id=i, title=f"Story {i}", content=f"Body of story {i}", summary=f"Summary {i}")
+            for i in range(1, count + 1)]
+
+def test_fingerprint_is_stable():
+    """The same stories always give the same canonical cache key"""
+    assert articles_fingerprint(make_articles()) == articles_fingerprint(make_articles())
+
+def test_fingerprint_follows_briefing_inputs():
+    """Changing a summary changes the key; stories past the first five do not"""
+    articles = make_articles()
+    changed = make_articles()
+    changed[2].summary = 'A corrected summary'
+    
+    assert articles_fingerprint(changed) != articles_fingerprint(articles)
+    assert articles_fingerprint(make_articles(7)) == articles_fingerprint(articles)
+
+def test_text_hash_keys_translations_by_canonical_text():
+    """Translations are keyed by the exact canonical text"""
+    assert text_hash('Good morning.') == text_hash('Good morning.')
+    assert text_hash('Good morning.') != text_hash('Good morning!')
+
+if __name__ == "__main__":
+    test_fingerprint_is_stable()
+    test_fingerprint_follows_briefing_inputs()
+    test_text_hash_keys_translations_by_canonical_text()
+    print("Briefing tests passed")
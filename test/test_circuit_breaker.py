@@ -0,0 +1,114 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import uuid
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError, hedged, breaker
+
+def make_breaker(**overrides):
+    circuit = CircuitBreaker(f"test-{uuid.uuid4().hex[:8]}")
+    circuit.min_calls = 4
+    circuit.open_seconds = 0.2
+    for name, value in overrides.items():
+        setattr(circuit, name, value)
+    return circuit
+
+def fail(circuit, error=RuntimeError('503 from provider')):
+    try:
+        with circuit.guard():
+            raise error
+    except RuntimeError:
+        pass
+
+def test_opens_on_failure_rate_and_rejects():
+    """Half the calls failing trips the breaker and later calls fail fast"""
+    circuit = make_breaker()
+    for _ in range(2):
+        with circuit.guard():
+            pass
+        fail(circuit)
+    assert circuit.state == 'open'
+    
+    try:
+        with circuit.guard():
+            raise AssertionError('call should not run while open')
+        assert False, 'expected CircuitOpenError'
+    except CircuitOpenError as e:
+        assert e.provider == circuit.provider
+
+def test_half_open_probe_closes_or_reopens():
+    """After the open period one probe decides whether the provider is back"""
+    circuit = make_breaker()
+    for _ in range(4):
+        fail(circuit)
+    time.sleep(0.25)
+    
+    fail(circuit)
+    assert circuit.state == 'open'
+    time.sleep(0.25)
+    
+    assert circuit.allow()
+    assert circuit.state == 'half_open'
+    assert not circuit.allow()
+    circuit.record(True, 0.05)
+    assert circuit.state == 'closed'
+
+def test_slow_calls_trip_the_breaker():
+    """A provider that answers but too slowly is treated as degraded"""
+    circuit = make_breaker(slow_call=0.01, slow_rate=0.75)
+    for _ in range(4):
+        circuit.record(True, 0.5)
+    assert circuit.state == 'open'
+
+def test_ignored_errors_do_not_count():
+    """Client errors rejected by is_failure leave the breaker closed"""
+    circuit = make_breaker()
+    for _ in range(6):
+        try:
+            with circuit.guard(is_failure=lambda e: not isinstance(e, ValueError)):
+                raise ValueError('invalid phone number')
+        except ValueError:
+            pass
+    assert circuit.state == 'closed'
+
+def test_hedge_delay_follows_p95():
+    """With enough samples the hedge fires at the observed p95 latency"""
+    circuit = make_breaker()
+    for latency in [0.1] * 95 + [3.0] * 5:
+        circuit.record(True, latency)
+    assert circuit.hedge_delay() == 3.0
+    
+    circuit.latencies.clear()
+    for latency in [0.01] * 100:
+        circuit.record(True, latency)
+    assert circuit.hedge_delay() == 0.2
+
+def test_hedged_request_bounds_tail_latency():
+    """A stalled first request is overtaken by the hedge"""
+    provider = f"test-{uuid.uuid4().hex[:8]}"
+    circuit = breaker(provider)
+    for _ in range(30):
+        circuit.record(True, 0.05)
+    calls = []
+    
+    def fetch():
+        calls.append(1)
+        if len(calls) == 1:
+            time.sleep(1.0)
+            return 'slow'
+        return 'fast'
+    
+    start = time.perf_counter()
+    assert hedged(provider, fetch) == 'fast'
+    assert time.perf_counter() - start < 0.8
+    assert len(calls) == 2
+
+if __name__ == "__main__":
+    test_opens_on_failure_rate_and_rejects()
+    test_half_open_probe_closes_or_reopens()
+    test_slow_calls_trip_the_breaker()
+    test_ignored_errors_do_not_count()
+    test_hedge_delay_follows_p95()
+    test_hedged_request_bounds_tail_latency()
+    print("Circuit breaker tests passed")
@@ -0,0 +1,79 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+from clients import ClientRegistry
+
+class FakeClient:
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+    
+    def close(self):
+        self.closed = True
+
+def make_registry():
+    registry = ClientRegistry()
+    built = []
+    
+    def factory():
+        built.append(FakeClient(len(built) + 1))
+        return built[-1]
+    
+    registry.register('provider', factory, healthy=lambda client: not client.closed)
+    return registry, built
+
+def test_clients_are_built_once_and_shared():
+    """Warm-up builds each client once and every get() returns it"""
+    registry, built = make_registry()
+    registry.warm()
+    
+    assert len(built) == 1
+    assert registry.get('provider') is built[0]
+    assert registry.get('provider') is built[0]
+
+def test_broken_clients_are_rebuilt():
+    """A client failing its health check is closed and replaced"""
+    registry, built = make_registry()
+    first = registry.get('provider')
+    
+    assert registry.check(force=True) == []
+    first.closed = True
+    assert registry.check(force=True) == ['provider']
+    assert registry.get('provider') is built[1]
+
+def test_old_and_inherited_clients_are_rebuilt():
+    """Clients past CLIENT_MAX_AGE or built before a fork are replaced"""
+    registry, built = make_registry()
+    registry.max_age = 60
+    registry.get('provider')
+    
+    registry.clients['provider']['built_at'] = time.time() - 120
+    assert registry.check(force=True) == ['provider']
+    assert built[0].closed
+    
+    # A forked child must not reuse (or close) the parent's connections
+    registry.clients['provider']['pid'] = -1
+    assert registry.get('provider') is built[2]
+    assert not built[1].closed
+
+def test_failing_factory_does_not_break_warm_up():
+    """Warm-up skips a client whose provider is unreachable"""
+    registry = ClientRegistry()
+    
+    def broken():
+        raise ConnectionError('no credentials')
+    
+    registry.register('broken', broken)
+    registry.register('working', lambda: FakeClient(1))
+    registry.warm()
+    
+    assert sorted(registry.report()) == ['working']
+
+if __name__ == "__main__":
+    test_clients_are_built_once_and_shared()
+    test_broken_clients_are_rebuilt()
+    test_old_and_inherited_clients_are_rebuilt()
+    test_failing_factory_does_not_break_warm_up()
+    print("Client registry tests passed")
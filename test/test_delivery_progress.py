@@ -0,0 +1,46 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta
+from models import DeliveryRun
+from services.delivery_progress_service import DeliveryProgressService
+
+def make_run(**kwargs):
+    started = datetime(2024, 5, 1, 7, 30)
+    return DeliveryRun(run_id='run-1', started_at=started, deadline=started + timedelta(minutes=30),
+                       target=1000, **kwargs)
+
+def test_forecast_projects_completion_from_average_rate():
+    """With no earlier check the whole-run average rate drives the forecast"""
+    run = make_run()
+    counts = {'target': 1000, 'sent': 300, 'failed': 0, 'skipped': 0, 'remaining': 700}
+    rate, forecast = DeliveryProgressService().forecast(run, counts, now=run.started_at + timedelta(minutes=10))
+    
+    assert abs(rate - 0.5) < 1e-9
+    assert forecast == run.started_at + timedelta(minutes=10, seconds=1400)
+    assert forecast > run.deadline
+
+def test_forecast_uses_rate_since_last_check():
+    """A slowdown since the last check is reflected in the projection"""
+    run = make_run(checked_at=datetime(2024, 5, 1, 7, 35), checked_done=500)
+    counts = {'target': 1000, 'sent': 510, 'failed': 0, 'skipped': 0, 'remaining': 490}
+    rate, forecast = DeliveryProgressService().forecast(run, counts, now=datetime(2024, 5, 1, 7, 36))
+    
+    assert abs(rate - 10 / 60) < 1e-9
+    assert forecast > run.deadline
+
+def test_forecast_without_progress_has_no_completion():
+    """A stalled run has no projected completion time"""
+    run = make_run()
+    counts = {'target': 1000, 'sent': 0, 'failed': 0, 'skipped': 0, 'remaining': 1000}
+    rate, forecast = DeliveryProgressService().forecast(run, counts, now=run.started_at + timedelta(minutes=1))
+    
+    assert rate == 0
+    assert forecast is None
+
+if __name__ == "__main__":
+    test_forecast_projects_completion_from_average_rate()
+    test_forecast_uses_rate_since_last_check()
+    test_forecast_without_progress_has_no_completion()
+    print("Delivery progress tests passed")
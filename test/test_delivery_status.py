@@ -0,0 +1,138 @@
+import os
+import sys
+import hmac
+import hashlib
+import json
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from models import db, User, DeliveryLog
+from services.delivery_status_service import DeliveryStatusService
+
+def create_test_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    return app
+
+def status_payload(*statuses):
+    return {'entry': [{'changes': [{'value': {'statuses': [
+        {'id': message_id, 'status': status, 'timestamp': str(timestamp)}
+        for message_id, status, timestamp in statuses
+    ]}}]}]}
+
+def test_signature_verification():
+    """Callbacks are only accepted with a valid app secret signature"""
+    service = DeliveryStatusService()
+    service.app_secret = 'secret'
+    body = b'{"entry": []}'
+    signature = 'sha256=' + hmac.new(b'secret', body, hashlib.sha256).hexdigest()
+    
+    assert service.verify_signature(body, signature)
+    assert not service.verify_signature(body, 'sha256=bad')
+    assert not service.verify_signature(body, None)
+
+def test_unsigned_callbacks_rejected_without_secret():
+    """No app secret means no callbacks, unless unsigned ones are explicitly allowed"""
+    service = DeliveryStatusService()
+    service.app_secret = None
+    service.allow_unsigned = False
+    assert not service.verify_signature(b'{"entry": []}', None)
+    
+    service.allow_unsigned = True
+    assert service.verify_signature(b'{"entry": []}', None)
+
+def test_invalid_timestamps_skip_only_their_event():
+    """A malformed timestamp drops that status, and a missing one is applied as now"""
+    payload = status_payload(('wamid.1', 'delivered', 1700000000), ('wamid.2', 'read', 'yesterday'),
+                             ('wamid.3', 'read', 10 ** 20))
+    payload['entry'][0]['changes'][0]['value']['statuses'].append({'id': 'wamid.4', 'status': 'sent'})
+    
+    events = DeliveryStatusService().extract_events(payload)
+    assert [(event['id'], event['timestamp']) for event in events] == [('wamid.1', 1700000000), ('wamid.4', 0)]
+
+class FakeRedis:
+    def __init__(self, items):
+        self.items = list(items)
+        self.commands = []
+    
+    def delete(self, key):
+        pass
+    
+    def pipeline(self):
+        return self
+    
+    def lrange(self, key, start, end):
+        self.commands.append(('lrange', start, end))
+    
+    def ltrim(self, key, start, end):
+        self.commands.append(('ltrim', start, end))
+    
+    def execute(self):
+        (_, start, end), (_, trim_start, _) = self.commands
+        self.commands = []
+        batch = self.items[start:end + 1]
+        self.items = self.items[trim_start:]
+        return [batch, True]
+    
+    def rpush(self, key, *values):
+        self.items.extend(values)
+        return len(self.items)
+    
+    def lpush(self, key, *values):
+        for value in values:
+            self.items.insert(0, value)
+        return len(self.items)
+
+def test_failed_batch_goes_back_on_the_queue():
+    """A database error leaves the drained batch queued in its original order"""
+    import services.delivery_status_service as delivery_status_module
+    app = create_test_app()
+    queued = [json.dumps({'id': f'wamid.{i}', 'status': 'delivered', 'timestamp': i, 'error': None}) for i in range(3)]
+    fake = FakeRedis(queued)
+    original = delivery_status_module.get_redis
+    delivery_status_module.get_redis = lambda: fake
+    try:
+        with app.app_context():
+            # No tables, so the update fails
+            applied = DeliveryStatusService().drain()
+    finally:
+        delivery_status_module.get_redis = original
+    
+    assert applied == 0
+    assert fake.items == queued
+
+def test_apply_events_batches_and_never_regresses():
+    """Out-of-order callbacks collapse to the furthest status per message"""
+    app = create_test_app()
+    with app.app_context():
+        db.create_all()
+        user = User(phone_number='15550000001')
+        db.session.add(user)
+        db.session.commit()
+        db.session.add_all([
+            DeliveryLog(user_id=user.id, status='sent', message_id='wamid.1'),
+            DeliveryLog(user_id=user.id, status='read', message_id='wamid.2')
+        ])
+        db.session.commit()
+        
+        service = DeliveryStatusService()
+        events = service.extract_events(status_payload(
+            ('wamid.1', 'read', 300),
+            ('wamid.1', 'delivered', 200),
+            ('wamid.2', 'delivered', 100),
+            ('wamid.3', 'delivered', 100)
+        ))
+        unmatched = service.apply_events(json.loads(json.dumps(events)))
+        
+        assert [e['id'] for e in unmatched] == ['wamid.3']
+        assert DeliveryLog.query.filter_by(message_id='wamid.1').one().status == 'read'
+        assert DeliveryLog.query.filter_by(message_id='wamid.2').one().status == 'read'
+
+if __name__ == "__main__":
+    test_signature_verification()
+    test_unsigned_callbacks_rejected_without_secret()
+    test_invalid_timestamps_skip_only_their_event()
+    test_failed_batch_goes_back_on_the_queue()
+    test_apply_events_batches_and_never_regresses()
+    print("Delivery status tests passed")
@@ -0,0 +1,73 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import MetricsRegistry
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def hincrbyfloat(self, key, field, value):
+        fields = self.hashes.setdefault(key, {})
+        fields[field.encode()] = fields.get(field.encode(), 0) + value
+
+    def execute(self):
+        return []
+
+    def hgetall(self, key):
+        return {field: str(value).encode() for field, value in self.hashes.get(key, {}).items()}
+
+def test_processes_aggregate_into_shared_series():
+    """Two registries (e.g. two prefork children) add into the same series"""
+    import metrics as metrics_module
+    fake = FakeRedis()
+    original = metrics_module.get_redis
+    metrics_module.get_redis = lambda: fake
+    try:
+        first, second = MetricsRegistry(), MetricsRegistry()
+        first.inc('dailypod_db_commits_total')
+        second.inc('dailypod_db_commits_total', 2)
+        first.flush()
+        
+        output = second.render()
+        assert 'dailypod_db_commits_total 3' in output
+        assert '# TYPE dailypod_db_commits_total counter' in output
+    finally:
+        metrics_module.get_redis = original
+
+def test_histogram_and_cache_ratio_rendering():
+    """Histograms are cumulative and cache hit ratios are derived"""
+    import metrics as metrics_module
+    fake = FakeRedis()
+    original = metrics_module.get_redis
+    metrics_module.get_redis = lambda: fake
+    try:
+        registry = MetricsRegistry()
+        with registry.track_call('openai', 'daily_summary'):
+            pass
+        try:
+            with registry.track_call('openai', 'daily_summary'):
+                raise RuntimeError('boom')
+        except RuntimeError:
+            pass
+        registry.cache_hit('recent_articles')
+        registry.cache_hit('recent_articles')
+        registry.cache_hit('recent_articles')
+        registry.cache_miss('recent_articles')
+        
+        output = registry.render()
+        assert '# TYPE dailypod_provider_request_duration_seconds histogram' in output
+        assert 'dailypod_provider_request_duration_seconds_bucket{le="+Inf",operation="daily_summary",provider="openai"} 2' in output
+        assert 'dailypod_provider_requests_total{operation="daily_summary",outcome="error",provider="openai"} 1' in output
+        assert 'dailypod_cache_hit_ratio{cache="recent_articles"} 0.75' in output
+    finally:
+        metrics_module.get_redis = original
+
+if __name__ == "__main__":
+    test_processes_aggregate_into_shared_series()
+    test_histogram_and_cache_ratio_rendering()
+    print("Metrics tests passed")
@@ -0,0 +1,123 @@
+import os
+import sys
+import time
+import tempfile
+import importlib
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+# Patched on Config rather than the environment, so the settings hold whichever
+# test module imported config first
+PROFILES_DIR = tempfile.mkdtemp(prefix='dailypod-profiles-')
+Config.PROFILING_ENABLED = True
+Config.PROFILES_FOLDER = PROFILES_DIR
+Config.PROFILE_POLL_INTERVAL = 3600
+Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(PROFILES_DIR, 'test.db')}"
+Config.OPENAI_API_KEY = Config.OPENAI_API_KEY or 'test'
+Config.GOOGLE_TTS_ENDPOINT = Config.GOOGLE_TTS_ENDPOINT or 'http://127.0.0.1:9'
+
+from models import ProfileRecord
+from profiling import ProfilingSwitch, profiling
+
+profiling.enabled = True
+profiling.folder = PROFILES_DIR
+profiling.poll_interval = 3600
+if 'app' in sys.modules:
+    # Imported by an earlier module with other settings: rebuild it so the profiling
+    # hooks and the test database apply
+    app = importlib.reload(sys.modules['app']).app
+else:
+    from app import app
+
+def busy(seconds=0.05):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(i * i for i in range(1000))
+
+def test_armed_target_counts_down_and_saves_records():
+    """An armed target is profiled for exactly N runs, each saved with its run id"""
+    switch = ProfilingSwitch()
+    switch.arm('task:tasks.example', count=2)
+    assert switch.armed_targets()['task:tasks.example']['remaining'] == 2
+    
+    saved = []
+    with app.app_context():
+        for run in range(3):
+            started = switch.start(f"key{run}", 'task:tasks.example')
+            busy()
+            saved.append(switch.stop(f"key{run}", f"run{run}", {'run': run}))
+            if run == 0:
+                assert started and switch.armed_targets()['task:tasks.example']['remaining'] == 1
+        
+        assert saved[0] and saved[1] and saved[2] is None
+        assert 'task:tasks.example' not in switch.armed_targets()
+        records = ProfileRecord.query.filter_by(target='task:tasks.example').order_by(ProfileRecord.id).all()
+        assert [record.run_id for record in records] == ['run0', 'run1']
+        assert all(record.mode == 'deterministic' and record.file_name.endswith('.prof') for record in records)
+        assert all(os.path.getsize(os.path.join(PROFILES_DIR, record.file_name)) == record.size_bytes for record in records)
+
+def test_idle_switch_does_nothing():
+    """Without armed targets a run neither profiles nor saves anything"""
+    switch = ProfilingSwitch()
+    switch._last_poll = 10 ** 10
+    assert switch.idle()
+    assert not switch.start('key', 'task:tasks.example')
+    assert switch.stop('key', 'run') is None
+
+def test_sampling_mode_writes_collapsed_stacks():
+    """Sampling profiles are saved as folded stacks naming the sampled code"""
+    switch = ProfilingSwitch()
+    switch.sample_interval = 0.001
+    switch.arm('task:tasks.sampled', count=1, mode='sampling')
+    with app.app_context():
+        assert switch.start('key', 'task:tasks.sampled')
+        busy()
+        file_name = switch.stop('key', 'run')
+    
+    assert file_name.endswith('.folded')
+    with open(os.path.join(PROFILES_DIR, file_name)) as f:
+        assert 'busy' in f.read()
+
+def test_admin_lists_and_downloads_profiles():
+    """A profiled route shows up on the admin page and downloads as a file"""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = 'admin'
+    
+    profiling.arm('route:admin_profiles', count=1)
+    assert client.get('/admin/profiles').status_code == 200
+    
+    with app.app_context():
+        record = ProfileRecord.query.filter_by(target='route:admin_profiles').one()
+    page = client.get('/admin/profiles').get_data(as_text=True)
+    assert 'route:admin_profiles' in page
+    
+    download = client.get(f"/admin/profiles/{record.id}/download")
+    assert download.status_code == 200
+    with open(os.path.join(PROFILES_DIR, record.file_name), 'rb') as f:
+        assert download.data == f.read()
+    assert client.get('/admin/profiles/999999/download').status_code == 404
+
+def test_arm_is_refused_while_disabled():
+    """Arming a target with profiling turned off is an error, not a silent no-op"""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = 'admin'
+    
+    profiling.enabled = False
+    try:
+        response = client.post('/api/profiling/arm', json={'target': 'task:tasks.example'})
+    finally:
+        profiling.enabled = True
+    assert response.status_code == 409
+    assert response.get_json() == {'success': False, 'error': 'Profiling is disabled (PROFILING_ENABLED=False)'}
+    assert 'task:tasks.example' not in profiling.armed_targets()
+
+if __name__ == "__main__":
+    test_armed_target_counts_down_and_saves_records()
+    test_idle_switch_does_nothing()
+    test_sampling_mode_writes_collapsed_stacks()
+    test_admin_lists_and_downloads_profiles()
+    test_arm_is_refused_while_disabled()
+    print("Profiling tests passed")
@@ -0,0 +1,41 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.prompt_registry import PromptRegistry, PromptTemplate, prompts
+
+def test_latest_version_is_active():
+    """Without a pin the highest registered version is used"""
+    assert prompts.get('daily_summary').key == 'daily_summary@2'
+    assert prompts.versions()['summarize_article'] == [1, 2]
+
+def test_pins_select_older_versions():
+    """PROMPT_VERSIONS-style pins override the latest version"""
+    registry = PromptRegistry('greeting=1')
+    registry.register(PromptTemplate('greeting', 1, system="Be brief.", user="Hi {name}"))
+    registry.register(PromptTemplate('greeting', 2, system="Be warm.", user="Hello {name}"))
+    
+    assert registry.get('greeting').key == 'greeting@1'
+    assert registry.get('greeting', 2).key == 'greeting@2'
+
+def test_stable_prefix_does_not_vary_with_input():
+    """Current templates keep every call-specific value out of the system message"""
+    for name in ('summarize_article', 'daily_summary', 'translate_summary'):
+        template = prompts.get(name)
+        first = template.render(language_name='English', title='A', content='one', stories='one', script='one')
+        second = template.render(language_name='German', title='B', content='two', stories='two', script='two')
+        
+        assert first[0] == second[0]
+        assert first[1] != second[1]
+
+def test_article_text_is_not_formatted():
+    """Braces in article text are passed through untouched"""
+    messages = prompts.get('summarize_article').render(language_name='English', title='{x}', content='{y}')
+    assert 'Title: {x}' in messages[1]['content']
+
+if __name__ == "__main__":
+    test_latest_version_is_active()
+    test_pins_select_older_versions()
+    test_stable_prefix_does_not_vary_with_input()
+    test_article_text_is_not_formatted()
+    print("Prompt registry tests passed")
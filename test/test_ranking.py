@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+import random
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta
+from services.ranking_service import RankingService
+
+NOW = datetime(2024, 5, 1, 7, 30)
+
+def row(article_id, language, category, hours_old, cluster_size=1, source='Wire'):
+    return (article_id, language, category, source, NOW - timedelta(hours=hours_old), cluster_size)
+
+def test_top_k_per_language_in_one_pass():
+    """Every language gets its own top k from a shared pool"""
+    rows = [row(1, 'en', 'general', 1), row(2, 'en', 'business', 10), row(3, 'en', 'sports', 20),
+            row(4, 'es', 'general', 2), row(5, 'es', 'technology', 30)]
+    ranked = RankingService().rank(rows, k=2, now=NOW)
+    
+    assert ranked['en'] == [1, 2]
+    assert ranked['es'] == [4, 5]
+
+def test_widely_covered_story_outranks_fresher_single_source():
+    """A big cluster beats a slightly newer one-outlet story"""
+    rows = [row(1, 'en', 'general', 1), row(2, 'en', 'business', 3, cluster_size=12)]
+    assert RankingService().rank(rows, k=1, now=NOW)['en'] == [2]
+
+def test_category_coverage_spreads_the_briefing():
+    """A second story from the same category loses to a fresh story from another"""
+    rows = [row(1, 'en', 'sports', 0), row(2, 'en', 'sports', 0.5), row(3, 'en', 'business', 1)]
+    assert RankingService().rank(rows, k=2, now=NOW)['en'] == [1, 3]
+
+def test_ranking_large_pool_stays_fast():
+    """Scoring tens of thousands of candidates takes milliseconds, not seconds"""
+    generator = random.Random(3)
+    categories = ['general', 'business', 'technology', 'sports', 'entertainment']
+    rows = [row(i, generator.choice(['en', 'es', 'fr', 'de', 'pt']), generator.choice(categories),
+                generator.uniform(0, 24), generator.randint(1, 8)) for i in range(50000)]
+    start = time.perf_counter()
+    ranked = RankingService().rank(rows, k=5, now=NOW)
+    elapsed = time.perf_counter() - start
+    
+    assert sorted(ranked) == ['de', 'en', 'es', 'fr', 'pt']
+    assert all(len(ids) == 5 for ids in ranked.values())
+    assert elapsed < 1.0
+
+if __name__ == "__main__":
+    test_top_k_per_language_in_one_pass()
+    test_widely_covered_story_outranks_fresher_single_source()
+    test_category_coverage_spreads_the_briefing()
+    test_ranking_large_pool_stays_fast()
+    print("Ranking tests passed")
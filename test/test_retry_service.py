@@ -0,0 +1,88 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+from types import SimpleNamespace
+from services.retry_service import RetryService
+
+def test_backoff_delay_bounds():
+    """Backoff grows exponentially, stays jittered and never exceeds the cap"""
+    retry_service = RetryService()
+    retry_service.base_delay = 10
+    retry_service.max_delay = 100
+    
+    for attempt, ceiling in [(1, 10), (2, 20), (3, 40), (4, 80), (5, 100), (9, 100)]:
+        for _ in range(50):
+            delay = retry_service.backoff_delay(attempt)
+            assert ceiling / 2 <= delay <= ceiling
+
+def test_should_retry_budget_and_status():
+    """Transient failures are retried until the attempt budget runs out"""
+    retry_service = RetryService()
+    retry_service.max_attempts = 3
+    
+    assert retry_service.should_retry(1)
+    assert retry_service.should_retry(2, 429)
+    assert retry_service.should_retry(2, 503)
+    assert not retry_service.should_retry(1, 400)
+    assert not retry_service.should_retry(3)
+
+def test_idempotency_key_per_user_and_edition():
+    """The same user and edition always produce the same key"""
+    retry_service = RetryService()
+    edition = retry_service.edition_for(datetime(2024, 5, 1, 7, 30))
+    
+    assert edition == '2024-05-01'
+    assert retry_service.idempotency_key(42, edition) == retry_service.idempotency_key(42, edition)
+    assert retry_service.idempotency_key(42, edition) != retry_service.idempotency_key(43, edition)
+
+class RecordingRetryService(RetryService):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+    
+    def release(self, key):
+        self.calls.append(('release', key))
+    
+    def dead_letter(self, user_id, key, language, audio_filename, attempts, error_message=None):
+        self.calls.append(('dead_letter', key, error_message))
+
+def retry_or_dead_letter(last_status_code, last_outcome_unknown):
+    import tasks
+    retry_service = RecordingRetryService()
+    whatsapp_service = SimpleNamespace(last_status_code=last_status_code, last_outcome_unknown=last_outcome_unknown)
+    user = SimpleNamespace(id=42)
+    scheduled = []
+    
+    original = tasks.retry_delivery_task.apply_async
+    tasks.retry_delivery_task.apply_async = lambda **kwargs: scheduled.append(kwargs)
+    try:
+        retried = tasks._retry_or_dead_letter(retry_service, whatsapp_service, user, 'en', 'daily.mp3',
+                                              'Summary', '2024-05-01', 1)
+    finally:
+        tasks.retry_delivery_task.apply_async = original
+    return retried, scheduled, retry_service.calls
+
+def test_ambiguous_sends_are_dead_lettered_not_retried():
+    """A send that may have gone through keeps its claim and is never sent again"""
+    retried, scheduled, calls = retry_or_dead_letter(None, True)
+    
+    assert not retried and scheduled == []
+    assert [call[0] for call in calls] == ['dead_letter']
+    assert 'Outcome unknown' in calls[0][2]
+
+def test_failed_sends_release_their_claim_and_retry():
+    """A send that never reached WhatsApp is released and retried"""
+    retried, scheduled, calls = retry_or_dead_letter(503, False)
+    
+    assert retried and len(scheduled) == 1
+    assert calls == [('release', 'daily:2024-05-01:42')]
+
+if __name__ == "__main__":
+    test_backoff_delay_bounds()
+    test_should_retry_budget_and_status()
+    test_idempotency_key_per_user_and_edition()
+    test_ambiguous_sends_are_dead_lettered_not_retried()
+    test_failed_sends_release_their_claim_and_retry()
+    print("Retry service tests passed")
@@ -0,0 +1,51 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.seen_filter_service import BloomFilter, article_key
+
+def test_no_false_negatives():
+    """Every added key is reported as present"""
+    bloom = BloomFilter(1000, 0.01)
+    keys = [article_key(f"Headline {i}", 'Reuters') for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    
+    assert all(key in bloom for key in keys)
+    assert bloom.items == 1000
+
+def test_false_positive_rate_near_target():
+    """A filter at capacity stays close to its configured false-positive rate"""
+    bloom = BloomFilter(5000, 0.01)
+    for i in range(5000):
+        bloom.add(article_key(f"Stored {i}", 'AP'))
+    
+    false_positives = sum(1 for i in range(20000) if article_key(f"Fresh {i}", 'AP') in bloom)
+    assert false_positives / 20000.0 < 0.02
+    assert abs(bloom.expected_fp_rate() - 0.01) < 0.005
+
+def test_memory_cap_raises_expected_rate():
+    """Clamping to the memory budget shrinks the filter and reports the higher rate"""
+    bloom = BloomFilter(100000, 0.001, max_bytes=16 * 1024)
+    for i in range(20000):
+        bloom.add(article_key(f"Item {i}", None))
+    
+    assert len(bloom.data) == 16 * 1024
+    assert bloom.expected_fp_rate() > 0.001
+
+def test_restore_round_trip():
+    """A filter restored from its metadata and bytes answers the same way"""
+    bloom = BloomFilter(100, 0.01)
+    bloom.add(article_key('Council approves budget', 'BBC'))
+    copy = BloomFilter.restore(bloom.meta(), bytes(bloom.data))
+    
+    assert article_key('Council approves budget', 'BBC') in copy
+    assert copy.meta() == bloom.meta()
+    assert copy.data == bloom.data
+
+if __name__ == "__main__":
+    test_no_false_negatives()
+    test_false_positive_rate_near_target()
+    test_memory_cap_raises_expected_rate()
+    test_restore_round_trip()
+    print("Seen filter tests passed")
@@ -0,0 +1,128 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from collections import Counter
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+from services.sender_pool import Sender, SenderPool
+from services import async_runtime
+from services.whatsapp_service import WhatsAppService, AsyncWhatsAppService
+from models import User, DeliveryLog
+
+def create_pool(count):
+    pool = SenderPool([Sender(f"phone{i}", f"token{i}") for i in range(count)])
+    pool.rate = 1000
+    # Keep the test offline: make every Redis call fall back to local state
+    pool.acquire = lambda sender: True
+    pool.is_healthy = lambda sender: pool._local_degraded.get(sender.phone_id, 0) == 0
+    return pool
+
+def test_assignment_is_stable_and_balanced():
+    """Recipients keep their sender and spread roughly evenly across the pool"""
+    pool = create_pool(4)
+    recipients = [f"1555{i:07d}" for i in range(4000)]
+    
+    first = [pool.candidates(r)[0].phone_id for r in recipients]
+    assert first == [pool.candidates(r)[0].phone_id for r in recipients]
+    
+    counts = Counter(first)
+    assert len(counts) == 4
+    assert min(counts.values()) > 600
+
+def test_adding_sender_moves_few_recipients():
+    """Consistent hashing only reassigns the share taken by the new sender"""
+    recipients = [f"1555{i:07d}" for i in range(4000)]
+    before = create_pool(4)
+    after = create_pool(5)
+    
+    moved = sum(1 for r in recipients if before.candidates(r)[0].phone_id != after.candidates(r)[0].phone_id)
+    assert moved < len(recipients) * 0.35
+
+def test_route_fails_over_past_degraded_sender():
+    """A degraded home sender hands its recipients to the next one on the ring"""
+    pool = create_pool(3)
+    recipient = '15550000001'
+    home, backup = pool.candidates(recipient)[:2]
+    
+    pool._local_degraded[home.phone_id] = 1
+    assert next(pool.route(recipient)).phone_id == backup.phone_id
+
+class FakeResponse:
+    status_code = 200
+    headers = {}
+    
+    def raise_for_status(self):
+        pass
+    
+    def json(self):
+        return {'messages': [{'id': 'wamid.1'}]}
+
+class FakeHttp:
+    def __init__(self, first_error):
+        self.first_error = first_error
+        self.urls = []
+    
+    def post(self, url, **kwargs):
+        self.urls.append(url)
+        if len(self.urls) == 1:
+            raise self.first_error
+        return FakeResponse()
+
+def send_with_first_error(error):
+    service = WhatsAppService(sender_pool=create_pool(3))
+    service.http = FakeHttp(error)
+    try:
+        return service._post_message('15550000001', {}), service.http.urls, service.last_outcome_unknown
+    except requests.exceptions.RequestException as e:
+        return e, service.http.urls, service.last_outcome_unknown
+
+def test_connect_failure_fails_over():
+    """A request that never connected is sent through the next sender"""
+    refused = NewConnectionError(None, 'Connection refused')
+    result, urls, outcome_unknown = send_with_first_error(requests.exceptions.ConnectionError(MaxRetryError(None, '/messages', refused)))
+    
+    assert result == FakeResponse().json() and not outcome_unknown
+    assert len(urls) == 2 and urls[0] != urls[1]
+
+def test_read_timeout_does_not_fail_over():
+    """A send that may have gone through is left to the retry path, never resent"""
+    result, urls, outcome_unknown = send_with_first_error(requests.exceptions.ReadTimeout('read timed out'))
+    
+    assert isinstance(result, requests.exceptions.ReadTimeout) and outcome_unknown
+    assert len(urls) == 1
+
+def test_services_share_the_worker_sender_pool():
+    """WhatsApp services reuse the registered pool instead of building a ring each"""
+    pool = WhatsAppService().sender_pool
+    
+    assert WhatsAppService().sender_pool is pool
+    assert AsyncWhatsAppService(client=FakeAsyncHttp()).sender_pool is pool
+
+class FakeAsyncHttp:
+    def __init__(self):
+        self.urls = []
+    
+    async def post(self, url, **kwargs):
+        self.urls.append(url)
+        return FakeResponse()
+
+def test_async_send_buffers_database_writes():
+    """Sends on the event loop leave every row for save_pending, outside any app context"""
+    user = User(id=7, phone_number='15550000007', language='en')
+    service = AsyncWhatsAppService(create_pool(2), FakeAsyncHttp())
+    
+    assert async_runtime.run(service.send_daily_news(user, 'daily_en.mp3', 'Top stories', idempotency_key='7:today'))
+    assert user.last_delivery is not None
+    deliveries = [row for row in service.pending if isinstance(row, DeliveryLog)]
+    assert [(row.status, row.message_id, row.idempotency_key) for row in deliveries] == [('sent', 'wamid.1', '7:today')]
+
+if __name__ == "__main__":
+    test_assignment_is_stable_and_balanced()
+    test_adding_sender_moves_few_recipients()
+    test_route_fails_over_past_degraded_sender()
+    test_connect_failure_fails_over()
+    test_read_timeout_does_not_fail_over()
+    test_services_share_the_worker_sender_pool()
+    test_async_send_buffers_database_writes()
+    print("Sender pool tests passed")
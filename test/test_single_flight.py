@@ -0,0 +1,93 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import uuid
+import threading
+from services.single_flight import SingleFlight, fingerprint
+
+def run_concurrently(flight, key, fn, count=5):
+    results, errors = [], []
+    
+    def worker():
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+def test_concurrent_calls_share_one_execution():
+    """Identical concurrent calls run the work once and all get its result"""
+    calls = []
+    
+    def work():
+        calls.append(1)
+        time.sleep(0.3)
+        return 'Good morning, here is the news.'
+    
+    results, errors = run_concurrently(SingleFlight('test'), uuid.uuid4().hex, work)
+    
+    assert len(calls) == 1
+    assert results == ['Good morning, here is the news.'] * 5
+    assert not errors
+
+def test_leader_errors_reach_followers():
+    """Followers see the leader's failure rather than a silent None"""
+    def work():
+        time.sleep(0.3)
+        raise RuntimeError('provider timeout')
+    
+    results, errors = run_concurrently(SingleFlight('test'), uuid.uuid4().hex, work, count=3)
+    
+    assert not results
+    assert len(errors) == 3
+    assert all(str(e) == 'provider timeout' for e in errors)
+
+def test_streams_share_one_execution():
+    """The leader streams its chunks; concurrent followers get the whole text once"""
+    calls = []
+    
+    def work():
+        calls.append(1)
+        for chunk in ['Good ', 'morning, ', 'here is the news.']:
+            time.sleep(0.1)
+            yield chunk
+    
+    flight = SingleFlight('test')
+    key = uuid.uuid4().hex
+    chunks = {}
+    
+    def worker(index):
+        chunks[index] = list(flight.stream(key, work))
+    
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join()
+    
+    assert len(calls) == 1
+    assert chunks[0] == ['Good ', 'morning, ', 'here is the news.']
+    assert all(chunks[i] == ['Good morning, here is the news.'] for i in range(1, 4))
+
+def test_fingerprint_covers_every_input():
+    """Keys change with any part of the request"""
+    messages = [{'role': 'user', 'content': 'Stories'}]
+    
+    assert fingerprint('gpt-3.5-turbo', 'en', messages) == fingerprint('gpt-3.5-turbo', 'en', messages)
+    assert fingerprint('gpt-3.5-turbo', 'en', messages) != fingerprint('gpt-3.5-turbo', 'es', messages)
+
+if __name__ == "__main__":
+    test_concurrent_calls_share_one_execution()
+    test_leader_errors_reach_followers()
+    test_streams_share_one_execution()
+    test_fingerprint_covers_every_input()
+    print("Single flight tests passed")
@@ -0,0 +1,168 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import contextlib
+from datetime import datetime
+from flask import Flask
+from clients import clients
+from models import db, FeedState, NewsArticle
+from services.news_service import NewsService
+from services.source_adapters import RSSAdapter, parse_timestamp
+
+RSS = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Example Wire</title>
+<item><title>Council approves budget</title><link>https://example.com/a</link>
+<description>&lt;p&gt;The council &lt;b&gt;approved&lt;/b&gt; the budget.&lt;/p&gt;</description>
+<pubDate>Wed, 01 May 2024 07:00:00 +0200</pubDate></item>
+<item><title>Old story</title><link>https://example.com/b</link><description>Older</description>
+<pubDate>Tue, 30 Apr 2024 07:00:00 +0000</pubDate></item>
+</channel></rss>"""
+
+ATOM = b"""<?xml version="1.0"?>
+<feed xmlns="http://www.w3.org/2005/Atom"><title>Atom Wire</title>
+<entry><title>Satellite launch delayed</title><link href="https://example.com/c"/>
+<summary>Weather pushed the launch.</summary><updated>2024-05-01T06:30:00Z</updated></entry>
+</feed>"""
+
+class Response:
+    def __init__(self, content, status_code=200):
+        self.content = content
+        self.status_code = status_code
+        self.headers = {'ETag': 'v1'}
+    
+    def raise_for_status(self):
+        pass
+
+class Session:
+    def __init__(self, content):
+        self.content = content
+    
+    def get(self, url, params=None, headers=None, timeout=None):
+        return Response(self.content)
+
+@contextlib.contextmanager
+def serving(content):
+    # Swaps the shared feed session for a fake; the real factory is back afterwards
+    # and its next get() builds a fresh client
+    saved = clients.factories['feeds_http']
+    clients.register('feeds_http', lambda: Session(content))
+    clients.reset('feeds_http')
+    try:
+        yield
+    finally:
+        clients.reset('feeds_http')
+        clients.register('feeds_http', *saved)
+
+def fetch(adapter, content, state):
+    feed = adapter.feeds(['en'], ['general'])[0]
+    with serving(content):
+        return list(adapter.fetch(feed, state))
+
+def test_rss_records_are_normalized():
+    """RSS items become plain-text records with UTC timestamps"""
+    records = fetch(RSSAdapter(['en|general|https://example.com/rss']), RSS, {})
+    
+    assert records[0]['title'] == 'Council approves budget'
+    assert records[0]['content'] == 'The council approved the budget.'
+    assert records[0]['source'] == 'Example Wire'
+    assert records[0]['published_at'] == datetime(2024, 5, 1, 5, 0)
+
+def test_atom_feeds_are_supported():
+    """Atom entries are read the same way as RSS items"""
+    records = fetch(RSSAdapter(['en|general|https://example.com/atom']), ATOM, {})
+    
+    assert [(r['title'], r['url'], r['published_at']) for r in records] == [
+        ('Satellite launch delayed', 'https://example.com/c', datetime(2024, 5, 1, 6, 30))]
+
+def test_high_water_mark_and_unchanged_feeds_are_skipped():
+    """Items older than the mark are dropped, and an identical body is not parsed again"""
+    adapter = RSSAdapter(['en|general|https://example.com/rss'])
+    state = {'last_published_at': datetime(2024, 5, 1, 0, 0)}
+    
+    assert [r['title'] for r in fetch(adapter, RSS, state)] == ['Council approves budget']
+    assert state['last_published_at'] == datetime(2024, 5, 1, 5, 0)
+    assert state['etag'] == 'v1'
+    assert fetch(adapter, RSS, state) == []
+    assert state['unchanged'] is True
+
+def test_same_items_in_a_new_body_are_skipped():
+    """A body that changed but lists the same item URLs yields nothing new"""
+    adapter = RSSAdapter(['en|general|https://example.com/rss'])
+    state = {}
+    assert len(fetch(adapter, RSS, state)) == 2
+    
+    rebuilt = RSS.replace(b'<title>Example Wire</title>', b'<title>Example Wire</title><lastBuildDate>now</lastBuildDate>')
+    assert fetch(adapter, rebuilt, state) == []
+    assert state['unchanged'] is True
+    assert state['items_seen'] == 4
+
+def test_feed_state_round_trips_through_the_database():
+    """High-water mark, digests and validators survive between fetch cycles"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    adapter = RSSAdapter(['en|general|https://example.com/rss'])
+    feed = adapter.feeds(['en'], ['general'])[0]
+    service = NewsService(adapters=[adapter])
+    
+    with app.app_context():
+        db.create_all()
+        states = service._load_feed_states([feed])
+        state = states[service._feed_key(feed)]
+        fetch(adapter, RSS, state)
+        service._save_feed_states([feed], states)
+        
+        row = FeedState.query.one()
+        assert row.last_published_at == datetime(2024, 5, 1, 5, 0)
+        assert row.etag == 'v1' and row.items_seen == 2
+        assert row.content_digest and row.seen_urls_digest
+        
+        reloaded = service._load_feed_states([feed])[service._feed_key(feed)]
+        assert fetch(adapter, RSS, reloaded) == []
+        assert reloaded['unchanged'] is True
+
+def test_feed_state_waits_for_a_committed_insert():
+    """If a feed's articles fail to insert, its state is kept and the next fetch returns them"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    adapter = RSSAdapter(['en|general|https://example.com/rss'])
+    feed = adapter.feeds(['en'], ['general'])[0]
+    service = NewsService(adapters=[adapter])
+    
+    with app.app_context(), serving(RSS):
+        db.create_all()
+        NewsArticle.__table__.drop(db.engine)
+        assert len(service.ingest([feed])) == 2
+        assert FeedState.query.count() == 0
+        
+        NewsArticle.__table__.create(db.engine)
+        assert len(service.ingest([feed])) == 2
+        assert NewsArticle.query.count() == 2
+        assert FeedState.query.one().etag == 'v1'
+
+def test_parse_timestamp_formats():
+    """ISO 8601 and RFC 822 dates both parse; junk does not"""
+    assert parse_timestamp('2024-05-01T07:30:00Z') == datetime(2024, 5, 1, 7, 30)
+    assert parse_timestamp('Wed, 01 May 2024 07:30:00 GMT') == datetime(2024, 5, 1, 7, 30)
+    assert parse_timestamp('yesterday') is None
+
+def test_fake_session_is_removed_after_fetch():
+    """Later tests get the real feed session back"""
+    real_factory = clients.factories['feeds_http']
+    fetch(RSSAdapter(['en|general|https://example.com/rss']), RSS, {})
+    
+    assert clients.factories['feeds_http'] == real_factory
+    assert not isinstance(clients.get('feeds_http'), Session)
+
+if __name__ == "__main__":
+    test_rss_records_are_normalized()
+    test_atom_feeds_are_supported()
+    test_high_water_mark_and_unchanged_feeds_are_skipped()
+    test_same_items_in_a_new_body_are_skipped()
+    test_feed_state_round_trips_through_the_database()
+    test_feed_state_waits_for_a_committed_insert()
+    test_parse_timestamp_formats()
+    test_fake_session_is_removed_after_fetch()
+    print("Source adapter tests passed")
@@ -0,0 +1,43 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.story_cluster_service import StoryClusterService, LSHIndex
+
+class Article:
+    def __init__(self, title, content, source='Wire'):
+        self.title = title
+        self.content = content
+        self.source = source
+
+BASE = ("The Federal Reserve held interest rates steady on Wednesday but signalled that two cuts "
+        "remain likely before the end of the year as inflation continues to cool across the economy")
+
+def test_rewrites_of_one_story_share_an_lsh_bucket():
+    """Outlet suffixes and small edits still land the copies in one bucket"""
+    service = StoryClusterService()
+    original = service.signature(service.shingles(Article("Fed holds rates steady - Reuters", BASE)))
+    rewrite = service.signature(service.shingles(Article(
+        "Fed holds rates steady - CNBC", BASE.replace('on Wednesday', 'on Wednesday afternoon') + " [+2150 chars]")))
+    other = service.signature(service.shingles(Article(
+        "Storm closes airports", "A winter storm grounded hundreds of flights across the northeast on Monday morning")))
+    
+    index = LSHIndex(service.bands, service.rows)
+    index.add(1, original)
+    index.add(2, other)
+    
+    assert service.similarity(original, rewrite) >= service.threshold
+    assert service.similarity(original, other) < service.threshold
+    assert 1 in index.candidates(rewrite)
+    assert 2 not in index.candidates(rewrite)
+
+def test_signatures_are_stable_across_instances():
+    """Stored signatures stay comparable after a restart"""
+    article = Article("Fed holds rates steady", BASE)
+    assert StoryClusterService().signature(StoryClusterService().shingles(article)) == \
+        StoryClusterService().signature(StoryClusterService().shingles(article))
+
+if __name__ == "__main__":
+    test_rewrites_of_one_story_share_an_lsh_bucket()
+    test_signatures_are_stable_across_instances()
+    print("Story clustering tests passed")
@@ -0,0 +1,86 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import base64
+import subprocess
+import xml.etree.ElementTree as ET
+from stub_server import DEFAULT_PROFILE, create_stub_app
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def create_client(seed=42):
+    profile = json.loads(json.dumps(DEFAULT_PROFILE))
+    profile['seed'] = seed
+    for provider in ('newsapi', 'openai', 'tts', 'whatsapp'):
+        profile[provider]['latency'] = {'dist': 'fixed', 'ms': 0}
+    profile['openai']['stream_chunk_ms'] = 0
+    return create_stub_app(profile).test_client()
+
+def headline_urls():
+    articles = create_client().get('/newsapi/v2/top-headlines?category=business&pageSize=5').get_json()['articles']
+    return [(article['title'], article['url']) for article in articles]
+
+def test_newsapi_shape_and_determinism():
+    """Seeded runs return the same headlines and URLs, even across processes"""
+    response = create_client().get('/newsapi/v2/top-headlines?category=business&pageSize=5').get_json()
+    
+    assert response['status'] == 'ok' and response['totalResults'] == 5
+    article = response['articles'][0]
+    assert article['title'].startswith('Business: ') and article['source']['name']
+    assert article['url'].startswith('https://stub.local/business/')
+    assert headline_urls() == headline_urls()
+    
+    # hash() would differ between these two interpreters
+    script = ("import sys, json; sys.path.insert(0, 'test'); from test_stub_server import headline_urls; "
+              "print(json.dumps(headline_urls()))")
+    outputs = [
+        subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True,
+                       env=dict(os.environ, PYTHONHASHSEED=seed)).stdout.strip().splitlines()[-1]
+        for seed in ('1', '2')
+    ]
+    assert outputs[0] == outputs[1]
+
+def test_rss_feed_shape_and_determinism():
+    """RSS items parse as RSS 2.0 and repeat for the same seed"""
+    def links():
+        body = create_client().get('/rss/technology.xml?items=4').data
+        items = ET.fromstring(body).find('channel').findall('item')
+        assert len(items) == 4
+        assert all(item.find('pubDate').text and item.find('description').text for item in items)
+        return [item.find('link').text for item in items]
+    
+    first = links()
+    assert first == links()
+    assert all(link.startswith('https://stub.local/rss/technology/') for link in first)
+
+def test_openai_completion_and_stream():
+    """Completions honour max_tokens; streams end with [DONE]"""
+    client = create_client()
+    request = {'model': 'gpt-3.5-turbo', 'max_tokens': 30, 'messages': [{'role': 'user', 'content': 'x' * 400}]}
+    
+    completion = client.post('/openai/v1/chat/completions', json=request).get_json()
+    assert len(completion['choices'][0]['message']['content'].split()) == 30
+    assert completion['usage']['prompt_tokens'] == 100 and completion['usage']['completion_tokens'] == 30
+    
+    stream = client.post('/openai/v1/chat/completions', json=dict(request, stream=True)).data.decode()
+    events = [line[len('data: '):] for line in stream.splitlines() if line.startswith('data: ')]
+    assert events[-1] == '[DONE]'
+    text = ''.join(json.loads(event)['choices'][0]['delta'].get('content', '') for event in events[:-1])
+    assert len(text.split()) == 30
+
+def test_tts_audio_scales_with_text():
+    """Synthesized audio is base64 and sized per input character"""
+    response = create_client().post('/v1/text:synthesize', json={'input': {'text': 'hello world'}}).get_json()
+    audio = base64.b64decode(response['audioContent'])
+    
+    assert len(audio) == len('hello world') * DEFAULT_PROFILE['tts']['audio_bytes_per_char']
+    assert audio[:2] == b'\xff\xf3'
+
+if __name__ == "__main__":
+    test_newsapi_shape_and_determinism()
+    test_rss_feed_shape_and_determinism()
+    test_openai_completion_and_stream()
+    test_tts_audio_scales_with_text()
+    print("Stub server tests passed")
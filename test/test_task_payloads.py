@@ -0,0 +1,77 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import random
+import services.task_payloads as task_payloads_module
+from services.task_payloads import pack_ids, unpack_ids, result_report
+
+class FakeRedis:
+    def __init__(self, values, ttls):
+        self.values = values
+        self.ttls = ttls
+        self.replies = []
+    
+    def scan_iter(self, match=None, count=None):
+        return iter(self.values)
+    
+    def pipeline(self):
+        return self
+    
+    def strlen(self, key):
+        self.replies.append(len(self.values[key]))
+    
+    def ttl(self, key):
+        self.replies.append(self.ttls[key])
+    
+    def execute(self):
+        replies, self.replies = self.replies, []
+        return replies
+
+def test_consecutive_ids_pack_to_ranges():
+    """Runs of ids travel as [first, last] pairs"""
+    ids = list(range(1, 5001)) + list(range(6000, 6100))
+    payload = pack_ids(reversed(ids))
+    
+    assert payload == {'ranges': [[1, 5000], [6000, 6099]]}
+    assert unpack_ids(payload) == ids
+
+def test_scattered_ids_pack_smaller_than_a_list():
+    """Sparse ids are compressed and still decode exactly"""
+    random.seed(7)
+    ids = sorted(random.sample(range(1, 200000), 5000))
+    payload = pack_ids(ids)
+    
+    assert 'packed' in payload and payload['count'] == 5000
+    assert unpack_ids(payload) == ids
+    assert len(json.dumps(payload)) < len(json.dumps(ids)) / 3
+
+def test_plain_lists_still_accepted():
+    """Messages queued before the upgrade carry plain id lists"""
+    assert unpack_ids([3, 1, 2]) == [3, 1, 2]
+    assert unpack_ids(None) == []
+    assert unpack_ids(pack_ids([])) == []
+
+def test_result_report_sums_size_and_expiry():
+    """The report counts results, their bytes and the TTL range"""
+    fake = FakeRedis({'celery-task-meta-a': 'x' * 100, 'celery-task-meta-b': 'y' * 50, 'celery-task-meta-c': 'z'},
+                     {'celery-task-meta-a': 3000, 'celery-task-meta-b': 60, 'celery-task-meta-c': -1})
+    original = task_payloads_module.get_redis
+    task_payloads_module.get_redis = lambda: fake
+    try:
+        report = result_report(limit=10)
+    finally:
+        task_payloads_module.get_redis = original
+    
+    assert report['results'] == 3 and not report['truncated']
+    assert report['bytes'] == 151 and report['largest_bytes'] == 100
+    assert report['persistent'] == 1
+    assert (report['min_ttl_seconds'], report['max_ttl_seconds']) == (60, 3000)
+
+if __name__ == "__main__":
+    test_consecutive_ids_pack_to_ranges()
+    test_scattered_ids_pack_smaller_than_a_list()
+    test_plain_lists_still_accepted()
+    test_result_report_sums_size_and_expiry()
+    print("Task payload tests passed")
@@ -0,0 +1,54 @@
+import os
+import sys
+import json
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.task_progress_service import TaskProgressService
+import services.task_progress_service as task_progress_module
+
+class DownRedis:
+    def __getattr__(self, name):
+        raise ConnectionError('redis unavailable')
+
+def make_service():
+    task_progress_module.get_redis = lambda: DownRedis()
+    service = TaskProgressService()
+    service.heartbeat = 0.05
+    service.timeout = 5
+    return service
+
+def parse(events):
+    return [(chunk.split('\n')[0], json.loads(chunk.split('data: ', 1)[1])) for chunk in events if chunk.startswith('event:')]
+
+def test_stream_reports_progress_until_finished():
+    """The stream sends the current state, then updates, then a done event"""
+    service = make_service()
+    service.update('task-1', stage='summarizing', total=2, done=0, state='running')
+    
+    def worker():
+        service.increment('task-1', 'done')
+        service.increment('task-1', 'done')
+        service.update('task-1', stage='done', state='completed')
+    
+    threading.Timer(0.1, worker).start()
+    events = parse(service.stream('task-1'))
+    
+    assert events[0][0] == 'event: progress'
+    assert events[0][1]['stage'] == 'summarizing'
+    assert events[-1][0] == 'event: done'
+    assert events[-1][1]['done'] == 2
+    assert events[-1][1]['state'] == 'completed'
+
+def test_stream_stops_on_task_failure():
+    """A failed Celery task ends the stream even without progress updates"""
+    service = make_service()
+    events = parse(service.stream('task-2', celery_state=lambda task_id: 'FAILURE'))
+    
+    assert events[-1][0] == 'event: done'
+    assert events[-1][1]['task_state'] == 'FAILURE'
+
+if __name__ == "__main__":
+    test_stream_reports_progress_until_finished()
+    test_stream_stops_on_task_failure()
+    print("Task progress tests passed")
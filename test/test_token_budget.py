@@ -0,0 +1,45 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.token_budget import TokenBudget
+
+def test_truncate_fits_budget_on_a_boundary():
+    """Truncated text fits the budget and ends on a sentence or word"""
+    budget = TokenBudget()
+    text = "The council met on Monday. " * 40
+    trimmed = budget.truncate(text, 50)
+    
+    assert budget.count(trimmed) <= 50
+    assert trimmed.endswith('.')
+    assert text.startswith(trimmed)
+
+def test_truncate_keeps_short_text():
+    """Text already within budget is returned unchanged"""
+    budget = TokenBudget()
+    assert budget.truncate("Short story.", 100) == "Short story."
+
+def test_fit_shares_budget_fairly():
+    """Short inputs stay whole and long ones split what is left"""
+    budget = TokenBudget()
+    short = "Brief update."
+    long_text = "A much longer story with many details. " * 50
+    result = budget.fit([short, long_text, long_text], 300)
+    
+    assert result[0] == short
+    assert sum(budget.count(text) for text in result) <= 300
+    assert abs(budget.count(result[1]) - budget.count(result[2])) <= 2
+
+def test_completion_limit_follows_audio_length():
+    """Longer audio and wordier languages get larger completion limits"""
+    budget = TokenBudget()
+    
+    assert budget.max_tokens_for_audio(150, 'en') > budget.max_tokens_for_audio(60, 'en')
+    assert budget.max_tokens_for_audio(150, 'de') > budget.max_tokens_for_audio(150, 'en')
+
+if __name__ == "__main__":
+    test_truncate_fits_budget_on_a_boundary()
+    test_truncate_keeps_short_text()
+    test_fit_shares_budget_fairly()
+    test_completion_limit_follows_audio_length()
+    print("Token budget tests passed")
@@ -0,0 +1,44 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta
+from models import TraceSpan
+from tracing import Tracer, build_trace_view
+
+def make_span(span_id, parent_id, name, start_ms, duration_ms):
+    base = datetime(2024, 5, 1, 7, 30)
+    return TraceSpan(trace_id='t' * 32, span_id=span_id, parent_id=parent_id, name=name,
+                     started_at=base + timedelta(milliseconds=start_ms), duration_ms=duration_ms, status='ok')
+
+def test_critical_path_follows_last_finishing_child():
+    """The critical path runs through the language task that finished last"""
+    spans = [
+        make_span('root', None, 'task:daily_delivery_task', 0, 50),
+        make_span('en', 'root', 'task:process_language_delivery', 10, 900),
+        make_span('es', 'root', 'task:process_language_delivery', 12, 2400),
+        make_span('es-llm', 'es', 'openai.daily_summary', 20, 2000),
+        make_span('es-tts', 'es', 'google_tts.synthesize', 2030, 300)
+    ]
+    view = build_trace_view(spans)
+    
+    assert [span.span_id for span in view['critical_path']] == ['root', 'es', 'es-tts']
+    assert [row['depth'] for row in view['rows']] == [0, 1, 1, 2, 2]
+
+def test_nested_spans_share_trace_and_link_parents():
+    """Spans opened inside another span join its trace as children"""
+    tracer = Tracer()
+    tracer.enabled = False
+    with tracer.span('outer') as outer:
+        with tracer.span('inner') as inner:
+            pass
+    
+    assert inner.trace_id == outer.trace_id
+    assert inner.parent_id == outer.span_id
+    assert outer.parent_id is None
+    assert tracer.current_span() is None
+
+if __name__ == "__main__":
+    test_critical_path_follows_last_finishing_child()
+    test_nested_spans_share_trace_and_link_parents()
+    print("Tracing tests passed")
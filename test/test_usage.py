@@ -0,0 +1,88 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from types import SimpleNamespace
+from usage import UsageLedger, usage
+from tracing import tracer
+from services.ai_service import AIService
+
+def make_ledger():
+    ledger = UsageLedger()
+    ledger.batch_size = 1000
+    ledger.flush_interval = 3600
+    return ledger
+
+def test_track_records_reported_usage_with_run_and_stage():
+    """A tracked call is tagged with the current run and the span it was made from"""
+    ledger = make_ledger()
+    with tracer.span('daily_summary'), ledger.run('run-42'):
+        with ledger.track('openai', 'daily_summary', language='es', model='gpt-3.5-turbo') as call:
+            call['prompt_tokens'] = 812
+            call['completion_tokens'] = 301
+    
+    row = ledger.buffer[0]
+    assert row['run_id'] == 'run-42'
+    assert row['stage'] == 'daily_summary'
+    assert row['language'] == 'es'
+    assert (row['prompt_tokens'], row['completion_tokens']) == (812, 301)
+    assert row['success'] is True
+    assert row['latency_ms'] >= 0
+
+def test_track_records_failed_calls():
+    """Calls that raise are still recorded, as failures"""
+    ledger = make_ledger()
+    try:
+        with ledger.track('google_tts', 'synthesize', language='en') as call:
+            call['characters'] = 1200
+            raise RuntimeError('quota exceeded')
+    except RuntimeError:
+        pass
+    
+    row = ledger.buffer[0]
+    assert row['success'] is False
+    assert row['characters'] == 1200
+    assert row['run_id'] is None
+
+def test_estimate_cost_by_provider():
+    """Tokens are priced per thousand and TTS characters per million"""
+    ledger = make_ledger()
+    assert ledger.estimate_cost('google_tts', 0, 0, 1000000) > 0
+    assert ledger.estimate_cost('openai', 1000, 0, 0) > 0
+    assert ledger.estimate_cost('newsapi', 1000, 1000, 1000) == 0.0
+
+class FakeStreamClient:
+    def __init__(self, deltas):
+        self.chat = SimpleNamespace(completions=self)
+        self.deltas = deltas
+    
+    def create(self, **kwargs):
+        return iter([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+                     for delta in self.deltas])
+
+def test_streamed_summary_does_not_capture_the_callers_work():
+    """Between deltas the caller's own span is current; the stream is recorded when it ends"""
+    usage.batch_size = 1000
+    usage.flush_interval = 3600
+    usage.buffer = []
+    article = SimpleNamespace(title='Council approves budget', summary='The council approved it.', content=None)
+    service = AIService(client=FakeStreamClient(['Good ', 'morning.']))
+    
+    current = []
+    with tracer.span('daily_summary_audio'):
+        for delta in service.stream_daily_summary([article], 'en'):
+            current.append(tracer.current_span().name)
+            assert not [row for row in usage.buffer if row['operation'] == 'daily_summary_stream']
+    
+    rows = [row for row in usage.buffer if row['operation'] == 'daily_summary_stream']
+    assert current == ['daily_summary_audio', 'daily_summary_audio']
+    assert len(rows) == 1
+    assert rows[0]['stage'] == 'daily_summary_audio'
+    assert rows[0]['completion_tokens'] == 2 and rows[0]['success'] is True
+
+if __name__ == "__main__":
+    test_track_records_reported_usage_with_run_and_stage()
+    test_track_records_failed_calls()
+    test_estimate_cost_by_provider()
+    test_streamed_summary_does_not_capture_the_callers_work()
+    print("Usage ledger tests passed")
@@ -0,0 +1,205 @@
+import json
+import time
+import secrets
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from config import Config
+from models import db, TraceSpan
+from services import async_runtime
+
+HEADER_NAME = 'dailypod_trace'
+
+_current_span = contextvars.ContextVar('dailypod_current_span', default=None)
+
+class Span:
+    def __init__(self, name, trace_id=None, parent_id=None, attributes=None):
+        self.name = name
+        self.trace_id = trace_id or secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.status = 'ok'
+        self.started_at = datetime.utcnow()
+        self._start = time.perf_counter()
+        self.duration_ms = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def finish(self):
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+
+    def to_row(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'started_at': self.started_at,
+            'duration_ms': self.duration_ms,
+            'status': self.status,
+            'attributes': json.dumps(self.attributes, default=str) if self.attributes else None
+        }
+
+class Tracer:
+    def __init__(self):
+        self.enabled = Config.TRACING_ENABLED
+        self.batch_size = Config.TRACE_FLUSH_BATCH_SIZE
+        self.lock = threading.Lock()
+        self.buffer = []
+        self._task_spans = {}
+
+    def current_span(self):
+        return _current_span.get()
+
+    def start_span(self, name, parent=None, trace_id=None, parent_id=None, **attributes):
+        parent = parent or _current_span.get()
+        if parent is not None and trace_id is None:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        return Span(name, trace_id, parent_id, attributes)
+
+    def end_span(self, span):
+        span.finish()
+        if not self.enabled:
+            return
+        with self.lock:
+            self.buffer.append(span.to_row())
+            full = len(self.buffer) >= self.batch_size
+        if full and not async_runtime.in_loop():
+            self.flush()
+
+    @contextmanager
+    def span(self, name, **attributes):
+        span = self.start_span(name, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.status = 'error'
+            span.set_attribute('error', str(e)[:200])
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span)
+
+    def flush(self):
+        with self.lock:
+            rows, self.buffer = self.buffer, []
+        if not rows:
+            return
+        try:
+            # Own connection so span writes never commit the caller's session
+            with db.engine.begin() as connection:
+                connection.execute(TraceSpan.__table__.insert(), rows)
+        except Exception as e:
+            print(f"Trace flush failed for {len(rows)} spans: {e}")
+
+    def inject(self, headers):
+        span = _current_span.get()
+        if span is not None and headers is not None:
+            headers[HEADER_NAME] = f"{span.trace_id}:{span.span_id}"
+
+    def task_started(self, task_id, task):
+        remote = task.request.get(HEADER_NAME) if task.request else None
+        if remote:
+            trace_id, parent_id = remote.split(':', 1)
+            span = self.start_span(f"task:{task.name}", trace_id=trace_id, parent_id=parent_id, task_id=task_id)
+        else:
+            span = self.start_span(f"task:{task.name}", task_id=task_id)
+        token = _current_span.set(span)
+        self._task_spans[task_id] = (span, token)
+
+    def task_finished(self, task_id, state):
+        entry = self._task_spans.pop(task_id, None)
+        if entry is None:
+            return
+        span, token = entry
+        if state != 'SUCCESS':
+            span.status = 'error'
+        span.set_attribute('state', state)
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            _current_span.set(None)
+        self.end_span(span)
+        self.flush()
+
+    def cleanup(self, days):
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        deleted = TraceSpan.query.filter(TraceSpan.started_at < cutoff).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+tracer = Tracer()
+
+def install_celery_hooks():
+    from celery.signals import before_task_publish, task_prerun, task_postrun
+
+    @before_task_publish.connect(weak=False)
+    def on_before_task_publish(headers=None, **kwargs):
+        tracer.inject(headers)
+
+    @task_prerun.connect(weak=False)
+    def on_task_prerun(task_id=None, task=None, **kwargs):
+        tracer.task_started(task_id, task)
+
+    @task_postrun.connect(weak=False)
+    def on_task_postrun(task_id=None, state=None, **kwargs):
+        tracer.task_finished(task_id, state or 'UNKNOWN')
+
+def build_trace_view(spans):
+    # Lay the spans out as a waterfall and mark the critical path: from the root,
+    # repeatedly follow the child that finished last
+    if not spans:
+        return None
+
+    children = {}
+    by_id = {span.span_id: span for span in spans}
+    roots = []
+    for span in spans:
+        if span.parent_id and span.parent_id in by_id:
+            children.setdefault(span.parent_id, []).append(span)
+        else:
+            roots.append(span)
+    for siblings in children.values():
+        siblings.sort(key=lambda s: s.started_at)
+    roots.sort(key=lambda s: s.started_at)
+
+    def end_of(span):
+        return span.started_at + timedelta(milliseconds=span.duration_ms or 0)
+
+    trace_start = min(span.started_at for span in spans)
+    trace_end = max(end_of(span) for span in spans)
+    total_ms = max((trace_end - trace_start).total_seconds() * 1000, 0.001)
+
+    critical = set()
+    node = max(roots, key=end_of)
+    while node is not None:
+        critical.add(node.span_id)
+        node = max(children.get(node.span_id, []), key=end_of, default=None)
+
+    rows = []
+
+    def walk(span, depth):
+        offset_ms = (span.started_at - trace_start).total_seconds() * 1000
+        rows.append({
+            'span': span,
+            'depth': depth,
+            'offset_pct': offset_ms / total_ms * 100,
+            'width_pct': max((span.duration_ms or 0) / total_ms * 100, 0.2),
+            'critical': span.span_id in critical,
+            'attributes': json.loads(span.attributes) if span.attributes else {}
+        })
+        for child in children.get(span.span_id, []):
+            walk(child, depth + 1)
+
+    for root in roots:
+        walk(root, 0)
+
+    return {
+        'rows': rows,
+        'total_ms': total_ms,
+        'critical_path': [row['span'] for row in rows if row['critical']]
+    }
@@ -0,0 +1,174 @@
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from config import Config
+from models import db, UsageRecord, UsageDaily
+from metrics import metrics
+from tracing import tracer
+from services import async_runtime
+
+# Actual prompt tokens over the local estimate
+ESTIMATE_RATIO_BUCKETS = (0.5, 0.75, 0.9, 0.95, 1.0, 1.05, 1.1, 1.25, 1.5, 2.0)
+
+_run_id = contextvars.ContextVar('dailypod_usage_run_id', default=None)
+
+class UsageLedger:
+    def __init__(self):
+        self.batch_size = Config.USAGE_FLUSH_BATCH_SIZE
+        self.flush_interval = Config.USAGE_FLUSH_INTERVAL
+        self.lock = threading.Lock()
+        self.buffer = []
+        self.last_flush = time.time()
+        self.retry_at = 0
+
+    @contextmanager
+    def run(self, run_id):
+        token = _run_id.set(run_id)
+        try:
+            yield
+        finally:
+            _run_id.reset(token)
+
+    @contextmanager
+    def track(self, provider, operation, language=None, model=None):
+        # The caller fills in what the provider reported (tokens, characters, bytes);
+        # the stage is whatever span the call was made from, e.g. daily_summary
+        span = tracer.current_span()
+        call = {'model': model}
+        start = time.perf_counter()
+        success = True
+        try:
+            with metrics.track_call(provider, operation):
+                yield call
+        except Exception:
+            success = False
+            raise
+        finally:
+            self.record(provider, operation,
+                        latency_ms=(time.perf_counter() - start) * 1000,
+                        success=success,
+                        language=language,
+                        stage=span.name if span else None,
+                        trace_id=span.trace_id if span else None,
+                        **call)
+            if success and call.get('prompt_tokens') and call.get('estimated_prompt_tokens'):
+                metrics.observe('dailypod_prompt_token_estimate_ratio',
+                                call['prompt_tokens'] / float(call['estimated_prompt_tokens']),
+                                buckets=ESTIMATE_RATIO_BUCKETS, operation=operation)
+            if success and call.get('prompt_tokens') and 'cached_prompt_tokens' in call:
+                # Counted as cache hits and misses per token, so /metrics derives the ratio
+                cached = call['cached_prompt_tokens']
+                metrics.inc('dailypod_cache_requests_total', cached, cache='prompt_prefix', result='hit')
+                metrics.inc('dailypod_cache_requests_total', call['prompt_tokens'] - cached,
+                            cache='prompt_prefix', result='miss')
+
+    def record(self, provider, operation, latency_ms=None, success=True, language=None, stage=None,
+               trace_id=None, model=None, prompt_tokens=0, completion_tokens=0, characters=0, audio_bytes=0,
+               estimated_prompt_tokens=None, cached_prompt_tokens=0, prompt_version=None):
+        row = {
+            'provider': provider,
+            'operation': operation,
+            'model': model,
+            'run_id': _run_id.get(),
+            'trace_id': trace_id,
+            'language': language,
+            'stage': stage,
+            'prompt_tokens': prompt_tokens or 0,
+            'estimated_prompt_tokens': estimated_prompt_tokens,
+            'cached_prompt_tokens': cached_prompt_tokens or 0,
+            'prompt_version': prompt_version,
+            'completion_tokens': completion_tokens or 0,
+            'characters': characters or 0,
+            'audio_bytes': audio_bytes or 0,
+            'latency_ms': latency_ms,
+            'success': success,
+            'created_at': datetime.utcnow()
+        }
+        with self.lock:
+            self.buffer.append(row)
+            full = len(self.buffer) >= self.batch_size
+        if (full or time.time() - self.last_flush >= self.flush_interval) and time.time() >= self.retry_at \
+                and not async_runtime.in_loop():
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            rows, self.buffer = self.buffer, []
+            self.last_flush = time.time()
+        if not rows:
+            return
+        try:
+            # Own connection so ledger writes never commit the caller's session
+            with db.engine.begin() as connection:
+                connection.execute(UsageRecord.__table__.insert(), rows)
+        except Exception as e:
+            # Keep the records for the next flush (e.g. SQLite busy with the task's own
+            # write), but never let an unreachable database grow the buffer unbounded
+            with self.lock:
+                self.buffer = (rows + self.buffer)[-self.batch_size * 10:]
+                self.retry_at = time.time() + self.flush_interval
+            print(f"Usage flush failed for {len(rows)} records: {e}")
+
+    def estimate_cost(self, provider, prompt_tokens, completion_tokens, characters):
+        if provider == 'openai':
+            return (prompt_tokens / 1000.0 * Config.OPENAI_PROMPT_COST_PER_1K +
+                    completion_tokens / 1000.0 * Config.OPENAI_COMPLETION_COST_PER_1K)
+        if provider == 'google_tts':
+            return characters / 1000000.0 * Config.TTS_COST_PER_MILLION_CHARS
+        return 0.0
+
+    def rollup(self, day):
+        # Rebuild the aggregates for one day from the raw records; safe to rerun
+        start = datetime(day.year, day.month, day.day)
+        end = start + timedelta(days=1)
+        rows = db.session.query(
+            UsageRecord.provider,
+            UsageRecord.operation,
+            UsageRecord.language,
+            db.func.count(UsageRecord.id),
+            db.func.sum(db.case((UsageRecord.success == False, 1), else_=0)),
+            db.func.sum(UsageRecord.prompt_tokens),
+            db.func.sum(UsageRecord.completion_tokens),
+            db.func.sum(UsageRecord.characters),
+            db.func.sum(UsageRecord.audio_bytes),
+            db.func.sum(UsageRecord.latency_ms)
+        ).filter(
+            UsageRecord.created_at >= start,
+            UsageRecord.created_at < end
+        ).group_by(UsageRecord.provider, UsageRecord.operation, UsageRecord.language).all()
+
+        UsageDaily.query.filter_by(day=start.date()).delete(synchronize_session=False)
+        for provider, operation, language, calls, errors, prompt, completion, characters, audio, latency in rows:
+            db.session.add(UsageDaily(
+                day=start.date(),
+                provider=provider,
+                operation=operation,
+                language=language,
+                calls=calls,
+                errors=errors or 0,
+                prompt_tokens=prompt or 0,
+                completion_tokens=completion or 0,
+                characters=characters or 0,
+                audio_bytes=audio or 0,
+                latency_ms_total=latency or 0,
+                estimated_cost=self.estimate_cost(provider, prompt or 0, completion or 0, characters or 0)
+            ))
+        db.session.commit()
+        return len(rows)
+
+    def cleanup(self, days):
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        deleted = UsageRecord.query.filter(UsageRecord.created_at < cutoff).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+usage = UsageLedger()
+
+def install_celery_hooks():
+    from celery.signals import task_postrun
+
+    @task_postrun.connect(weak=False)
+    def on_task_postrun(**kwargs):
+        usage.flush()